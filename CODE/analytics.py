@@ -0,0 +1,253 @@
+# Juan David Ocampo Gutierrez
+# Nicolás Castro Pacheco
+# Michell Valencia Berdugo
+# Juan David Rivera Durán
+
+"""
+analytics.py
+------------
+
+Agregados de ocupación e ingresos por cancha física, mantenidos al día
+con cada alta, edición o cancelación (Manager los actualiza en sus
+índices), para que los reportes no recorran el histórico.
+
+Se guardan dos tablas en arrays tipados:
+ - por (cancha, fecha): reservas, minutos ocupados e ingresos (en
+   centavos, enteros: sumar y restar no acumula error);
+ - por (cancha, hora de la semana), 7 x 24 celdas por cancha: reservas que
+   empiezan en esa hora, minutos ocupados e ingresos repartidos según los
+   minutos de cada hora.
+
+Cada cambio toca una celda de la primera tabla y las pocas horas que cubre
+la reserva en la segunda. Los reportes por día, semana o mes suman las
+celdas de la primera tabla (cantidad de canchas x días, no de reservas).
+
+La reconstrucción completa (from_reservations) pasa las reservas a
+columnas y, si NumPy está instalado, agrega con bincount; si no, aplica
+las reservas una a una.
+"""
+
+import csv
+from array import array
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from pricing import DIAS
+from reservation import hora_to_minutes
+
+HORAS_SEMANA = 7 * 24
+PERIODOS = ("dia", "semana", "mes")
+# Columnas de los reportes (orden del CSV).
+CAMPOS_PERIODO = ("periodo", "cancha", "cancha_num", "reservas", "horas", "ingresos", "ocupacion")
+CAMPOS_HORA = ("dia", "hora", "cancha", "cancha_num", "reservas", "horas", "ingresos")
+
+
+@lru_cache(maxsize=4096)
+def _ordinal(fecha: str) -> int:
+    # Las fechas se repiten en miles de reservas: se memoriza la conversión.
+    return date.fromisoformat(fecha).toordinal()
+
+
+def _period(periodo: str, d: date) -> Tuple[str, date, date]:
+    # (etiqueta, primer día, último día) del día, semana (ISO, de lunes a domingo)
+    # o mes que contiene a d.
+    if periodo == "dia":
+        return d.isoformat(), d, d
+    if periodo == "semana":
+        year, week, _ = d.isocalendar()
+        first = d - timedelta(days=d.weekday())
+        return f"{year}-W{week:02d}", first, first + timedelta(days=6)
+    first = d.replace(day=1)
+    last = (first + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    return f"{d.year}-{d.month:02d}", first, last
+
+
+class Rollups:
+    def __init__(self):
+        # Canchas físicas (tipo, número) con un código cada una, en orden de aparición.
+        self.courts: List[Tuple[str, int]] = []
+        self._court_codes: Dict[Tuple[str, int], int] = {}
+        # Tabla por (cancha, fecha): (código, ordinal) -> posición en los arrays.
+        self._day_pos: Dict[Tuple[int, int], int] = {}
+        self.day_court = array("H")
+        self.day_ordinal = array("I")
+        self.day_count = array("l")
+        self.day_minutes = array("l")
+        self.day_cents = array("q")
+        # Tabla por (cancha, hora de la semana): posición código * HORAS_SEMANA + hora.
+        self.week_count = array("l")
+        self.week_minutes = array("l")
+        self.week_revenue = array("d")
+
+    # ------------------------------
+    # Actualización incremental
+    # ------------------------------
+    def _court_code(self, tipo: str, numero: int) -> int:
+        code = self._court_codes.get((tipo, numero))
+        if code is None:
+            code = self._court_codes[(tipo, numero)] = len(self.courts)
+            self.courts.append((tipo, numero))
+            self.week_count.extend([0] * HORAS_SEMANA)
+            self.week_minutes.extend([0] * HORAS_SEMANA)
+            self.week_revenue.extend([0.0] * HORAS_SEMANA)
+        return code
+
+    def _day_slot(self, code: int, ordinal: int) -> int:
+        pos = self._day_pos.get((code, ordinal))
+        if pos is None:
+            pos = self._day_pos[(code, ordinal)] = len(self.day_court)
+            self.day_court.append(code)
+            self.day_ordinal.append(ordinal)
+            self.day_count.append(0)
+            self.day_minutes.append(0)
+            self.day_cents.append(0)
+        return pos
+
+    def _apply(self, r, sign: int) -> None:
+        start, end = hora_to_minutes(r.hora), hora_to_minutes(r.hora_fin)
+        code = self._court_code(r.court.tipo, r.court.numero)
+        ordinal = _ordinal(r.fecha)
+        pos = self._day_slot(code, ordinal)
+        self.day_count[pos] += sign
+        self.day_minutes[pos] += sign * (end - start)
+        self.day_cents[pos] += sign * round(r.precio * 100)
+        # Horas de la semana que cubre [start, end): ordinal 1 (0001-01-01) es lunes.
+        base = code * HORAS_SEMANA + (ordinal - 1) % 7 * 24
+        self.week_count[base + start // 60] += sign
+        per_minute = r.precio / (end - start)
+        for h in range(start // 60, -(-end // 60)):
+            overlap = min(end, (h + 1) * 60) - max(start, h * 60)
+            self.week_minutes[base + h] += sign * overlap
+            self.week_revenue[base + h] += sign * per_minute * overlap
+
+    def add(self, r) -> None:
+        self._apply(r, 1)
+
+    def remove(self, r) -> None:
+        self._apply(r, -1)
+
+    # ------------------------------
+    # Reconstrucción completa
+    # ------------------------------
+    @classmethod
+    def from_reservations(cls, reservations: Iterable) -> "Rollups":
+        """Agregados de todas las reservas (vectorizado con NumPy si está disponible)."""
+        rollups = cls()
+        if np is None:
+            for r in reservations:
+                rollups.add(r)
+            return rollups
+        # Una pasada para llevar las reservas a columnas; el resto opera sobre arrays.
+        court, ordinal, start, end, cents = array("H"), array("I"), array("H"), array("H"), array("q")
+        for r in reservations:
+            court.append(rollups._court_code(r.court.tipo, r.court.numero))
+            ordinal.append(_ordinal(r.fecha))
+            start.append(hora_to_minutes(r.hora))
+            end.append(hora_to_minutes(r.hora_fin))
+            cents.append(round(r.precio * 100))
+        if court:
+            rollups._aggregate(*(np.frombuffer(a, dtype=a.typecode) for a in (court, ordinal, start, end, cents)))
+        return rollups
+
+    def _aggregate(self, court, ordinal, start, end, cents) -> None:
+        # Carga las dos tablas desde columnas NumPy (tabla vacía; canchas ya codificadas).
+        start, end, cents = start.astype(np.int64), end.astype(np.int64), cents.astype(np.int64)
+        duration = end - start
+        # Por (cancha, fecha): clave única por par y sumas por grupo.
+        keys, group = np.unique(court.astype(np.int64) << 32 | ordinal.astype(np.int64), return_inverse=True)
+        for key in keys.tolist():
+            self._day_slot(key >> 32, key & 0xFFFFFFFF)
+        n = len(keys)
+        self.day_count = array("l", np.bincount(group, minlength=n).tolist())
+        self.day_minutes = array("l", np.bincount(group, weights=duration, minlength=n).astype(np.int64).tolist())
+        # Las sumas por peso son float64: exactas mientras el total quede bajo 2**53 centavos.
+        self.day_cents = array("q", np.rint(np.bincount(group, weights=cents, minlength=n)).astype(np.int64).tolist())
+        # Por (cancha, hora de la semana): una pasada vectorizada por hora del día.
+        size = len(self.courts) * HORAS_SEMANA
+        base = court.astype(np.int64) * HORAS_SEMANA + (ordinal.astype(np.int64) - 1) % 7 * 24
+        count = np.bincount(base + start // 60, minlength=size)
+        minutes = np.zeros(size, dtype=np.int64)
+        revenue = np.zeros(size)
+        per_minute = cents / 100 / duration
+        for h in range(24):
+            overlap = np.clip(np.minimum(end, (h + 1) * 60) - np.maximum(start, h * 60), 0, None)
+            minutes += np.bincount(base + h, weights=overlap, minlength=size).astype(np.int64)
+            revenue += np.bincount(base + h, weights=per_minute * overlap, minlength=size)
+        self.week_count = array("l", count.tolist())
+        self.week_minutes = array("l", minutes.tolist())
+        self.week_revenue = array("d", revenue.tolist())
+
+    # ------------------------------
+    # Reportes
+    # ------------------------------
+    def period_report(self, periodo: str, minutos_dia: int, fecha_desde: Optional[str] = None,
+                      fecha_hasta: Optional[str] = None, tipo: Optional[str] = None) -> List[Dict]:
+        """
+        Filas por (periodo, cancha) con reservas, horas, ingresos y ocupación (horas
+        reservadas / horas abiertas de los días del periodo dentro del rango),
+        ordenadas por periodo, tipo y número. minutos_dia: minutos abiertos por día.
+        """
+        if periodo not in PERIODOS:
+            raise ValueError(f"Periodo no válido: {periodo} (use {', '.join(PERIODOS)}).")
+        lo = _ordinal(fecha_desde) if fecha_desde else 0
+        hi = _ordinal(fecha_hasta) if fecha_hasta else 1 << 32
+        totals: Dict[Tuple, List[int]] = {}
+        bounds: Dict[str, Tuple[date, date]] = {}
+        for pos in range(len(self.day_court)):
+            ordinal = self.day_ordinal[pos]
+            if not self.day_count[pos] or not lo <= ordinal <= hi:
+                continue
+            court = self.courts[self.day_court[pos]]
+            if tipo is not None and court[0] != tipo:
+                continue
+            label, first, last = _period(periodo, date.fromordinal(ordinal))
+            bounds[label] = (first, last)
+            acc = totals.setdefault((label,) + court, [0, 0, 0])
+            acc[0] += self.day_count[pos]
+            acc[1] += self.day_minutes[pos]
+            acc[2] += self.day_cents[pos]
+        rows = []
+        for (label, tipo_c, numero), (count, minutes, cents) in sorted(totals.items()):
+            first, last = bounds[label]
+            days = (min(last.toordinal(), hi) - max(first.toordinal(), lo)) + 1
+            rows.append({"periodo": label, "cancha": tipo_c, "cancha_num": numero, "reservas": count,
+                         "horas": minutes / 60, "ingresos": cents / 100,
+                         "ocupacion": round(minutes / (days * minutos_dia), 4)})
+        return rows
+
+    def hour_of_week_report(self, tipo: Optional[str] = None) -> List[Dict]:
+        """
+        Filas por (día de la semana, hora, cancha) con actividad, de todo el histórico,
+        ordenadas por hora de la semana, tipo y número.
+        """
+        # Los códigos siguen el orden de aparición de las canchas, que depende de la
+        # historia del proceso: se recorren en orden (tipo, número).
+        courts = sorted((court, code) for code, court in enumerate(self.courts)
+                        if tipo is None or court[0] == tipo)
+        rows = []
+        for hour in range(HORAS_SEMANA):
+            for (tipo_c, numero), code in courts:
+                i = code * HORAS_SEMANA + hour
+                if self.week_minutes[i]:
+                    rows.append({"dia": DIAS[hour // 24], "hora": f"{hour % 24}:00", "cancha": tipo_c,
+                                 "cancha_num": numero, "reservas": self.week_count[i],
+                                 "horas": self.week_minutes[i] / 60,
+                                 "ingresos": round(self.week_revenue[i], 2)})
+        return rows
+
+
+def write_csv(rows: Iterable[Dict], f, fields: Tuple[str, ...]) -> int:
+    """Escribe las filas de un reporte como CSV con encabezado. Devuelve cuántas."""
+    writer = csv.DictWriter(f, fieldnames=fields)
+    writer.writeheader()
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    return count
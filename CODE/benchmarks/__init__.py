@@ -0,0 +1,15 @@
+# Juan David Ocampo Gutierrez
+# Nicolás Castro Pacheco
+# Michell Valencia Berdugo
+# Juan David Rivera Durán
+
+"""
+benchmarks
+----------
+
+Mediciones de rendimiento del sistema de reservas.
+Se ejecutan desde la carpeta CODE, por ejemplo:
+
+    python -m benchmarks.run --sizes 1000 10000 --output resultados.json
+    python -m benchmarks.bench_load
+"""
@@ -0,0 +1,54 @@
+# Juan David Ocampo Gutierrez
+# Nicolás Castro Pacheco
+# Michell Valencia Berdugo
+# Juan David Rivera Durán
+
+"""
+bench_load.py
+-------------
+
+Compara el arranque en frío de Persistence.load_reservations con
+validación completa frente a la carga confiable (trusted=True).
+
+    python -m benchmarks.bench_load [N ...]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+from persistence import Persistence
+from benchmarks.generator import generate_records
+
+
+def _time_load(path, trusted):
+    t0 = time.perf_counter()
+    loaded = Persistence(path, trusted=trusted).load_reservations()
+    return time.perf_counter() - t0, len(loaded)
+
+
+def main(sizes):
+    for n in sizes:
+        fd, path = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(generate_records(n), f, ensure_ascii=False, indent=2)
+            # El generador escribe registros planos: una primera carga los migra al
+            # formato normalizado para medir solo la carga en régimen.
+            Persistence(path).load_reservations()
+            full, count = _time_load(path, trusted=False)
+            fast, _ = _time_load(path, trusted=True)
+            print(f"N={n:>8}  validada={full:8.3f}s  confiable={fast:8.3f}s  "
+                  f"aceleración={full / fast:5.2f}x  ({count} reservas)")
+        finally:
+            clients_path = Persistence(path).clients_path
+            for p in (path, clients_path, path + ".lock", path + ".cache", clients_path + ".cache"):
+                if os.path.exists(p):
+                    os.remove(p)
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [1000, 10000, 100000])
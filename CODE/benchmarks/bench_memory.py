@@ -0,0 +1,83 @@
+# Juan David Ocampo Gutierrez
+# Nicolás Castro Pacheco
+# Michell Valencia Berdugo
+# Juan David Rivera Durán
+
+"""
+bench_memory.py
+---------------
+
+Bytes por reserva de cada representación en memoria, medidos con tracemalloc:
+
+ - antes:     clases con __dict__, una Court por registro y strings sin internar
+              (réplica de la representación original)
+ - objetos:   Reservation/Client/Court actuales (__slots__, internado, Court compartida)
+ - columnar:  ReservationColumns (arrays tipados)
+
+    python -m benchmarks.bench_memory [N ...]
+"""
+
+import gc
+import json
+import sys
+import tracemalloc
+
+from reservation import Reservation
+from columnar import ReservationColumns
+from benchmarks.generator import generate_records
+
+
+class _LegacyClient:
+    def __init__(self, nombre, documento, telefono, email):
+        self.nombre, self.documento, self.telefono, self.email = nombre, documento, telefono, email
+
+
+class _LegacyCourt:
+    def __init__(self, tipo, precio_por_hora):
+        self.tipo, self.precio_por_hora = tipo, precio_por_hora
+
+
+class _LegacyReservation:
+    def __init__(self, client, court, fecha, hora, id):
+        self.id, self.client, self.court, self.fecha, self.hora = id, client, court, fecha, hora
+        self.precio = court.precio_por_hora
+
+
+def _legacy(data):
+    return [_LegacyReservation(_LegacyClient(d["nombre"], d["documento"], d["telefono"], d["email"]),
+                               _LegacyCourt(d["cancha"], d["precio"]), d["fecha"], d["hora"], d["id"])
+            for d in data]
+
+
+def _measure(build, text):
+    # Memoria retenida por la estructura construida, sin contar el JSON parseado.
+    gc.collect()
+    tracemalloc.start()
+    data = json.loads(text)
+    built = build(data)
+    del data
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del built
+    return size
+
+
+VARIANTS = [
+    ("antes", _legacy),
+    ("objetos", lambda data: [Reservation.from_trusted_dict(d) for d in data]),
+    ("columnar", ReservationColumns.from_records),
+]
+
+
+def main(sizes):
+    for n in sizes:
+        text = json.dumps(generate_records(n), ensure_ascii=False)
+        line = [f"N={n:>8}"]
+        for name, build in VARIANTS:
+            line.append(f"{name}={_measure(build, text) / n:7.1f} B/reserva")
+        print("  ".join(line))
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [1000, 10000, 100000])
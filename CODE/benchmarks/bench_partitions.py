@@ -0,0 +1,75 @@
+# Juan David Ocampo Gutierrez
+# Nicolás Castro Pacheco
+# Michell Valencia Berdugo
+# Juan David Rivera Durán
+
+"""
+bench_partitions.py
+-------------------
+
+Compara el almacén JSON único con el particionado por mes cuando la mayor
+parte de las reservas es histórica (meses cerrados):
+
+ - Manager() (carga + índices): el particionado solo lee los meses activos;
+ - create_reservation: el JSON reescribe todo, el particionado solo el mes.
+
+    python -m benchmarks.bench_partitions [N ...]
+
+N es el total de reservas; ~95% cae en meses anteriores al actual.
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+from manager import Manager
+from persistence import Persistence
+from partitioned import PartitionedPersistence
+from benchmarks.generator import generate_records, days_needed, DEFAULT_COURTS, HOURS
+
+WRITES = 5
+
+
+def _measure(make, path, records, start):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(records, f, ensure_ascii=False, indent=2)
+    # Primera carga: migra el archivo plano generado (y en particionado lo reparte por mes).
+    make(path).load_reservations()
+
+    t0 = time.perf_counter()
+    manager = Manager(make(path))
+    load = time.perf_counter() - t0
+    samples = []
+    for i in range(WRITES):
+        t0 = time.perf_counter()
+        manager.create_reservation("Benchmark", "123456", "3001234567", "bench@correo.com",
+                                   next(iter(DEFAULT_COURTS)), (start + timedelta(days=i)).isoformat(), HOURS[0])
+        samples.append(time.perf_counter() - t0)
+    loaded = len(manager.reservations)
+    manager.close()
+    return load, sorted(samples)[len(samples) // 2], loaded
+
+
+def main(sizes):
+    today = date.today()
+    for n in sizes:
+        days = days_needed(n, DEFAULT_COURTS)
+        # El histórico termina ayer; las escrituras van a días futuros (siempre libres).
+        records = generate_records(n, start=today - timedelta(days=int(days * 0.95)), days=days)
+        future = today + timedelta(days=days)
+        for name, make in (("json", Persistence), ("particionado", PartitionedPersistence)):
+            workdir = tempfile.mkdtemp(prefix="bench_particiones_")
+            try:
+                load, write, loaded = _measure(make, os.path.join(workdir, "reservas.json"), records, future)
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+            print(f"N={n:>8}  {name:<12}  Manager()={load:7.3f}s  create_reservation={write * 1000:8.1f} ms  "
+                  f"({loaded} reservas cargadas)")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [10000, 100000])
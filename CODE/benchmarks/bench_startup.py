@@ -0,0 +1,118 @@
+# Juan David Ocampo Gutierrez
+# Nicolás Castro Pacheco
+# Michell Valencia Berdugo
+# Juan David Rivera Durán
+
+"""
+bench_startup.py
+----------------
+
+Mide el arranque en un proceso nuevo (como al abrir la aplicación):
+
+ - importar los puntos de entrada (main, cli, server) y comprobar que
+   ninguno carga tkinter al importarse;
+ - crear Manager() sobre N reservas leyendo el JSON (sin caché) y
+   leyendo la caché binaria vigente ("<archivo>.cache").
+
+    python -m benchmarks.bench_startup [N ...]
+
+Cada medición es la mediana de varias corridas; "proceso" incluye el
+arranque del intérprete.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+from persistence import Persistence
+from benchmarks.generator import generate_records, days_needed, DEFAULT_COURTS
+
+CODE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNS = 5
+
+# Código que corre en el proceso hijo; imprime sus tiempos internos como JSON.
+_CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+{imports}
+t1 = time.perf_counter()
+{body}
+t2 = time.perf_counter()
+print(json.dumps({{"import_s": t1 - t0, "load_s": t2 - t1, "tkinter": "tkinter" in sys.modules}}))
+"""
+
+
+def _run_child(workdir, imports, body="pass"):
+    env = dict(os.environ, PYTHONPATH=CODE_DIR)
+    t0 = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", _CHILD.format(imports=imports, body=body)],
+                         cwd=workdir, env=env, capture_output=True, text=True, check=True)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    result["process_s"] = time.perf_counter() - t0
+    return result
+
+
+def _median(workdir, imports, body="pass", before=None):
+    runs = []
+    for _ in range(RUNS):
+        if before:
+            before()
+        runs.append(_run_child(workdir, imports, body))
+    runs.sort(key=lambda r: r["process_s"])
+    return runs[len(runs) // 2]
+
+
+def _remove_caches(workdir):
+    for name in os.listdir(workdir):
+        if name.endswith(".cache"):
+            os.remove(os.path.join(workdir, name))
+
+
+def bench_imports(workdir):
+    for module in ("main", "cli", "server", "design"):
+        try:
+            r = _median(workdir, f"import {module}")
+        except subprocess.CalledProcessError as e:
+            # design necesita tkcalendar: si no está instalado se informa y se sigue.
+            print(f"import {module:<8} no disponible: {e.stderr.strip().splitlines()[-1]}")
+            continue
+        print(f"import {module:<8} {r['import_s'] * 1000:8.1f} ms  proceso={r['process_s'] * 1000:8.1f} ms  "
+              f"tkinter={'sí' if r['tkinter'] else 'no'}")
+
+
+def bench_manager(n, workdir):
+    path = os.path.join(workdir, "reservas.json")
+    start = date.today() + timedelta(days=1)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(generate_records(n, start=start, days=days_needed(n, DEFAULT_COURTS)), f,
+                  ensure_ascii=False, indent=2)
+    # Primera carga: migra los registros planos generados (la escritura descarta la
+    # caché); la segunda deja escrita la caché del archivo ya normalizado.
+    Persistence(path).load_reservations()
+    Persistence(path).load_reservations()
+
+    imports = "from manager import Manager"
+    cold = _median(workdir, imports, "Manager()", before=lambda: _remove_caches(workdir))
+    warm = _median(workdir, imports, "Manager()")
+    print(f"N={n:>8}  Manager() sin caché={cold['load_s']:8.3f}s  con caché={warm['load_s']:8.3f}s  "
+          f"aceleración={cold['load_s'] / warm['load_s']:5.2f}x  "
+          f"(proceso {cold['process_s']:.3f}s -> {warm['process_s']:.3f}s)")
+
+
+def main(sizes):
+    workdir = tempfile.mkdtemp(prefix="bench_arranque_")
+    try:
+        bench_imports(workdir)
+        for n in sizes:
+            bench_manager(n, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [1000, 10000, 100000])
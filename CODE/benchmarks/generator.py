@@ -0,0 +1,93 @@
+# Juan David Ocampo Gutierrez
+# Nicolás Castro Pacheco
+# Michell Valencia Berdugo
+# Juan David Rivera Durán
+
+"""
+generator.py
+------------
+
+Generador sintético de reservas válidas para los benchmarks.
+
+Produce dicts con el mismo formato que Reservation.to_dict(), en slots
+(cancha, fecha, hora) sin conflictos, a partir de mañana para que las
+reservas también se puedan editar (Manager rechaza fechas pasadas).
+"""
+
+import math
+import random
+import uuid
+from datetime import date, timedelta
+
+# Tipos de cancha por defecto (los de Manager.CANCHAS); las reservas generadas
+# quedan todas en la cancha 1 de su tipo.
+DEFAULT_COURTS = {"Sintética": 5.0, "Vóley": 7.5}
+# Horas reservables (10:00 - 21:00).
+HOURS = [f"{h}:00" for h in range(10, 22)]
+
+_NOMBRES = ["Ana", "Carlos Alberto", "Juan", "María José", "Luisa", "Pedro", "Sofía", "Andrés"]
+
+
+def days_needed(n, courts=None, fill=0.8):
+    # Días mínimos para ubicar n reservas con la ocupación dada.
+    slots_per_day = len(courts or DEFAULT_COURTS) * len(HOURS)
+    return max(1, math.ceil(n / (slots_per_day * fill)))
+
+
+def generate_records(n, courts=None, start=None, days=None, fill=0.8, seed=0):
+    """
+    Genera n reservas válidas.
+
+    - courts: dict tipo -> precio por hora (por defecto las de Manager).
+    - start: primer día (por defecto mañana).
+    - days: cantidad de días del rango; si se omite se calcula con days_needed.
+    - fill: fracción aproximada de slots ocupados (0 < fill <= 1).
+    - seed: semilla para resultados reproducibles.
+    """
+    if not 0 < fill <= 1:
+        raise ValueError("fill debe estar en (0, 1].")
+    courts = courts or DEFAULT_COURTS
+    start = start or date.today() + timedelta(days=1)
+    days = days or days_needed(n, courts, fill)
+    if n > days * len(courts) * len(HOURS):
+        raise ValueError("El rango de fechas no alcanza para n reservas.")
+
+    rng = random.Random(seed)
+    # uuid4 desde el generador con semilla: ids reproducibles entre corridas.
+    new_id = lambda: str(uuid.UUID(int=rng.getrandbits(128), version=4))
+    records = []
+    # Se recorren los slots en orden; cada uno se ocupa con probabilidad 'fill'.
+    # Si al final del rango faltan reservas, se completan los slots libres restantes.
+    skipped = []
+    for d in range(days):
+        fecha = (start + timedelta(days=d)).isoformat()
+        for tipo, precio in courts.items():
+            for hora in HOURS:
+                if len(records) == n:
+                    return records
+                if rng.random() >= fill:
+                    skipped.append((tipo, precio, fecha, hora))
+                    continue
+                records.append(_record(len(records), new_id(), tipo, precio, fecha, hora))
+    for tipo, precio, fecha, hora in skipped[:n - len(records)]:
+        records.append(_record(len(records), new_id(), tipo, precio, fecha, hora))
+    return records
+
+
+# Cantidad de clientes distintos: los clientes frecuentes reservan muchas veces.
+CLIENTS = 50000
+
+
+def _record(i, res_id, tipo, precio, fecha, hora):
+    c = i % CLIENTS
+    return {
+        "id": res_id,
+        "nombre": _NOMBRES[c % len(_NOMBRES)],
+        "documento": str(10000000 + c),
+        "telefono": f"300{c:07d}",
+        "email": f"cliente{c}@correo.com",
+        "cancha": tipo,
+        "fecha": fecha,
+        "hora": hora,
+        "precio": precio,
+    }
@@ -0,0 +1,188 @@
+# Juan David Ocampo Gutierrez
+# Nicolás Castro Pacheco
+# Michell Valencia Berdugo
+# Juan David Rivera Durán
+
+"""
+run.py
+------
+
+Suite de benchmarks de Persistence y Manager sobre datos sintéticos.
+
+    python -m benchmarks.run --sizes 1000 10000 --output resultados.json
+
+Para cada tamaño N se generan N reservas válidas y se mide:
+ - la migración inicial del archivo plano generado al formato normalizado
+ - Persistence.load_reservations / save_reservations
+ - Manager.__init__ (carga + índices)
+ - Manager.check_availability
+ - el ciclo de 12 llamadas de horas libres de DesignApp._ver_disponibilidad
+ - Manager.get_availability_grid para una semana (tablero de disponibilidad)
+ - Manager.get_reservations_page (listado paginado ordenado por nombre)
+ - Manager.create_reservation / edit_reservation_by_id / cancel_reservation_by_id
+
+El resultado es JSON (una entrada por N y operación) con metadatos del
+commit actual, para comparar corridas entre commits.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+from persistence import Persistence
+from manager import Manager
+from benchmarks.generator import generate_records, days_needed, DEFAULT_COURTS, HOURS
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+
+
+def _summary(n, operation, samples):
+    # Resume una lista de duraciones (segundos) en microsegundos.
+    samples = sorted(samples)
+    return {
+        "n": n,
+        "operation": operation,
+        "calls": len(samples),
+        "total_s": sum(samples),
+        "mean_us": sum(samples) / len(samples) * 1e6,
+        "p50_us": samples[len(samples) // 2] * 1e6,
+        "max_us": samples[-1] * 1e6,
+    }
+
+
+def _timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - t0
+
+
+def bench_size(n, workdir, fill=0.8, writes=5, reads=1000, seed=0):
+    """Ejecuta todas las mediciones para un tamaño N y devuelve la lista de resultados."""
+    results = []
+    path = os.path.join(workdir, f"reservas_{n}.json")
+    start = date.today() + timedelta(days=1)
+    span = days_needed(n, DEFAULT_COURTS, fill)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(generate_records(n, start=start, days=span, fill=fill, seed=seed), f, ensure_ascii=False, indent=2)
+
+    # --- Persistence ---
+    persistence = Persistence(path)
+    # Carga inicial: migra los registros planos generados al formato normalizado
+    # (reservas + archivo de clientes), igual que el primer arranque tras actualizar.
+    results.append(_summary(n, "persistence.migrate_flat", [_timed(persistence.load_reservations)]))
+    t0 = time.perf_counter()
+    reservations = persistence.load_reservations()
+    results.append(_summary(n, "persistence.load_reservations", [time.perf_counter() - t0]))
+    results.append(_summary(n, "persistence.save_reservations", [_timed(persistence.save_reservations, reservations)]))
+    del reservations
+
+    # --- Manager ---
+    t0 = time.perf_counter()
+    manager = Manager(Persistence(path))
+    results.append(_summary(n, "manager.__init__", [time.perf_counter() - t0]))
+
+    rng = random.Random(seed)
+    courts = list(DEFAULT_COURTS)
+    fechas = [(start + timedelta(days=d)).isoformat() for d in range(span)]
+    results.append(_summary(n, "manager.check_availability", [
+        _timed(manager.check_availability, rng.choice(courts), rng.choice(fechas), rng.choice(HOURS))
+        for _ in range(reads)
+    ]))
+
+    # Mismo ciclo que DesignApp._ver_disponibilidad cuando no se elige hora.
+    def free_hours(cancha, fecha):
+        return [f"{h}:00" for h in range(10, 22) if manager.check_availability(cancha, fecha, f"{h}:00")]
+    results.append(_summary(n, "ui.free_hours_loop", [
+        _timed(free_hours, rng.choice(courts), rng.choice(fechas)) for _ in range(max(1, reads // 12))
+    ]))
+
+    # Tablero semanal de todas las canchas (reemplaza al ciclo anterior en la UI).
+    def weekly_grid(fecha):
+        d = date.fromisoformat(fecha)
+        return manager.get_availability_grid(fecha, (d + timedelta(days=6)).isoformat())
+    results.append(_summary(n, "manager.get_availability_grid_week", [
+        _timed(weekly_grid, rng.choice(fechas)) for _ in range(max(1, reads // 12))
+    ]))
+
+    # Listado paginado (ventana de reservas): página ordenada por nombre en un offset al azar.
+    page_offsets = [rng.randrange(max(1, n - 200)) for _ in range(max(1, reads // 12))]
+    results.append(_summary(n, "manager.get_reservations_page", [
+        _timed(manager.get_reservations_page, off, 200, "nombre") for off in page_offsets
+    ]))
+
+    # Las escrituras van a días posteriores al rango generado (siempre libres).
+    free_day = lambda i: (start + timedelta(days=span + 1 + i)).isoformat()
+    results.append(_summary(n, "manager.create_reservation", [
+        _timed(manager.create_reservation, "Benchmark", "123456", "3001234567", "bench@correo.com",
+               courts[0], free_day(i), HOURS[0])
+        for i in range(writes)
+    ]))
+
+    ids = [r.id for r in manager.reservations[:writes]]
+    results.append(_summary(n, "manager.edit_reservation_by_id", [
+        _timed(manager.edit_reservation_by_id, res_id, fecha=free_day(writes + i), hora=HOURS[1])
+        for i, res_id in enumerate(ids)
+    ]))
+    results.append(_summary(n, "manager.cancel_reservation_by_id", [
+        _timed(manager.cancel_reservation_by_id, res_id) for res_id in ids
+    ]))
+    manager.close()
+    os.remove(path)
+    os.remove(persistence.clients_path)
+    return results
+
+
+def _git_commit():
+    # Commit actual (si se ejecuta dentro del repositorio) para etiquetar la corrida.
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks del sistema de reservas.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--fill", type=float, default=0.8, help="Ocupación de los slots generados.")
+    parser.add_argument("--writes", type=int, default=5, help="Llamadas por operación de escritura.")
+    parser.add_argument("--reads", type=int, default=1000, help="Llamadas por operación de lectura.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Archivo JSON de salida (por defecto stdout).")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="bench_reservas_")
+    results = []
+    try:
+        for n in args.sizes:
+            print(f"[bench] N={n}", file=sys.stderr)
+            results.extend(bench_size(n, workdir, args.fill, args.writes, args.reads, args.seed))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {"fill": args.fill, "writes": args.writes, "reads": args.reads, "seed": args.seed},
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+# Juan David Ocampo Gutierrez
+# Nicolás Castro Pacheco
+# Michell Valencia Berdugo
+# Juan David Rivera Durán
+
+"""
+cli.py
+------
+
+Línea de comandos para importar y exportar reservas en bloque (sin Tk).
+
+    python cli.py import reservas.csv --rejects rechazos.csv
+    python cli.py import reservas.jsonl --allow-past
+    python cli.py export contabilidad.csv --fecha-desde 2025-01-01 --fecha-hasta 2025-01-31
+    python cli.py report ocupacion.csv --periodo semana --fecha-desde 2025-01-01
+    python cli.py disponibilidad Sintética 2025-01-15 --hora 18:00 --hora-fin 19:30
+
+El formato (csv o jsonl) se deduce de la extensión o se indica con --format;
+con '-' (stdin/stdout) es csv salvo que se indique otro.
+El almacén es el mismo que usa la aplicación (RESERVAS_STORAGE).
+
+Importación: el archivo se lee en streaming y se procesa por tramos de
+--chunk-size filas; cada tramo pasa por las mismas validaciones que la UI
+(Client, fecha, hora, cancha) y por la detección de conflictos contra lo
+ya cargado y dentro del propio tramo. Las filas rechazadas van al archivo
+de rechazos con su número de línea y el motivo. Las escrituras se agrupan
+con Manager.bulk(): por tramo en los backends incrementales (journal,
+SQLite, particionado) y, en JSON, cada --flush-rows filas importadas (cada
+volcado reescribe el archivo completo, así que se hacen pocos, pero lo
+pendiente en memoria queda acotado).
+
+Exportación: recorre el resultado de Manager.query() fila por fila, sin
+construir la lista completa de dicts. Con --include-archive también abre
+los meses archivados del rango.
+
+Reportes: ocupación e ingresos por cancha y día/semana/mes (o, con
+--por-hora, por día de la semana y hora) en CSV, desde los agregados de
+Manager (ver analytics.py).
+
+Disponibilidad: canchas libres de un tipo en una fecha (a una hora o por
+cada hora del día). Si el almacén tiene un libro de slots al día
+(RESERVAS_LEDGER=1, ver slot_ledger.py) se responde leyéndolo, sin cargar
+reservas; si no, vía Manager.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from contextlib import contextmanager
+from datetime import date
+from itertools import islice
+
+import analytics
+import slot_ledger
+from manager import Manager
+from reservation import hora_to_minutes, minutes_to_hora
+
+# Columnas que se leen al importar (las demás se ignoran).
+IMPORT_FIELDS = ("nombre", "documento", "telefono", "email", "cancha", "fecha", "hora")
+# Columnas opcionales al importar (sin hora_fin la reserva dura una hora; sin
+# cancha_num se asigna una cancha libre del tipo).
+OPTIONAL_IMPORT_FIELDS = ("hora_fin",)
+# Columnas del archivo exportado (mismo orden que Reservation.to_dict()).
+EXPORT_FIELDS = ("id", "nombre", "documento", "telefono", "email", "cancha", "cancha_num",
+                 "fecha", "hora", "hora_fin", "precio")
+FORMATS = ("csv", "jsonl")
+# Filas importadas entre volcados con un backend no incremental (JSON).
+FLUSH_ROWS = 50000
+
+
+def _detect_format(path, fmt):
+    if fmt:
+        return fmt
+    if path == "-":
+        # stdin/stdout no tiene extensión.
+        return "csv"
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return "csv"
+    if ext in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise ValueError(f"No se puede deducir el formato de '{path}'; use --format {{{','.join(FORMATS)}}}.")
+
+
+@contextmanager
+def _open(path, mode):
+    # "-" es stdin/stdout; newline="" lo pide el módulo csv.
+    if path == "-":
+        yield sys.stdin if "r" in mode else sys.stdout
+    else:
+        with open(path, mode, encoding="utf-8", newline="") as f:
+            yield f
+
+
+# ------------------------------
+# Lectura en streaming
+# ------------------------------
+def _iter_rows(f, fmt):
+    # Genera (línea, dict) o (línea, ValueError) sin leer el archivo completo.
+    if fmt == "csv":
+        reader = csv.DictReader(f)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_no, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+            if not isinstance(row, dict):
+                raise ValueError("se esperaba un objeto JSON")
+        except ValueError as e:
+            yield line_no, ValueError(f"JSON inválido: {e}")
+            continue
+        yield line_no, row
+
+
+class _RejectsWriter:
+    # Escribe las filas rechazadas en el formato de entrada, con 'linea' y 'error'.
+    def __init__(self, f, fmt):
+        self._f = f
+        self._fmt = fmt
+        self._csv = None
+        self.count = 0
+
+    def write(self, line_no, row, error):
+        self.count += 1
+        if self._f is None:
+            return
+        if self._fmt == "jsonl":
+            record = {"linea": line_no, "error": str(error), "registro": row if isinstance(row, dict) else None}
+            self._f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            return
+        row = row if isinstance(row, dict) else {}
+        if self._csv is None:
+            fields = [k for k in row if k is not None] or list(IMPORT_FIELDS)
+            self._csv = csv.DictWriter(self._f, fieldnames=["linea", "error"] + fields, extrasaction="ignore")
+            self._csv.writeheader()
+        self._csv.writerow({**{k: v for k, v in row.items() if k is not None}, "linea": line_no, "error": str(error)})
+
+
+# ------------------------------
+# Importación
+# ------------------------------
+def import_rows(manager, rows, rejects, chunk_size=5000, allow_past=False, progress=None, flush_rows=FLUSH_ROWS):
+    """
+    Importa filas [(línea, dict)] por tramos. Devuelve cuántas se importaron.
+
+    Cada tramo se aplica con create_reservations (todo o nada): si trae filas
+    inválidas, se rechazan esas y se aplica el resto en un segundo intento.
+    Lo pendiente se escribe tras cada tramo en los backends incrementales y
+    cada flush_rows filas importadas en los demás.
+    """
+    imported = 0
+    flushed = 0
+    incremental = manager.persistence.incremental_writes
+    with manager.bulk():
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            pending = []
+            for line_no, row in chunk:
+                if isinstance(row, Exception):
+                    rejects.write(line_no, None, row)
+                    continue
+                missing = [f for f in IMPORT_FIELDS if not isinstance(row.get(f), str) or not row[f].strip()]
+                if missing:
+                    rejects.write(line_no, row, f"Campos faltantes: {', '.join(missing)}")
+                    continue
+                req = {f: row[f].strip() for f in IMPORT_FIELDS}
+                for f in OPTIONAL_IMPORT_FIELDS:
+                    if isinstance(row.get(f), str) and row[f].strip():
+                        req[f] = row[f].strip()
+                # Número de cancha: texto en CSV, entero en JSONL.
+                numero = row.get("cancha_num")
+                if isinstance(numero, str):
+                    numero = int(numero) if numero.strip().isdigit() else numero.strip() or None
+                if numero is not None:
+                    if type(numero) is not int:
+                        rejects.write(line_no, row, f"Número de cancha inválido: {numero}")
+                        continue
+                    req["cancha_num"] = numero
+                pending.append((line_no, row, req))
+
+            while pending:
+                results = manager.create_reservations([req for _, _, req in pending], allow_past=allow_past)
+                if results[0]["applied"]:
+                    imported += len(pending)
+                    break
+                # Se descartan las filas con error y se reintenta el resto del tramo.
+                keep = []
+                for item, entry in zip(results, pending):
+                    if item["ok"]:
+                        keep.append(entry)
+                    else:
+                        rejects.write(entry[0], entry[1], item["error"])
+                pending = keep
+
+            if incremental or imported - flushed >= flush_rows:
+                # Journal/SQLite: escribir por tramo es barato. JSON reescribe todo el
+                # archivo en cada volcado: se vuelca cada flush_rows filas.
+                manager.flush()
+                flushed = imported
+            if progress:
+                progress(imported, rejects.count)
+    return imported
+
+
+def cmd_import(args):
+    fmt = _detect_format(args.file, args.format)
+    manager = Manager()
+    try:
+        with _open(args.file, "r") as src, \
+                (_open(args.rejects, "w") if args.rejects else _null()) as rej:
+            rejects = _RejectsWriter(rej, _detect_format(args.rejects, args.format) if args.rejects else fmt)
+            progress = None
+            if not args.quiet:
+                progress = lambda ok, bad: print(f"\r{ok} importadas, {bad} rechazadas", end="", file=sys.stderr)
+            imported = import_rows(manager, _iter_rows(src, fmt), rejects,
+                                   args.chunk_size, args.allow_past, progress, args.flush_rows)
+    finally:
+        manager.close()
+    if not args.quiet:
+        print(file=sys.stderr)
+    print(f"{imported} reservas importadas, {rejects.count} rechazadas"
+          + (f" (ver {args.rejects})" if args.rejects and rejects.count else "") + ".")
+    return 0 if not rejects.count else 2
+
+
+@contextmanager
+def _null():
+    yield None
+
+
+# ------------------------------
+# Exportación
+# ------------------------------
+def export_rows(manager, f, fmt, **filters):
+    """Escribe las reservas que cumplen los filtros (ordenadas por fecha y hora). Devuelve cuántas."""
+    count = 0
+    if fmt == "csv":
+        writer = csv.DictWriter(f, fieldnames=EXPORT_FIELDS)
+        writer.writeheader()
+        write = writer.writerow
+    else:
+        write = lambda d: f.write(json.dumps(d, ensure_ascii=False) + "\n")
+    for r in manager.query(**filters):
+        write(r.to_dict())
+        count += 1
+    return count
+
+
+def cmd_export(args):
+    fmt = _detect_format(args.file, args.format)
+    filters = {k: getattr(args, k) for k in ("fecha_desde", "fecha_hasta", "cancha", "documento", "email",
+                                            "include_archive")}
+    manager = Manager()
+    try:
+        with _open(args.file, "w") as dst:
+            count = export_rows(manager, dst, fmt, **filters)
+    finally:
+        manager.close()
+    if args.file != "-":
+        print(f"{count} reservas exportadas a {args.file}.")
+    return 0
+
+
+def cmd_report(args):
+    manager = Manager()
+    try:
+        if args.por_hora:
+            rows, fields = manager.get_hour_of_week_report(args.cancha), analytics.CAMPOS_HORA
+        else:
+            rows = manager.get_usage_report(args.periodo, args.fecha_desde, args.fecha_hasta, args.cancha,
+                                            args.include_archive)
+            fields = analytics.CAMPOS_PERIODO
+        with _open(args.file, "w") as dst:
+            count = analytics.write_csv(rows, dst, fields)
+    finally:
+        manager.close()
+    if args.file != "-":
+        print(f"{count} filas de reporte escritas en {args.file}.")
+    return 0
+
+
+def cmd_availability(args):
+    try:
+        date.fromisoformat(args.fecha)
+    except ValueError:
+        raise ValueError("Formato de fecha inválido. Use YYYY-MM-DD")
+    start = hora_to_minutes(args.hora) if args.hora else None
+    end = hora_to_minutes(args.hora_fin) if args.hora_fin else None
+    ledger = slot_ledger.open_current(Manager.STORE_PATHS.get(os.environ.get("RESERVAS_STORAGE", "json"), ""))
+    manager = None
+    try:
+        if ledger is not None:
+            if args.cancha not in {tipo for tipo, _ in ledger.courts}:
+                raise ValueError("Cancha no válida.")
+            free = lambda s, e: ledger.free_courts(args.cancha, args.fecha, s, e)
+        else:
+            manager = Manager()
+            free = lambda s, e: manager.get_free_courts(args.cancha, args.fecha, minutes_to_hora(s), minutes_to_hora(e))
+        if start is not None:
+            libres = free(start, end or start + 60)
+            print(f"{args.cancha} {args.fecha} {args.hora}: "
+                  + (f"libres {', '.join(map(str, libres))}" if libres else "ocupada"))
+        else:
+            for hora in Manager.HORAS:
+                s = hora_to_minutes(hora)
+                print(f"{hora:>5}  libres: {', '.join(map(str, free(s, s + 60))) or '-'}")
+    finally:
+        if ledger is not None:
+            ledger.close()
+        if manager is not None:
+            manager.close()
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Importación/exportación masiva de reservas, reportes y disponibilidad.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("import", help="Importa reservas desde CSV o JSONL.")
+    p.add_argument("file", help="Archivo de entrada ('-' para stdin).")
+    p.add_argument("--format", choices=FORMATS)
+    p.add_argument("--rejects", help="Archivo donde escribir las filas rechazadas.")
+    p.add_argument("--chunk-size", type=int, default=5000, help="Filas por tramo.")
+    p.add_argument("--flush-rows", type=int, default=FLUSH_ROWS,
+                   help="Filas importadas entre escrituras con el backend JSON.")
+    p.add_argument("--allow-past", action="store_true", help="Acepta fechas pasadas (migración de históricos).")
+    p.add_argument("--quiet", action="store_true", help="Sin progreso en stderr.")
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("export", help="Exporta reservas a CSV o JSONL.")
+    p.add_argument("file", help="Archivo de salida ('-' para stdout).")
+    p.add_argument("--format", choices=FORMATS)
+    p.add_argument("--fecha-desde")
+    p.add_argument("--fecha-hasta")
+    p.add_argument("--cancha")
+    p.add_argument("--documento")
+    p.add_argument("--email")
+    p.add_argument("--include-archive", action="store_true",
+                   help="Incluye los meses archivados (RESERVAS_STORAGE=partitioned).")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("report", help="Reporte CSV de ocupación e ingresos por cancha.")
+    p.add_argument("file", help="Archivo de salida ('-' para stdout).")
+    p.add_argument("--periodo", choices=analytics.PERIODOS, default="dia")
+    p.add_argument("--fecha-desde")
+    p.add_argument("--fecha-hasta")
+    p.add_argument("--cancha")
+    p.add_argument("--por-hora", action="store_true", help="Por día de la semana y hora (todo el histórico).")
+    p.add_argument("--include-archive", action="store_true",
+                   help="Incluye los meses archivados (RESERVAS_STORAGE=partitioned).")
+    p.set_defaults(func=cmd_report)
+
+    p = sub.add_parser("disponibilidad", help="Canchas libres de un tipo en una fecha (usa el libro de slots).")
+    p.add_argument("cancha")
+    p.add_argument("fecha", help="YYYY-MM-DD")
+    p.add_argument("--hora", help="Hora de inicio; sin ella, cada hora del día.")
+    p.add_argument("--hora-fin", help="Fin del intervalo (por defecto, una hora después).")
+    p.set_defaults(func=cmd_availability)
+
+    args = parser.parse_args(argv)
+    try:
+        return args.func(args)
+    except (ValueError, OSError) as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -30,6 +30,9 @@ class Client:
     # - Se proporciona to_dict / from_dict para serialización sencilla.
     # ------------------------------------------------------------
 
+    # Sin __dict__ por instancia (menos memoria con muchas reservas cargadas).
+    __slots__ = ("nombre", "documento", "telefono", "email")
+
     # Regex usados para validaciones simples
     NOMBRE_REGEX = re.compile(r"^[A-Za-zÀ-ÖØ-öø-ÿ'\- ]+$")
     EMAIL_REGEX = re.compile(r"[^@]+@[^@]+\.[^@]+")
@@ -75,6 +78,25 @@ class Client:
             raise ValueError("Correo electrónico inválido.")
         return email.strip()
 
+    def validate(self) -> None:
+        # Revalida los campos actuales (usado por el pase explícito de verificación
+        # cuando el objeto se construyó por la vía confiable, sin validadores).
+        self._validar_nombre(self.nombre)
+        self._validar_documento(self.documento)
+        self._validar_telefono(self.telefono)
+        self._validar_email(self.email)
+
+    @classmethod
+    def from_trusted(cls, nombre: str, documento: str, telefono: str, email: str):
+        # Construye el cliente SIN validar: solo para datos que ya pasaron las
+        # validaciones al escribirse (p. ej. carga confiable del archivo propio).
+        obj = cls.__new__(cls)
+        obj.nombre = nombre
+        obj.documento = documento
+        obj.telefono = telefono
+        obj.email = email
+        return obj
+
     # --------------------------------------------------
     # Serialización / utilidad
     # --------------------------------------------------
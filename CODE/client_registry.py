@@ -0,0 +1,63 @@
+# Juan David Ocampo Gutierrez
+# Nicolás Castro Pacheco
+# Michell Valencia Berdugo
+# Juan David Rivera Durán
+
+"""
+client_registry.py
+------------------
+
+Registro normalizado de clientes indexado por documento.
+
+Cada documento tiene un único objeto Client compartido por todas sus
+reservas: los datos se guardan y validan una sola vez y, al actualizar
+(p. ej. el teléfono), todas las reservas ven el cambio sin reescribirlas.
+"""
+
+from typing import Dict, Iterator, Optional, Tuple
+from client import Client
+
+
+class ClientRegistry:
+    def __init__(self):
+        # documento -> Client canónico
+        self._by_doc: Dict[str, Client] = {}
+
+    def __len__(self) -> int:
+        return len(self._by_doc)
+
+    def __contains__(self, documento: str) -> bool:
+        return documento in self._by_doc
+
+    def __iter__(self) -> Iterator[Client]:
+        return iter(self._by_doc.values())
+
+    def get(self, documento: str) -> Optional[Client]:
+        return self._by_doc.get(documento)
+
+    def upsert(self, client: Client) -> Tuple[Client, bool]:
+        """
+        Registra o actualiza un cliente. Devuelve (cliente canónico, cambió).
+
+        Si el documento ya existe, se copian los datos sobre el objeto existente
+        para que todas las reservas que lo referencian queden actualizadas.
+        """
+        current = self._by_doc.get(client.documento)
+        if current is None:
+            self._by_doc[client.documento] = client
+            return client, True
+        if current is client:
+            return current, False
+        changed = (current.nombre, current.telefono, current.email) != (client.nombre, client.telefono, client.email)
+        if changed:
+            current.nombre = client.nombre
+            current.telefono = client.telefono
+            current.email = client.email
+        return current, changed
+
+    def clear(self) -> None:
+        self._by_doc.clear()
+
+    def to_records(self):
+        # Lista de dicts para persistir (mismo formato que Client.to_dict()).
+        return [c.to_dict() for c in self._by_doc.values()]
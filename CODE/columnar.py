@@ -0,0 +1,127 @@
+# Juan David Ocampo Gutierrez
+# Nicolás Castro Pacheco
+# Michell Valencia Berdugo
+# Juan David Rivera Durán
+
+"""
+columnar.py
+-----------
+
+Almacén columnar compacto para volúmenes grandes de reservas.
+
+En vez de un objeto Reservation (+ Client + Court) por registro, cada
+campo vive en un array tipado del módulo 'array':
+
+ - cancha:  array('B') con un código en la tabla de tipos
+ - numero:  array('B') con el número de la cancha dentro del tipo
+ - fecha:   array('I') con el ordinal del día
+ - hora:    array('H') con minutos desde la medianoche
+ - duracion: array('H') con los minutos hasta hora_fin
+ - precio:  array('d')
+ - cliente: array('I') con un índice en la tabla de clientes (deduplicada)
+
+Los ids UUID se guardan como 16 bytes en un bytearray (los que no son UUID
+van a un dict aparte). Útil para análisis o cargas masivas de solo lectura;
+Manager sigue trabajando con objetos.
+"""
+
+import uuid
+from array import array
+from datetime import date
+from reservation import Reservation, hora_to_minutes, minutes_to_hora, default_hora_fin
+
+_NO_UUID = bytes(16)
+
+
+class ReservationColumns:
+    def __init__(self):
+        self._n = 0
+        self._uuids = bytearray()
+        # posición -> id para los ids que no tienen formato UUID.
+        self._other_ids = {}
+        self.cancha = array("B")
+        self.numero = array("B")
+        self.fecha = array("I")
+        self.hora = array("H")
+        self.duracion = array("H")
+        self.precio = array("d")
+        self.cliente = array("I")
+        # Tablas de valores distintos referenciadas por código.
+        self.tipos = []
+        self._tipo_codes = {}
+        self.clientes = []
+        self._cliente_codes = {}
+
+    @classmethod
+    def from_records(cls, records):
+        """Construye el almacén a partir de dicts con el formato de Reservation.to_dict()."""
+        cols = cls()
+        for data in records:
+            cols.append(data)
+        return cols
+
+    def __len__(self):
+        return self._n
+
+    def id_at(self, i: int) -> str:
+        other = self._other_ids.get(i)
+        if other is not None:
+            return other
+        return str(uuid.UUID(bytes=bytes(self._uuids[i * 16:i * 16 + 16])))
+
+    def _code(self, table, codes, value):
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(table)
+            table.append(value)
+        return code
+
+    def append(self, data: dict) -> None:
+        """Agrega un registro plano (sin validar: pensado para datos ya persistidos)."""
+        start = hora_to_minutes(data["hora"])
+        end = hora_to_minutes(data.get("hora_fin") or default_hora_fin(data["hora"]))
+        res_id = data["id"]
+        try:
+            raw = uuid.UUID(res_id).bytes
+            # Solo si la forma canónica coincide se puede reconstruir el mismo string.
+            if str(uuid.UUID(bytes=raw)) != res_id:
+                raise ValueError
+        except ValueError:
+            raw = _NO_UUID
+            self._other_ids[self._n] = res_id
+        self._uuids += raw
+        self._n += 1
+        self.cancha.append(self._code(self.tipos, self._tipo_codes, data["cancha"]))
+        self.numero.append(data.get("cancha_num") or 1)
+        self.fecha.append(date.fromisoformat(data["fecha"]).toordinal())
+        self.hora.append(start)
+        self.duracion.append(end - start)
+        self.precio.append(data.get("precio", 0.0))
+        cliente = (data["nombre"], data["documento"], data["telefono"], data["email"])
+        self.cliente.append(self._code(self.clientes, self._cliente_codes, cliente))
+
+    def record(self, i: int) -> dict:
+        """Reconstruye el dict plano del registro i."""
+        nombre, documento, telefono, email = self.clientes[self.cliente[i]]
+        minutes = self.hora[i]
+        return {
+            "id": self.id_at(i),
+            "nombre": nombre,
+            "documento": documento,
+            "telefono": telefono,
+            "email": email,
+            "cancha": self.tipos[self.cancha[i]],
+            "cancha_num": self.numero[i],
+            "fecha": date.fromordinal(self.fecha[i]).isoformat(),
+            "hora": minutes_to_hora(minutes),
+            "hora_fin": minutes_to_hora(minutes + self.duracion[i]),
+            "precio": self.precio[i],
+        }
+
+    def iter_records(self):
+        for i in range(self._n):
+            yield self.record(i)
+
+    def to_reservations(self):
+        """Materializa objetos Reservation (vía confiable: los datos ya estaban validados)."""
+        return [Reservation.from_trusted_dict(d) for d in self.iter_records()]
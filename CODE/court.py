@@ -8,32 +8,65 @@ court.py
 ---------
 
 Define las canchas disponibles y sus precios por hora.
+
+Un tipo (p. ej. "Sintética") puede tener varias canchas físicas; cada una
+se identifica por su número dentro del tipo (1, 2, ...).
 """
 
+import sys
+
 class Court:
     """
-    Representa una cancha con su tipo y precio por hora.
+    Representa una cancha física: su tipo, su número dentro del tipo y el precio por hora.
     """
     # ------------------------------------------------------------
     # Explicación:
-    # - Clase ligera/valor que contiene 'tipo' (nombre) y 'precio_por_hora'.
+    # - Clase ligera/valor que contiene 'tipo' (nombre), 'numero' y 'precio_por_hora'.
     # - Usada por Manager y Reservation para determinar precio y tipo.
     # - Incluye to_dict / from_dict para interoperabilidad con persistencia.
     # ------------------------------------------------------------
 
-    def __init__(self, tipo: str, precio_por_hora: float):
+    # Sin __dict__ por instancia: las canchas se comparten entre muchas reservas.
+    __slots__ = ("tipo", "precio_por_hora", "numero")
+
+    # Instancias canónicas por (tipo, número): todas las reservas de una misma cancha
+    # apuntan al mismo objeto en lugar de crear uno por registro. Las canchas son
+    # pocas, así que el mapa no crece con las reservas.
+    _canonical = {}
+
+    def __init__(self, tipo: str, precio_por_hora: float, numero: int = 1):
         self.tipo = tipo
         self.precio_por_hora = precio_por_hora
+        self.numero = numero
+
+    @classmethod
+    def canonical(cls, tipo: str, numero: int = 1, precio_por_hora: float = None):
+        # Devuelve la instancia compartida para (tipo, número), creándola si hace falta.
+        # El precio por hora lo fija la configuración de canchas (Manager, al cargarla);
+        # sin él se conserva el vigente (0.0 para una cancha que no está configurada).
+        # El tipo se interna: el mismo string se reutiliza en toda la aplicación.
+        key = (tipo, numero)
+        court = cls._canonical.get(key)
+        if court is None:
+            court = cls._canonical[key] = cls(sys.intern(tipo), precio_por_hora or 0.0, numero)
+        elif precio_por_hora is not None:
+            court.precio_por_hora = precio_por_hora
+        return court
+
+    @property
+    def nombre(self) -> str:
+        # Nombre para mostrar: tipo y número ("Sintética 4").
+        return f"{self.tipo} {self.numero}"
 
     def to_dict(self):
         # Serializa la cancha a dict.
-        return {"tipo": self.tipo, "precio_por_hora": self.precio_por_hora}
+        return {"tipo": self.tipo, "numero": self.numero, "precio_por_hora": self.precio_por_hora}
 
     @classmethod
     def from_dict(cls, data: dict):
-        # Reconstruye Court desde dict.
-        return cls(data["tipo"], data["precio_por_hora"])
+        # Reconstruye Court desde dict (sin número: la cancha 1 del tipo).
+        return cls(data["tipo"], data["precio_por_hora"], data.get("numero", 1))
 
     def __repr__(self):
         # Representación amigable con formato de precio.
-        return f"Court({self.tipo}, ${self.precio_por_hora:.2f}/hora)"
\ No newline at end of file
+        return f"Court({self.nombre}, ${self.precio_por_hora:.2f}/hora)"
\ No newline at end of file
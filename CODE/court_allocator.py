@@ -0,0 +1,139 @@
+# Juan David Ocampo Gutierrez
+# Nicolás Castro Pacheco
+# Michell Valencia Berdugo
+# Juan David Rivera Durán
+
+"""
+court_allocator.py
+------------------
+
+Ocupación por bloques de las canchas físicas de cada tipo, para asignar
+una cancha libre sin recorrer reservas.
+
+Por cada (tipo, fecha) se guarda una lista con un entero por bloque de
+'granularidad' minutos del día: el bit k del bloque indica que la cancha
+número k+1 del tipo está ocupada en ese bloque. Las canchas libres durante
+[inicio, fin) son las que no aparecen en el OR de los bloques del
+intervalo: el costo depende de la duración (unos pocos bloques) y no de la
+cantidad de reservas, y un entero de Python admite cualquier número de
+canchas.
+
+Estrategias para elegir entre las libres:
+ - "primera":  la de menor número;
+ - "compacta": una que ya esté ocupada justo antes y/o justo después del
+   intervalo (la que deja menos huecos); así los tramos libres largos se
+   conservan en otras canchas. Si ninguna linda con otra reserva, la de
+   menor número.
+
+free_starts() da, como bitmap de bloques, los inicios posibles de un tramo
+libre de cierta duración en un día (búsqueda de horarios alternativos): un
+día completo da 0 sin mirar reservas.
+"""
+
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+ESTRATEGIAS = ("primera", "compacta")
+
+
+class CourtAllocator:
+    def __init__(self, granularity: int, entries: Iterable[Tuple[Hashable, int, int, int]] = ()):
+        self.granularity = granularity
+        # clave (tipo, fecha) -> máscara de canchas ocupadas por bloque del día.
+        self._days: Dict[Hashable, List[int]] = {}
+        self._blocks_per_day = 24 * 60 // granularity
+        # Construcción inicial desde (clave, número, inicio, fin): como occupy(), con
+        # el ciclo en línea (se llama una vez por reserva al cargar el almacén).
+        days, empty, g = self._days, [0] * self._blocks_per_day, granularity
+        for key, numero, start, end in entries:
+            blocks = days.get(key)
+            if blocks is None:
+                blocks = days[key] = empty.copy()
+            bit = 1 << (numero - 1)
+            for i in range(start // g, -(-end // g)):
+                blocks[i] |= bit
+
+    def _blocks(self, start: int, end: int) -> range:
+        # Bloques que toca [start, end) (en minutos desde la medianoche).
+        return range(start // self.granularity, -(-end // self.granularity))
+
+    def occupy(self, key: Hashable, numero: int, start: int, end: int) -> None:
+        blocks = self._days.get(key)
+        if blocks is None:
+            blocks = self._days[key] = [0] * self._blocks_per_day
+        bit = 1 << (numero - 1)
+        for i in self._blocks(start, end):
+            blocks[i] |= bit
+
+    def release(self, key: Hashable, numero: int, start: int, end: int) -> None:
+        # Libera la cancha en esos bloques; un día sin ocupación se descarta.
+        blocks = self._days.get(key)
+        if blocks is None:
+            return
+        mask = ~(1 << (numero - 1))
+        for i in self._blocks(start, end):
+            blocks[i] &= mask
+        if not any(blocks):
+            del self._days[key]
+
+    def busy(self, key: Hashable, start: int, end: int) -> int:
+        """Máscara de las canchas ocupadas en algún momento de [start, end)."""
+        blocks = self._days.get(key)
+        if blocks is None:
+            return 0
+        mask = 0
+        for i in self._blocks(start, end):
+            mask |= blocks[i]
+        return mask
+
+    def day(self, key: Hashable) -> List[int]:
+        # Máscaras de ocupación de todos los bloques del día (ceros si no hay reservas).
+        blocks = self._days.get(key)
+        return list(blocks) if blocks is not None else [0] * self._blocks_per_day
+
+    def free_starts(self, key: Hashable, courts: int, length: int, first: int = 0,
+                    last: Optional[int] = None) -> int:
+        """
+        Bitmap de los bloques i (first <= i, i + length <= last) en que alguna de las
+        'courts' canchas está libre durante length bloques seguidos.
+        """
+        last = self._blocks_per_day if last is None else last
+        stop = last - length + 1
+        starts = (1 << stop) - (1 << first) if stop > first else 0
+        blocks = self._days.get(key)
+        if blocks is None or not starts:
+            return starts
+        # Bloques libres de cada cancha (bit i = libre en el bloque i) y, de cada una,
+        # los inicios de length bloques libres seguidos.
+        all_courts = (1 << courts) - 1
+        per_court = [0] * courts
+        for i in range(first, last):
+            free = all_courts & ~blocks[i]
+            while free:
+                low = free & -free
+                per_court[low.bit_length() - 1] |= 1 << i
+                free ^= low
+        runs = 0
+        for free in per_court:
+            run = free
+            for j in range(1, length):
+                run &= free >> j
+            runs |= run
+        return runs & starts
+
+    def choose(self, key: Hashable, start: int, end: int, free: int, strategy: str = "primera") -> int:
+        """Número de la cancha elegida entre las de la máscara 'free' (0 si está vacía)."""
+        if strategy not in ESTRATEGIAS:
+            raise ValueError(f"Estrategia de asignación desconocida: {strategy}")
+        if strategy == "compacta" and free:
+            blocks = self._days.get(key)
+            if blocks is not None:
+                span = self._blocks(start, end)
+                before = blocks[span.start - 1] if span.start > 0 else 0
+                after = blocks[span.stop] if span.stop < len(blocks) else 0
+                # Primero las que lindan por ambos lados, luego por uno solo.
+                for candidates in (free & before & after, free & (before | after)):
+                    if candidates:
+                        free = candidates
+                        break
+        # Bit más bajo de la máscara: cancha de menor número.
+        return (free & -free).bit_length()
@@ -10,27 +10,87 @@ Interfaz gráfica del sistema de reservas.
 Se integra con Manager (API en inglés):
  - create_reservation(...)
  - get_all_reservations() -> list[dict]
+ - get_reservations_page(offset, limit, sort_by, descending) -> list[dict]
+ - count_reservations() -> int
  - edit_reservation_by_id(id, **kwargs)
  - cancel_reservation_by_id(id)
  - get_price_for_court(tipo) -> float
+ - get_price(cancha, fecha, hora, hora_fin=..., documento=...) -> float  (tarifas vigentes)
  - get_court_types() -> list[str]
- - check_availability(cancha, fecha, hora) -> bool
+ - get_court_count(tipo) -> int
+ - check_availability(cancha, fecha, hora, hora_fin=..., cancha_num=...) -> bool
+ - get_free_courts(cancha, fecha, hora, hora_fin=...) -> list[int]
+ - get_availability_grid(fecha_inicio, fecha_fin) -> dict (bitmaps de ocupación
+                                                          total y parcial, canchas libres)
+ - find_free_slots(cancha, fecha_inicio, duracion=..., horas=..., dias=..., k=...)
+                                -> list[dict]  (horarios alternativos si el pedido está ocupado)
+ - events.subscribe(callback)   (deltas de cambios: las ventanas abiertas se
+                                 actualizan por fila/celda, sin releer todo)
 """
 
+import queue
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox, font
 from tkcalendar import DateEntry
-from datetime import date
+from bisect import bisect_left
+from datetime import date, datetime, timedelta
 
+from events import CREATED, UPDATED, CANCELLED, RELOADED
 from manager import Manager
+from pricing import DIAS
+from reservation import hora_to_minutes, minutes_to_hora
 
 
 class DesignApp:
+    # Filas por página al llenar el listado de reservas.
+    PAGE_SIZE = 200
+    # Columna visible -> clave de orden de Manager.get_reservations_page.
+    COLUMNAS_ORDEN = {"Nombre": "nombre", "Email": "email", "Fecha": "fecha",
+                      "Hora": "hora", "Cancha": "cancha", "Precio": "precio"}
+    # Cada cuánto (ms) se revisan errores de escritura y cambios de otros puestos.
+    POLL_MS = 500
+    # Cada cuánto (ms) se revisa si terminó la carga inicial del almacén.
+    CARGA_POLL_MS = 50
+    # Duraciones ofrecidas (minutos): múltiplos de la granularidad hasta 3 horas.
+    DURACIONES = list(range(Manager.GRANULARIDAD_MIN, 181, Manager.GRANULARIDAD_MIN))
+    # Colores de las celdas del tablero de disponibilidad.
+    COLOR_LIBRE, COLOR_PARCIAL, COLOR_OCUPADO = "#bfe8c4", "#f7dd9b", "#f3b5b5"
+    # Opción del combo de número de cancha que deja la elección a Manager.
+    CANCHA_AUTOMATICA = "Automática"
+    # Horarios alternativos ofrecidos cuando el pedido está ocupado.
+    ALTERNATIVAS = 8
+
+    @staticmethod
+    def _duracion_texto(minutos: int) -> str:
+        # 90 -> "1 h 30 min"
+        h, m = divmod(minutos, 60)
+        return " ".join(p for p in (f"{h} h" if h else "", f"{m} min" if m else "") if p)
+
+    @staticmethod
+    def _hora_fin(hora: str, duracion: str) -> str:
+        # Fin del intervalo a partir de la hora de inicio y la duración elegida en el combo.
+        minutos = {DesignApp._duracion_texto(d): d for d in DesignApp.DURACIONES}[duracion]
+        return minutes_to_hora(hora_to_minutes(hora) + minutos)
+
+    def _numeros_cancha(self, tipo: str) -> list:
+        # Opciones del combo de número de cancha: automática y luego 1..cantidad.
+        return [self.CANCHA_AUTOMATICA] + [str(n) for n in range(1, self.manager.get_court_count(tipo) + 1)]
+
     def __init__(self, root):
         # Root es la ventana principal de tkinter.
         self.root = root
-        # Manager encapsula la lógica de negocio y persistencia.
-        self.manager = Manager()
+        # Errores de la escritura diferida: llegan desde el hilo de escritura y se
+        # muestran desde el mainloop (tkinter no es seguro entre hilos).
+        self._errores = queue.Queue()
+        # Manager (carga del almacén e índices) se crea en un hilo aparte para que la
+        # ventana se dibuje de inmediato; hasta que llega, los botones están deshabilitados.
+        self.manager = None
+        self._carga = queue.Queue()
+        # Lotes de eventos de Manager (pueden llegar desde el hilo de escritura) y
+        # funciones de las ventanas abiertas que los aplican (ver _aplicar_eventos).
+        self._eventos = queue.Queue()
+        self._vistas = []
 
         # Configuración y construcción de la UI
         self._config_root()
@@ -39,6 +99,108 @@ class DesignApp:
         self._create_form()
         self._create_buttons()
 
+        # Al cerrar la ventana se liberan los recursos de persistencia (journal).
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
+        threading.Thread(target=self._cargar_manager, name="carga-reservas", daemon=True).start()
+        self.root.after(self.CARGA_POLL_MS, self._esperar_carga)
+
+    def _cargar_manager(self):
+        # Hilo de carga: no toca tkinter, solo entrega el resultado por la cola.
+        try:
+            # Manager encapsula la lógica de negocio y persistencia. Con write_behind
+            # las operaciones no bloquean la ventana mientras se escribe el archivo.
+            self._carga.put(Manager(write_behind=True, on_error=self._errores.put))
+        except Exception as e:
+            self._carga.put(e)
+
+    def _esperar_carga(self):
+        try:
+            resultado = self._carga.get_nowait()
+        except queue.Empty:
+            self.root.after(self.CARGA_POLL_MS, self._esperar_carga)
+            return
+        if isinstance(resultado, Exception):
+            messagebox.showerror("Error al cargar", f"No se pudieron cargar las reservas:\n{resultado}")
+            self.root.destroy()
+            return
+        self.manager = resultado
+        self.manager.events.subscribe(self._eventos.put)
+        types = self.manager.get_court_types()
+        self.cancha_combo["values"] = types
+        if types and not self.cancha_var.get():
+            self.cancha_var.set(types[0])
+        self._update_price()
+        for boton in self._botones:
+            boton.state(["!disabled"])
+        self.estado_carga.set("")
+        # Recarga automática cuando otro puesto (proceso) confirma cambios.
+        self.root.after(self.POLL_MS, self._poll_cambios)
+
+    def _poll_cambios(self):
+        # refresh() solo compara un contador de versión (y la firma del archivo de
+        # tarifas); recarga si cambió. Con tarifas nuevas se actualizan cancha y precio.
+        tarifas = self.manager.pricing
+        try:
+            self.manager.refresh()
+        except Exception as e:
+            print(f"[WARN] No se pudo recargar el almacén: {e}")
+        if self.manager.pricing is not tarifas:
+            self.cancha_combo["values"] = self.manager.get_court_types()
+            if self.cancha_var.get() not in self.cancha_combo["values"]:
+                self.cancha_var.set(self.manager.get_court_types()[0])
+            self._update_price()
+        self._aplicar_eventos()
+        while True:
+            try:
+                error = self._errores.get_nowait()
+            except queue.Empty:
+                break
+            messagebox.showerror("Error al guardar", str(error))
+        self.root.after(self.POLL_MS, self._poll_cambios)
+
+    def _on_close(self):
+        if self.manager is None:
+            # Aún cargando: no hay cambios que guardar (el hilo de carga es daemon).
+            self.root.destroy()
+            return
+        # Vuelca los cambios diferidos antes de cerrar; si falla, se ofrece reintentar.
+        while True:
+            try:
+                self.manager.flush()
+                break
+            except Exception as e:
+                if not messagebox.askretrycancel(
+                        "Error al guardar", f"No se pudieron guardar los últimos cambios:\n{e}"):
+                    break
+        try:
+            self.manager.close()
+        except Exception as e:
+            print(f"[ERROR] Cierre del almacén: {e}")
+        finally:
+            self.root.destroy()
+
+    def _aplicar_eventos(self):
+        # Entrega los eventos pendientes a las ventanas abiertas (desde el mainloop).
+        # Se llama en cada sondeo y justo después de cada cambio hecho en esta ventana.
+        eventos = []
+        while True:
+            try:
+                eventos.extend(self._eventos.get_nowait())
+            except queue.Empty:
+                break
+        if eventos:
+            for aplicar in list(self._vistas):
+                aplicar(eventos)
+
+    def _registrar_vista(self, ventana, aplicar):
+        # La ventana recibe eventos mientras exista.
+        self._vistas.append(aplicar)
+
+        def on_destroy(event):
+            if event.widget is ventana and aplicar in self._vistas:
+                self._vistas.remove(aplicar)
+        ventana.bind("<Destroy>", on_destroy, add="+")
+
     # -------------------------
     # Setup UI
     # -------------------------
@@ -74,7 +236,10 @@ class DesignApp:
         # Cabecera con titulo principal
         header = ttk.Frame(self.root, style="Card.TFrame", padding=(20, 14))
         header.place(relx=0.5, rely=0.05, anchor="n", relwidth=0.92)
-        ttk.Label(header, text="🥅 Sistema de Reservas de Canchas", style="Header.TLabel").pack(anchor="w")
+        ttk.Label(header, text="🥅 Sistema de Reservas de Canchas", style="Header.TLabel").pack(side="left")
+        # Aviso mientras se carga el almacén en segundo plano.
+        self.estado_carga = tk.StringVar(value="Cargando reservas…")
+        ttk.Label(header, textvariable=self.estado_carga, style="FormLabel.TLabel").pack(side="right")
 
     def _create_form(self):
         # Panel principal con entradas de formulario
@@ -97,15 +262,18 @@ class DesignApp:
         self.telefono_entry = field(left_col, "Teléfono")
         self.email_entry = field(left_col, "Correo electrónico")
 
-        # Combobox de tipos de cancha, poblado desde Manager
+        # Combobox de tipos de cancha, poblado desde Manager cuando termina la carga
         ttk.Label(left_col, text="Cancha", style="FormLabel.TLabel").pack(anchor="w", pady=(10,2))
-        types = self.manager.get_court_types()
-        default_type = types[0] if types else ""
-        self.cancha_var = tk.StringVar(value=default_type)
+        self.cancha_var = tk.StringVar()
         self.cancha_combo = ttk.Combobox(left_col, textvariable=self.cancha_var, state="readonly")
-        self.cancha_combo["values"] = types
         self.cancha_combo.pack(fill="x")
 
+        # Número de cancha dentro del tipo ("Automática": Manager asigna una libre)
+        ttk.Label(left_col, text="Número de cancha", style="FormLabel.TLabel").pack(anchor="w", pady=(6,2))
+        self.numero_var = tk.StringVar(value=self.CANCHA_AUTOMATICA)
+        self.numero_combo = ttk.Combobox(left_col, textvariable=self.numero_var, state="readonly")
+        self.numero_combo.pack(fill="x")
+
         # Container para Fecha / Hora / Precio
         container = ttk.Frame(left_col, style="Card.TFrame")
         container.pack(fill="x", pady=(10,0))
@@ -115,31 +283,54 @@ class DesignApp:
         self.fecha_picker = DateEntry(container, width=14, borderwidth=1, date_pattern='yyyy-mm-dd', mindate=date.today())
         self.fecha_picker.grid(row=1, column=0, padx=4, pady=(0,6), sticky="w")
 
-        # Combo de horas fijas (10:00 - 21:00)
+        # Combo de horas de inicio (cada GRANULARIDAD_MIN minutos desde las 10:00)
         ttk.Label(container, text="Hora", style="FormLabel.TLabel").grid(row=0, column=1, sticky="w")
         self.hora_var = tk.StringVar()
         self.hora_combo = ttk.Combobox(container, textvariable=self.hora_var, state="readonly", width=8)
-        self.hora_combo["values"] = [f"{h}:00" for h in range(10, 22)]
+        self.hora_combo["values"] = Manager.HORAS_INICIO
         self.hora_combo.grid(row=1, column=1, padx=4, pady=(0,6), sticky="w")
 
-        # Precio mostrado en entrada solo lectura
-        ttk.Label(container, text="Precio (USD/hora)", style="FormLabel.TLabel").grid(row=0, column=2, sticky="w")
+        # Combo de duración (por defecto una hora)
+        ttk.Label(container, text="Duración", style="FormLabel.TLabel").grid(row=0, column=2, sticky="w")
+        self.duracion_var = tk.StringVar(value=self._duracion_texto(60))
+        self.duracion_combo = ttk.Combobox(container, textvariable=self.duracion_var, state="readonly", width=10)
+        self.duracion_combo["values"] = [self._duracion_texto(d) for d in self.DURACIONES]
+        self.duracion_combo.grid(row=1, column=2, padx=4, pady=(0,6), sticky="w")
+
+        # Precio mostrado en entrada solo lectura: tarifa por hora hasta elegir hora, luego
+        # el precio de la reserva según las tarifas vigentes (franja, día y socio)
+        ttk.Label(container, text="Precio (USD)", style="FormLabel.TLabel").grid(row=0, column=3, sticky="w")
         self.price_var = tk.StringVar()
         self.price_entry = ttk.Entry(container, textvariable=self.price_var, font=self.label_font, state="readonly", justify="left", width=12)
-        self.price_entry.grid(row=1, column=2, padx=4, pady=(0,6), sticky="w")
+        self.price_entry.grid(row=1, column=3, padx=4, pady=(0,6), sticky="w")
 
-        # Actualiza precio cuando se cambia la cancha seleccionada
-        self.cancha_combo.bind("<<ComboboxSelected>>", lambda e: self._update_price())
+        # Actualiza precio cuando cambia la cancha, la fecha, la hora o la duración
+        for combo in (self.cancha_combo, self.hora_combo, self.duracion_combo):
+            combo.bind("<<ComboboxSelected>>", lambda e: self._update_price())
+        self.fecha_picker.bind("<<DateEntrySelected>>", lambda e: self._update_price())
         self._update_price()
 
     def _update_price(self):
-        # Llama a manager.get_price_for_court y formatea el precio; maneja excepciones.
-        cancha = self.cancha_var.get()
+        # Con hora elegida cotiza la reserva (manager.get_price); si no, o si el horario
+        # no es válido, muestra la tarifa base por hora. Maneja excepciones.
+        # También ajusta los números de cancha ofrecidos al tipo elegido.
+        cancha, hora = self.cancha_var.get(), self.hora_var.get()
         try:
-            price = self.manager.get_price_for_court(cancha)
+            self.numero_combo["values"] = self._numeros_cancha(cancha)
+            texto = f"${self.manager.get_price_for_court(cancha):.2f}/h"
         except Exception:
-            price = 0.0
-        self.price_var.set(f"${price:.2f}")
+            texto = "$0.00/h"
+        if hora:
+            try:
+                precio = self.manager.get_price(cancha, self.fecha_picker.get(), hora,
+                                                self._hora_fin(hora, self.duracion_var.get()),
+                                                self.documento_entry.get().strip() or None)
+                texto = f"${precio:.2f}"
+            except Exception:
+                pass
+        if self.numero_var.get() not in self.numero_combo["values"]:
+            self.numero_var.set(self.CANCHA_AUTOMATICA)
+        self.price_var.set(texto)
 
     # -------------------------
     # Buttons
@@ -148,9 +339,15 @@ class DesignApp:
         bar = ttk.Frame(self.root, style="Card.TFrame")
         bar.place(relx=0.5, rely=0.88, anchor="n", relwidth=0.92)
 
-        ttk.Button(bar, text="Reservar", style="Accent.TButton", command=self._reservar).pack(side="left", padx=6)
-        ttk.Button(bar, text="Ver reservas", style="Outline.TButton", command=self.ver_reservas).pack(side="left", padx=6)
-        ttk.Button(bar, text="Disponibilidad", style="Outline.TButton", command=self._ver_disponibilidad).pack(side="left", padx=6)
+        # Deshabilitados hasta que termine la carga (ver _esperar_carga).
+        self._botones = [
+            ttk.Button(bar, text="Reservar", style="Accent.TButton", command=self._reservar),
+            ttk.Button(bar, text="Ver reservas", style="Outline.TButton", command=self.ver_reservas),
+            ttk.Button(bar, text="Disponibilidad", style="Outline.TButton", command=self._ver_disponibilidad),
+        ]
+        for boton in self._botones:
+            boton.state(["disabled"])
+            boton.pack(side="left", padx=6)
 
     # -------------------------
     # Main actions
@@ -170,29 +367,35 @@ class DesignApp:
             return messagebox.showerror("Error", "Completa todos los campos obligatorios (nombre, documento, hora).")
 
         # Delegar creación al Manager y mostrar errores si ocurren
+        numero = self.numero_var.get()
         try:
-            self.manager.create_reservation(
+            r = self.manager.create_reservation(
                 nombre=nombre,
                 documento=documento,
                 telefono=telefono,
                 email=email,
                 cancha=cancha,
                 fecha=fecha,
-                hora=hora
+                hora=hora,
+                hora_fin=self._hora_fin(hora, self.duracion_var.get()),
+                cancha_num=None if numero == self.CANCHA_AUTOMATICA else int(numero)
             )
         except ValueError as e:
+            # Si el horario está ocupado se ofrecen los primeros libres en su lugar.
+            if self._horario_ocupado(cancha, fecha, hora, numero):
+                return self._ofrecer_alternativas(str(e), cancha, fecha, hora)
             return messagebox.showerror("Error", str(e))
         except Exception as e:
             return messagebox.showerror("Error inesperado", str(e))
 
-        messagebox.showinfo("Reserva exitosa", "¡Reserva realizada con éxito!")
+        self._aplicar_eventos()
+        messagebox.showinfo("Reserva exitosa", f"¡Reserva realizada con éxito! Cancha: {r.court.nombre}")
         # Limpia selección de hora para UX
         self.hora_var.set("")
 
     def ver_reservas(self):
-        # Obtiene lista de dicts desde Manager
-        reservas = self.manager.get_all_reservations()
-        if not reservas:
+        # El total se consulta sin materializar las reservas
+        if not self.manager.count_reservations():
             return messagebox.showinfo("Reservas", "No hay reservas registradas.")
 
         # Construye ventana con Treeview para listar reservas
@@ -200,21 +403,132 @@ class DesignApp:
         ventana.title("Reservas registradas")
         ventana.geometry("800x400")
 
-        columnas = ("Nombre", "Email", "Fecha", "Hora", "Cancha", "Precio")
-        tree = ttk.Treeview(ventana, columns=columnas, show="headings", selectmode="browse")
+        columnas = tuple(self.COLUMNAS_ORDEN)
+        marco = tk.Frame(ventana)
+        marco.pack(fill="both", expand=True, padx=10, pady=10)
+        tree = ttk.Treeview(marco, columns=columnas, show="headings", selectmode="browse")
+        scroll = ttk.Scrollbar(marco, orient="vertical", command=tree.yview)
+        estado_var = tk.StringVar()
+
+        # Estado del listado: orden actual y cuántas filas se han cargado. Las filas
+        # cargadas son siempre un prefijo del orden de Manager; con una columna de
+        # orden, 'claves' guarda sus entradas (clave + id, como SortedIndex) en orden
+        # ascendente y 'entrada' la de cada fila, para ubicar los cambios con bisect.
+        vista = {"sort_by": None, "descending": False, "loaded": 0, "done": False}
+        claves, entrada = [], {}
+
+        def valores(r):
+            return (r["nombre"], r["email"], r["fecha"], f"{r['hora']} - {r['hora_fin']}",
+                    f"{r['cancha']} {r['cancha_num']}", f"${r['precio']:.2f}")
+
+        def clave(res_id):
+            r = self.manager.get_reservation_by_id(res_id)
+            return None if r is None else Manager.SORT_KEYS[vista["sort_by"]](r) + (res_id,)
+
+        def mostrar_total():
+            estado_var.set(f"Mostrando {vista['loaded']} de {self.manager.count_reservations()} reservas")
+
+        def cargar_pagina():
+            # Trae la siguiente página desde Manager (ya ordenada por su índice). El
+            # desplazamiento supone que lo cargado está al día: primero los eventos.
+            self._aplicar_eventos()
+            if vista["done"]:
+                return
+            filas = self.manager.get_reservations_page(
+                vista["loaded"], self.PAGE_SIZE, vista["sort_by"], vista["descending"])
+            # Inserta filas; el iid es el id de reserva para operar luego
+            for r in filas:
+                tree.insert("", "end", iid=r["id"], values=valores(r))
+                e = clave(r["id"]) if vista["sort_by"] is not None else None
+                if e is not None:
+                    entrada[r["id"]] = e
+            if vista["sort_by"] is not None:
+                claves[:] = sorted(entrada.values())
+            vista["loaded"] += len(filas)
+            vista["done"] = len(filas) < self.PAGE_SIZE
+            mostrar_total()
+
+        def quitar_fila(res_id):
+            if not tree.exists(res_id):
+                return
+            tree.delete(res_id)
+            # La fila ya no cuenta para el desplazamiento de la próxima página.
+            vista["loaded"] -= 1
+            e = entrada.pop(res_id, None)
+            if e is not None:
+                del claves[bisect_left(claves, e)]
+
+        def poner_fila(r):
+            # Inserta la fila en su posición si cae dentro de lo ya cargado; si cae
+            # después, llegará con las próximas páginas.
+            if vista["sort_by"] is None:
+                # Orden de inserción: una reserva nueva va al final (o al inicio si es inverso).
+                if vista["descending"]:
+                    tree.insert("", 0, iid=r["id"], values=valores(r))
+                    vista["loaded"] += 1
+                elif vista["done"]:
+                    tree.insert("", "end", iid=r["id"], values=valores(r))
+                    vista["loaded"] += 1
+                return
+            e = clave(r["id"])
+            if e is None:
+                return
+            dentro = vista["done"] or not claves or (e > claves[0] if vista["descending"] else e < claves[-1])
+            if not dentro:
+                return
+            i = bisect_left(claves, e)
+            claves.insert(i, e)
+            entrada[r["id"]] = e
+            tree.insert("", len(claves) - 1 - i if vista["descending"] else i, iid=r["id"], values=valores(r))
+            vista["loaded"] += 1
+
+        def aplicar(eventos):
+            # Deltas de Manager: cada evento toca solo su fila (O(cambios)).
+            for ev in eventos:
+                if ev.kind == RELOADED:
+                    return recargar()
+                if ev.kind == CANCELLED:
+                    quitar_fila(ev.id)
+                elif ev.kind == UPDATED and vista["sort_by"] is None:
+                    # Sin columna de orden la posición no cambia.
+                    if tree.exists(ev.id):
+                        tree.item(ev.id, values=valores(ev.data))
+                elif ev.kind in (CREATED, UPDATED):
+                    quitar_fila(ev.id)
+                    poner_fila(ev.data)
+            mostrar_total()
+
+        def recargar():
+            vista.update(loaded=0, done=False)
+            claves.clear()
+            entrada.clear()
+            tree.delete(*tree.get_children())
+            cargar_pagina()
+
+        def on_scroll(first, last):
+            # Al acercarse al final de lo cargado, se pide la página siguiente.
+            scroll.set(first, last)
+            if float(last) > 0.9 and not vista["done"]:
+                cargar_pagina()
+
+        def ordenar(col):
+            # Clic en el encabezado: ordena por esa columna (otro clic invierte el orden).
+            sort_by = self.COLUMNAS_ORDEN[col]
+            vista["descending"] = not vista["descending"] if vista["sort_by"] == sort_by else False
+            vista["sort_by"] = sort_by
+            recargar()
+            tree.yview_moveto(0)
 
         for col in columnas:
-            tree.heading(col, text=col)
+            tree.heading(col, text=col, command=lambda c=col: ordenar(c))
             tree.column(col, width=120, anchor="center")
 
-        # Inserta filas; el iid es el id de reserva para operar luego
-        for r in reservas:
-            res_id = r["id"]
-            tree.insert("", "end", iid=res_id, values=(
-                r["nombre"], r["email"], r["fecha"], r["hora"], r["cancha"], f"${r['precio']:.2f}"
-            ))
-
-        tree.pack(fill="both", expand=True, padx=10, pady=10)
+        tree.configure(yscrollcommand=on_scroll)
+        scroll.pack(side="right", fill="y")
+        tree.pack(side="left", fill="both", expand=True)
+        ttk.Label(ventana, textvariable=estado_var).pack(anchor="w", padx=10)
+        cargar_pagina()
+        self._registrar_vista(ventana, aplicar)
 
         # Funciones internas para editar y cancelar
         def editar():
@@ -225,7 +539,7 @@ class DesignApp:
             reserva = self.manager.get_reservation_by_id(res_id)
             if not reserva:
                 return messagebox.showerror("Error", "La reserva seleccionada ya no existe.")
-            self._abrir_editor_reserva(reserva, res_id, tree)
+            self._abrir_editor_reserva(reserva, res_id)
 
         def cancelar():
             selected = tree.selection()
@@ -236,7 +550,8 @@ class DesignApp:
                 return
             try:
                 self.manager.cancel_reservation_by_id(res_id)
-                tree.delete(res_id)
+                # La fila se quita con el evento de la cancelación.
+                self._aplicar_eventos()
                 messagebox.showinfo("Cancelada", "La reserva ha sido eliminada correctamente.")
             except Exception as e:
                 messagebox.showerror("Error", str(e))
@@ -247,11 +562,11 @@ class DesignApp:
         tk.Button(frame_botones, text="Cancelar", command=cancelar, width=12, bg="#dc3545", fg="white").pack(side="left", padx=10)
         tk.Button(frame_botones, text="Cerrar", command=ventana.destroy, width=12).pack(side="left", padx=10)
 
-    def _abrir_editor_reserva(self, reserva, res_id: str, tree: ttk.Treeview):
+    def _abrir_editor_reserva(self, reserva, res_id: str):
         # Ventana para editar campos de la reserva
         edit_win = tk.Toplevel(self.root)
         edit_win.title("Editar reserva")
-        edit_win.geometry("420x420")
+        edit_win.geometry("420x470")
         edit_win.transient(self.root)
 
         def field(label, value):
@@ -272,20 +587,52 @@ class DesignApp:
         cancha_cb["values"] = self.manager.get_court_types()
         cancha_cb.pack(fill="x", padx=10)
 
+        ttk.Label(edit_win, text="Número de cancha").pack(anchor="w", pady=(6,0), padx=10)
+        numero_var = tk.StringVar(value=self.CANCHA_AUTOMATICA)
+        numero_cb = ttk.Combobox(edit_win, textvariable=numero_var, state="readonly")
+        numero_cb["values"] = self._numeros_cancha(reserva.court.tipo)
+        numero_cb.pack(fill="x", padx=10)
+
         ttk.Label(edit_win, text="Hora").pack(anchor="w", pady=(6,0), padx=10)
         hora_var = tk.StringVar(value=reserva.hora)
         hora_cb = ttk.Combobox(edit_win, textvariable=hora_var, state="readonly")
-        hora_cb["values"] = [f"{h}:00" for h in range(10, 22)]
+        hora_cb["values"] = self.manager.HORAS_INICIO
         hora_cb.pack(fill="x", padx=10)
 
-        ttk.Label(edit_win, text="Precio (USD/hora)").pack(anchor="w", pady=(6,0), padx=10)
-        # Precio mostrado en función de la cancha seleccionada (se obtiene desde Manager)
-        edit_price_var = tk.StringVar(value=f"${self.manager.get_price_for_court(cancha_var.get()):.2f}")
+        ttk.Label(edit_win, text="Duración").pack(anchor="w", pady=(6,0), padx=10)
+        duracion_var = tk.StringVar(value=self._duracion_texto(
+            hora_to_minutes(reserva.hora_fin) - hora_to_minutes(reserva.hora)))
+        duracion_cb = ttk.Combobox(edit_win, textvariable=duracion_var, state="readonly")
+        duracion_cb["values"] = [self._duracion_texto(d) for d in self.DURACIONES]
+        duracion_cb.pack(fill="x", padx=10)
+
+        ttk.Label(edit_win, text="Precio (USD)").pack(anchor="w", pady=(6,0), padx=10)
+        # Precio de la reserva con los valores elegidos según las tarifas vigentes
+        # (se obtiene desde Manager); si el horario no es válido, la tarifa por hora
+        edit_price_var = tk.StringVar()
         edit_price_entry = ttk.Entry(edit_win, textvariable=edit_price_var, state="readonly")
         edit_price_entry.pack(fill="x", padx=10)
 
-        # Actualiza precio en el editor si se cambia cancha
-        cancha_cb.bind("<<ComboboxSelected>>", lambda e: edit_price_var.set(f"${self.manager.get_price_for_court(cancha_var.get()):.2f}"))
+        def cotizar(event=None):
+            cancha = cancha_var.get()
+            try:
+                precio = self.manager.get_price(cancha, reserva.fecha, hora_var.get(),
+                                                self._hora_fin(hora_var.get(), duracion_var.get()),
+                                                reserva.client.documento)
+                edit_price_var.set(f"${precio:.2f}")
+            except (KeyError, ValueError):
+                edit_price_var.set(f"${self.manager.get_price_for_court(cancha):.2f}/h")
+
+        # Actualiza precio y números de cancha en el editor si se cambia el tipo
+        def cambiar_tipo(event=None):
+            cotizar()
+            numero_cb["values"] = self._numeros_cancha(cancha_var.get())
+            numero_var.set(self.CANCHA_AUTOMATICA)
+
+        cancha_cb.bind("<<ComboboxSelected>>", cambiar_tipo)
+        hora_cb.bind("<<ComboboxSelected>>", cotizar)
+        duracion_cb.bind("<<ComboboxSelected>>", cotizar)
+        cotizar()
 
         def guardar_cambios():
             # Recolecta nuevos valores y delega la edición al Manager.
@@ -296,26 +643,28 @@ class DesignApp:
                 "cancha": cancha_var.get(),
                 "hora": hora_var.get()
             }
+            try:
+                new_data["hora_fin"] = self._hora_fin(new_data["hora"], duracion_var.get())
+            except KeyError:
+                # Duración fuera de las opciones del combo (reserva importada): se conserva.
+                pass
+            # "Automática": se conserva la cancha actual si sigue libre.
+            if numero_var.get() != self.CANCHA_AUTOMATICA:
+                new_data["cancha_num"] = int(numero_var.get())
             try:
                 self.manager.edit_reservation_by_id(res_id, **new_data)
             except Exception as e:
                 return messagebox.showerror("Error", str(e))
 
-            # Refresca la fila en el treeview con los nuevos valores
-            updated = self.manager.get_reservation_by_id(res_id)
-            if updated:
-                d = updated.to_dict()
-                tree.item(res_id, values=(
-                    d["nombre"], d["email"], d["fecha"], d["hora"], d["cancha"], f"${d['precio']:.2f}"
-                ))
-
+            # Las ventanas abiertas (listado, tablero) se actualizan con el evento.
+            self._aplicar_eventos()
             edit_win.destroy()
             messagebox.showinfo("Actualizada", "Reserva actualizada correctamente.")
 
         ttk.Button(edit_win, text="Guardar cambios", style="Accent.TButton", command=guardar_cambios).pack(pady=15)
 
     def _ver_disponibilidad(self):
-        # Consultas de disponibilidad simples: todo el día o una hora específica.
+        # Consultas de disponibilidad: tablero semanal o una hora específica.
         cancha = self.cancha_var.get()
         fecha = self.fecha_picker.get()
         hora = self.hora_var.get()
@@ -324,12 +673,173 @@ class DesignApp:
             return messagebox.showwarning("Atención", "Selecciona cancha y fecha para consultar disponibilidad.")
 
         if not hora:
-            # Muestra todas las horas libres en el rango 10-21
-            free = [f"{h}:00" for h in range(10, 22) if self.manager.check_availability(cancha, fecha, f"{h}:00")]
-            msg = f"Horas libres para {cancha} el {fecha}:\n" + (", ".join(free) if free else "No hay horas libres.")
-            return messagebox.showinfo("Disponibilidad", msg)
-
-        # Consulta puntual para una hora dada
-        disponible = self.manager.check_availability(cancha, fecha, hora)
-        msg = f"{cancha} {'está disponible' if disponible else 'NO está disponible'} el {fecha} a las {hora}."
-        messagebox.showinfo("Disponibilidad", msg)
\ No newline at end of file
+            # Sin hora seleccionada: tablero semanal de todas las canchas desde la fecha elegida.
+            return self._abrir_tablero_disponibilidad(fecha)
+
+        # Consulta puntual para el intervalo elegido (hora + duración)
+        hora_fin = self._hora_fin(hora, self.duracion_var.get())
+        libres = self.manager.get_free_courts(cancha, fecha, hora, hora_fin=hora_fin)
+        if not libres:
+            return self._ofrecer_alternativas(f"{cancha} NO está disponible el {fecha} de {hora} a {hora_fin}.",
+                                              cancha, fecha, hora)
+        messagebox.showinfo("Disponibilidad", f"{cancha}: {len(libres)} cancha(s) libre(s) el {fecha} de {hora} "
+                                              f"a {hora_fin} (números {', '.join(map(str, libres))}).")
+
+    def _horario_ocupado(self, cancha: str, fecha: str, hora: str, numero: str) -> bool:
+        # True si el intervalo pedido (formulario) es válido pero no tiene cancha libre.
+        try:
+            hora_fin = self._hora_fin(hora, self.duracion_var.get())
+            cancha_num = None if numero == self.CANCHA_AUTOMATICA else int(numero)
+            return not self.manager.check_availability(cancha, fecha, hora, hora_fin=hora_fin, cancha_num=cancha_num)
+        except (KeyError, ValueError):
+            return False
+
+    def _ofrecer_alternativas(self, mensaje: str, cancha: str, fecha: str, hora: str):
+        # Ventana con los primeros horarios libres desde la fecha pedida, con la misma
+        # duración (Manager.find_free_slots); se puede limitar a la misma hora o al mismo
+        # día de la semana. "Usar horario" lo copia al formulario.
+        duracion = self.duracion_var.get()
+        minutos = hora_to_minutes(self._hora_fin(hora, duracion)) - hora_to_minutes(hora)
+        dia = DIAS[datetime.strptime(fecha, "%Y-%m-%d").weekday()]
+
+        ventana = tk.Toplevel(self.root)
+        ventana.title("Horarios alternativos")
+        ventana.geometry("520x360")
+        ttk.Label(ventana, text=mensaje, wraplength=480).pack(anchor="w", padx=10, pady=(10, 4))
+
+        misma_hora_var, mismo_dia_var = tk.BooleanVar(), tk.BooleanVar()
+        filtros = ttk.Frame(ventana)
+        filtros.pack(fill="x", padx=10)
+
+        columnas = ("Fecha", "Hora", "Canchas libres")
+        tree = ttk.Treeview(ventana, columns=columnas, show="headings", selectmode="browse", height=8)
+        for col in columnas:
+            tree.heading(col, text=col)
+            tree.column(col, width=150)
+        tree.pack(fill="both", expand=True, padx=10, pady=6)
+        estado_var = tk.StringVar()
+        ttk.Label(ventana, textvariable=estado_var).pack(anchor="w", padx=10)
+
+        def buscar():
+            tree.delete(*tree.get_children())
+            try:
+                opciones = self.manager.find_free_slots(
+                    cancha, fecha, duracion=minutos, k=self.ALTERNATIVAS,
+                    horas=[hora] if misma_hora_var.get() else None,
+                    dias=[dia] if mismo_dia_var.get() else None)
+            except ValueError as e:
+                return estado_var.set(str(e))
+            for o in opciones:
+                tree.insert("", "end", values=(o["fecha"], f"{o['hora']} - {o['hora_fin']}",
+                                               ", ".join(map(str, o["libres"]))))
+            estado_var.set("" if opciones else f"Sin horarios libres en {Manager.BUSQUEDA_DIAS} días desde el {fecha}.")
+
+        ttk.Checkbutton(filtros, text=f"Solo a las {hora}", variable=misma_hora_var,
+                        command=buscar).pack(side="left")
+        ttk.Checkbutton(filtros, text=f"Solo el mismo día de la semana ({dia})", variable=mismo_dia_var,
+                        command=buscar).pack(side="left", padx=(12, 0))
+
+        def usar():
+            sel = tree.selection()
+            if not sel:
+                return messagebox.showwarning("Atención", "Selecciona un horario.", parent=ventana)
+            fecha_o, intervalo, _ = tree.item(sel[0], "values")
+            self.fecha_picker.set_date(datetime.strptime(fecha_o, "%Y-%m-%d").date())
+            self.hora_var.set(intervalo.split(" - ")[0])
+            self.numero_var.set(self.CANCHA_AUTOMATICA)
+            self._update_price()
+            ventana.destroy()
+
+        ttk.Button(ventana, text="Usar horario", style="Accent.TButton", command=usar).pack(pady=(4, 10))
+        tree.bind("<Double-1>", lambda e: usar())
+        buscar()
+
+    def _abrir_tablero_disponibilidad(self, fecha: str):
+        # Ventana con una pestaña por cancha: filas = horas, columnas = 7 días.
+        # Toda la semana se obtiene con una sola llamada a get_availability_grid.
+        ventana = tk.Toplevel(self.root)
+        ventana.title("Disponibilidad semanal")
+        ventana.geometry("820x440")
+
+        estado = {"inicio": datetime.strptime(fecha, "%Y-%m-%d").date()}
+        notebook = ttk.Notebook(ventana)
+        notebook.pack(fill="both", expand=True, padx=10, pady=(10, 0))
+
+        # Crea las celdas una sola vez; al cambiar de semana solo se reconfiguran.
+        horas = self.manager.HORAS
+        celdas = {}
+        encabezados = {}
+        for tipo in self.manager.get_court_types():
+            tab = tk.Frame(notebook, bg=self.card_bg)
+            notebook.add(tab, text=tipo)
+            for d in range(7):
+                lbl = tk.Label(tab, bg=self.card_bg, font=self.label_font, width=11)
+                lbl.grid(row=0, column=d + 1, padx=1, pady=1)
+                encabezados[(tipo, d)] = lbl
+            for i, hora in enumerate(horas):
+                tk.Label(tab, text=hora, bg=self.card_bg, font=self.label_font, width=6).grid(row=i + 1, column=0)
+                for d in range(7):
+                    cell = tk.Label(tab, width=11, relief="flat")
+                    cell.grid(row=i + 1, column=d + 1, padx=1, pady=1)
+                    celdas[(tipo, d, i)] = cell
+
+        def pintar_columna(tipo, d, fecha_d, bits, parcial, libres):
+            # Una columna (día) del tablero: Libre (con cuántas canchas del tipo, si hay
+            # varias) / Parcial (parte de la hora) / Ocupado.
+            encabezados[(tipo, d)].configure(text=fecha_d)
+            total = self.manager.get_court_count(tipo)
+            for i in range(len(horas)):
+                if parcial >> i & 1:
+                    texto, color = "Parcial", self.COLOR_PARCIAL
+                elif bits >> i & 1:
+                    texto, color = "Ocupado", self.COLOR_OCUPADO
+                else:
+                    texto = f"Libre {libres[i]}/{total}" if total > 1 else "Libre"
+                    color = self.COLOR_LIBRE
+                celdas[(tipo, d, i)].configure(text=texto, bg=color)
+
+        def pintar():
+            inicio = estado["inicio"]
+            fin = inicio + timedelta(days=6)
+            grid = self.manager.get_availability_grid(inicio.isoformat(), fin.isoformat())
+            for tipo, bitmaps in grid["canchas"].items():
+                columnas_dia = zip(grid["fechas"], bitmaps, grid["parcial"][tipo], grid["libres"][tipo])
+                for d, (fecha_d, bits, parcial, libres) in enumerate(columnas_dia):
+                    pintar_columna(tipo, d, fecha_d, bits, parcial, libres)
+            rango_var.set(f"Semana del {inicio.isoformat()} al {fin.isoformat()}")
+
+        def pintar_dia(tipo, fecha_c):
+            # Repinta un día de un tipo de cancha si la semana visible lo contiene (solo
+            # se consulta la ocupación de ese día).
+            d = (datetime.strptime(fecha_c, "%Y-%m-%d").date() - estado["inicio"]).days
+            if not 0 <= d < 7 or (tipo, d) not in encabezados:
+                return
+            grid = self.manager.get_availability_grid(fecha_c, fecha_c, [tipo])
+            pintar_columna(tipo, d, fecha_c, grid["canchas"][tipo][0], grid["parcial"][tipo][0],
+                           grid["libres"][tipo][0])
+
+        def aplicar(eventos):
+            # Solo se repintan los días que liberó u ocupó cada cambio.
+            dias = set()
+            for ev in eventos:
+                if ev.kind == RELOADED:
+                    return pintar()
+                for r in (ev.previous, ev.data):
+                    if r is not None:
+                        dias.add((r["cancha"], r["fecha"]))
+            for tipo, fecha_c in dias:
+                pintar_dia(tipo, fecha_c)
+
+        def mover(dias):
+            estado["inicio"] += timedelta(days=dias)
+            pintar()
+
+        barra = tk.Frame(ventana)
+        barra.pack(pady=8)
+        rango_var = tk.StringVar()
+        tk.Button(barra, text="◀ Semana anterior", command=lambda: mover(-7)).pack(side="left", padx=6)
+        tk.Label(barra, textvariable=rango_var, font=self.label_font).pack(side="left", padx=6)
+        tk.Button(barra, text="Semana siguiente ▶", command=lambda: mover(7)).pack(side="left", padx=6)
+        tk.Button(barra, text="Cerrar", command=ventana.destroy, width=10).pack(side="left", padx=6)
+        pintar()
+        self._registrar_vista(ventana, aplicar)
@@ -0,0 +1,85 @@
+# Juan David Ocampo Gutierrez
+# Nicolás Castro Pacheco
+# Michell Valencia Berdugo
+# Juan David Rivera Durán
+
+"""
+events.py
+---------
+
+Eventos de cambio que publica Manager para que las vistas se actualicen
+por deltas en lugar de volver a leer todas las reservas.
+
+Cada operación que modifica reservas publica UN lote (lista) de
+ChangeEvent, uno por reserva afectada:
+ - CREATED    reserva nueva                       (data)
+ - UPDATED    reserva editada, o cuyo cliente cambió de datos  (data, previous)
+ - CANCELLED  reserva cancelada                   (previous)
+ - RELOADED   el estado se recargó completo (cambios de otro puesto o
+              meses históricos abiertos): las vistas deben reconstruirse
+
+data y previous son copias en dict (formato de Reservation.to_dict) del
+estado después y antes del cambio, así un suscriptor puede usarlas desde
+otro hilo sin tocar los objetos de Manager.
+
+Los suscriptores se llaman en el hilo que hizo el cambio (con el lock de
+escritura de Manager tomado): deben ser rápidos y no bloquear. La UI, por
+ejemplo, solo encola el lote y lo aplica desde el mainloop de tkinter.
+"""
+
+import threading
+from typing import Callable, Dict, List, Optional
+
+CREATED = "created"
+UPDATED = "updated"
+CANCELLED = "cancelled"
+RELOADED = "reloaded"
+
+
+class ChangeEvent:
+    __slots__ = ("kind", "id", "data", "previous")
+
+    def __init__(self, kind: str, res_id: Optional[str] = None,
+                 data: Optional[Dict] = None, previous: Optional[Dict] = None):
+        self.kind = kind
+        self.id = res_id
+        # Reserva después del cambio (None al cancelar).
+        self.data = data
+        # Reserva antes del cambio (None en altas y cuando solo cambió el cliente).
+        self.previous = previous
+
+    def __repr__(self):
+        return f"ChangeEvent({self.kind}, {self.id})"
+
+
+class EventBus:
+    """Lista de suscriptores a los lotes de ChangeEvent (segura entre hilos)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: List[Callable[[List[ChangeEvent]], None]] = []
+
+    @property
+    def active(self) -> bool:
+        # Sin suscriptores Manager no construye los eventos.
+        return bool(self._subscribers)
+
+    def subscribe(self, callback: Callable[[List[ChangeEvent]], None]) -> Callable[[], None]:
+        """Registra callback(eventos); devuelve la función que anula la suscripción."""
+        with self._lock:
+            self._subscribers = self._subscribers + [callback]
+        return lambda: self.unsubscribe(callback)
+
+    def unsubscribe(self, callback) -> None:
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s is not callback]
+
+    def publish(self, events: List[ChangeEvent]) -> None:
+        # La lista de suscriptores se reemplaza (no se modifica) al suscribir, así
+        # se recorre sin lock. El error de un suscriptor no afecta a los demás ni a
+        # la operación, que ya se aplicó.
+        for callback in self._subscribers:
+            try:
+                callback(events)
+            except Exception as e:
+                print(f"[WARN] Suscriptor de eventos falló: {e}")
@@ -0,0 +1,208 @@
+# Juan David Ocampo Gutierrez
+# Nicolás Castro Pacheco
+# Michell Valencia Berdugo
+# Juan David Rivera Durán
+
+"""
+instrumentation.py
+------------------
+
+Métricas de tiempo y E/S de Manager y de los backends de almacenamiento.
+
+Se activa con RESERVAS_METRICS=1 (antes de importar manager/storage):
+
+ - por operación (cada método público de Manager y cada carga/escritura
+   de los backends): llamadas, errores, latencia total/mín/máx e
+   histograma con percentiles aproximados;
+ - contadores de E/S: bytes escritos, registros cargados y rechazados...;
+ - registro de operaciones lentas (umbral RESERVAS_SLOW_MS, 100 ms por
+   defecto): se imprimen como [SLOW] y quedan las últimas en memoria.
+
+Consulta: stats() (dict), dump_json(path=None); con RESERVAS_METRICS_FILE
+se vuelcan además al salir del proceso. La API HTTP las expone en
+GET /metricas.
+
+Desactivado (por defecto) el costo es nulo: los decoradores devuelven la
+función original sin envolver y count() solo compara un booleano.
+"""
+
+import atexit
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+
+ENABLED = os.environ.get("RESERVAS_METRICS") == "1"
+# Umbral (ms) a partir del cual una operación se registra como lenta.
+SLOW_MS = float(os.environ.get("RESERVAS_SLOW_MS", "100"))
+# Cotas superiores (ms) de las cubetas del histograma de latencia (serie 1-2-5).
+BUCKETS_MS = tuple(m * 10 ** e for e in range(-2, 5) for m in (1, 2, 5))
+# Cuántas operaciones lentas se conservan.
+SLOW_LOG_SIZE = 200
+
+
+class _OpStats:
+    __slots__ = ("count", "errors", "total", "min", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        # Una cubeta por cota más la de desborde (> última cota).
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def percentile(self, q):
+        # Aproximado: cota superior de la cubeta donde cae el percentil q.
+        target = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= target:
+                return BUCKETS_MS[i] if i < len(BUCKETS_MS) else self.max * 1000
+        return 0.0
+
+    def to_dict(self):
+        ms = 1000
+        return {
+            "calls": self.count,
+            "errors": self.errors,
+            "total_ms": self.total * ms,
+            "mean_ms": self.total / self.count * ms if self.count else 0.0,
+            "min_ms": self.min * ms if self.count else 0.0,
+            "max_ms": self.max * ms,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "histogram": {(f"<={b}ms" if i < len(BUCKETS_MS) else f">{BUCKETS_MS[-1]}ms"): n
+                          for i, (b, n) in enumerate(zip(BUCKETS_MS + (None,), self.buckets)) if n},
+        }
+
+
+class Registry:
+    """Acumulador de métricas (seguro entre hilos)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ops = {}
+        self._counters = {}
+        self._slow = deque(maxlen=SLOW_LOG_SIZE)
+
+    def record(self, name, seconds, error=False):
+        with self._lock:
+            op = self._ops.get(name)
+            if op is None:
+                op = self._ops[name] = _OpStats()
+            op.count += 1
+            op.errors += error
+            op.total += seconds
+            op.min = min(op.min, seconds)
+            op.max = max(op.max, seconds)
+            op.buckets[bisect_left(BUCKETS_MS, seconds * 1000)] += 1
+        ms = seconds * 1000
+        if ms >= SLOW_MS:
+            self._slow.append({"op": name, "ms": ms, "error": error,
+                               "at": time.strftime("%Y-%m-%dT%H:%M:%S")})
+            print(f"[SLOW] {name}: {ms:.1f} ms" + (" (error)" if error else ""))
+
+    def add(self, name, n=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "enabled": ENABLED,
+                "slow_ms": SLOW_MS,
+                "operations": {name: op.to_dict() for name, op in sorted(self._ops.items())},
+                "counters": dict(sorted(self._counters.items())),
+                "slow": list(self._slow),
+            }
+
+    def reset(self):
+        with self._lock:
+            self._ops.clear()
+            self._counters.clear()
+            self._slow.clear()
+
+
+registry = Registry()
+
+
+# ------------------------------
+# Puntos de medición
+# ------------------------------
+def timed(name):
+    """
+    Decorador: mide cada llamada como la operación 'name' (sin efecto si está
+    desactivado). name=None en un método usa "<clase de la instancia>.<método>".
+    """
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            label = name or f"{type(args[0]).__name__}.{fn.__name__}"
+            t0 = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException:
+                registry.record(label, time.perf_counter() - t0, error=True)
+                raise
+            registry.record(label, time.perf_counter() - t0)
+            return result
+        return wrapper
+    return decorate
+
+
+def instrument_methods(cls, prefix=None, names=None):
+    # Envuelve con timed() los métodos definidos en la propia clase: los públicos,
+    # o solo 'names' si se indica. Los heredados ya se envolvieron en su clase.
+    # Sin prefix se nombran por la clase de la instancia (métodos heredados incluidos).
+    if not ENABLED:
+        return cls
+    for attr, value in list(vars(cls).items()):
+        if not inspect.isfunction(value):
+            continue
+        if (attr not in names) if names is not None else attr.startswith("_"):
+            continue
+        setattr(cls, attr, timed(f"{prefix}.{attr}" if prefix else None)(value))
+    return cls
+
+
+def instrumented(prefix):
+    """Decorador de clase: mide todos sus métodos públicos como '<prefix>.<método>'."""
+    return lambda cls: instrument_methods(cls, prefix)
+
+
+def count(name, n=1):
+    """Suma n al contador 'name' (sin efecto si está desactivado)."""
+    if ENABLED:
+        registry.add(name, n)
+
+
+# ------------------------------
+# Consulta
+# ------------------------------
+def stats():
+    """Copia de las métricas actuales como dict."""
+    return registry.snapshot()
+
+
+def dump_json(path=None):
+    """Métricas como JSON; si se indica 'path', además se escriben en ese archivo."""
+    text = json.dumps(stats(), ensure_ascii=False, indent=2)
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+    return text
+
+
+if ENABLED and os.environ.get("RESERVAS_METRICS_FILE"):
+    atexit.register(dump_json, os.environ["RESERVAS_METRICS_FILE"])
@@ -0,0 +1,121 @@
+# Juan David Ocampo Gutierrez
+# Nicolás Castro Pacheco
+# Michell Valencia Berdugo
+# Juan David Rivera Durán
+
+"""
+interval_index.py
+-----------------
+
+Índice de ocupación por intervalos para detectar solapamientos.
+
+Cada (cancha, fecha) tiene sus intervalos [inicio, fin) en minutos,
+ordenados por inicio (listas paralelas de inicios, fines e ids: la
+búsqueda binaria compara enteros, no tuplas). Saber si un intervalo
+nuevo choca con alguno es un bisect del primero que empieza en o después
+de su fin, y un recorrido hacia atrás solo mientras un intervalo anterior
+todavía pudiera alcanzarlo: se guarda la duración máxima de cada lista
+para acotar ese recorrido. Como Manager no admite solapamientos,
+normalmente se revisa un único vecino: O(log n).
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+class _Bucket:
+    __slots__ = ("starts", "ends", "ids", "max_len")
+
+    def __init__(self):
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+        self.ids: List[str] = []
+        # Duración máxima de las entradas (cota del recorrido hacia atrás). No se
+        # reduce al quitar entradas: seguir usándola es correcto, solo más conservador.
+        self.max_len = 0
+
+
+class IntervalIndex:
+    def __init__(self, entries: Iterable[Tuple[Hashable, int, int, str]] = ()):
+        # clave (p. ej. (cancha, fecha)) -> intervalos de ese día y cancha.
+        self._buckets: Dict[Hashable, _Bucket] = {}
+        self._n = 0
+        # Construcción inicial desde (clave, inicio, fin, id): se agrupa por clave y
+        # cada lista se ordena una vez; después, solo inserciones con bisect.
+        grouped: Dict[Hashable, List[Tuple[int, int, str]]] = {}
+        for key, start, end, res_id in entries:
+            grouped.setdefault(key, []).append((start, end, res_id))
+        for key, items in grouped.items():
+            items.sort()
+            bucket = self._buckets[key] = _Bucket()
+            bucket.starts, bucket.ends, bucket.ids = (list(column) for column in zip(*items))
+            bucket.max_len = max(end - start for start, end, _ in items)
+            self._n += len(items)
+
+    def __len__(self) -> int:
+        return self._n
+
+    def add(self, key: Hashable, start: int, end: int, res_id: str) -> None:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket()
+        i = bisect_right(bucket.starts, start)
+        bucket.starts.insert(i, start)
+        bucket.ends.insert(i, end)
+        bucket.ids.insert(i, res_id)
+        if end - start > bucket.max_len:
+            bucket.max_len = end - start
+        self._n += 1
+
+    def remove(self, key: Hashable, start: int, end: int, res_id: str) -> None:
+        # Quita exactamente esa entrada (si está); un día sin intervalos se libera.
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return
+        starts = bucket.starts
+        i = bisect_left(starts, start)
+        while i < len(starts) and starts[i] == start:
+            if bucket.ids[i] == res_id and bucket.ends[i] == end:
+                del starts[i], bucket.ends[i], bucket.ids[i]
+                self._n -= 1
+                if not starts:
+                    del self._buckets[key]
+                return
+            i += 1
+
+    def overlapping(self, key: Hashable, start: int, end: int) -> List[str]:
+        """Ids de los intervalos que se solapan con [start, end) (los que solo se tocan, no)."""
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return []
+        starts, ends, ids = bucket.starts, bucket.ends, bucket.ids
+        # Candidatos: los que empiezan antes de 'end'. Hacia atrás, uno que empieza
+        # en o antes de start - max_len ya no puede llegar más allá de 'start'.
+        limit = start - bucket.max_len
+        found = []
+        j = bisect_left(starts, end) - 1
+        while j >= 0 and starts[j] > limit:
+            if ends[j] > start:
+                found.append(ids[j])
+            j -= 1
+        return found
+
+    def is_free(self, key: Hashable, start: int, end: int, exclude: Optional[str] = None) -> bool:
+        """True si ningún intervalo (salvo el de id 'exclude') se solapa con [start, end)."""
+        # Igual que overlapping, pero se detiene en el primer choque (sin crear listas).
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return True
+        starts, ends = bucket.starts, bucket.ends
+        limit = start - bucket.max_len
+        j = bisect_left(starts, end) - 1
+        while j >= 0 and starts[j] > limit:
+            if ends[j] > start and bucket.ids[j] != exclude:
+                return False
+            j -= 1
+        return True
+
+    def intervals(self, key: Hashable) -> List[Tuple[int, int, str]]:
+        # Intervalos (inicio, fin, id) de la clave, ordenados por inicio.
+        bucket = self._buckets.get(key)
+        return list(zip(bucket.starts, bucket.ends, bucket.ids)) if bucket is not None else []
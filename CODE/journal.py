@@ -0,0 +1,360 @@
+# Juan David Ocampo Gutierrez
+# Nicolás Castro Pacheco
+# Michell Valencia Berdugo
+# Juan David Rivera Durán
+
+"""
+journal.py
+----------
+
+Modo de persistencia con journal (log de solo-anexado).
+
+En lugar de reescribir reservas.json completo en cada cambio, cada
+mutación agrega una línea compacta al archivo "<archivo>.journal":
+
+    <crc32 en hex> {"op": "create"|"update"|"delete"|"client", ...}\\n
+
+- Los fsync se agrupan (group commit): cada escritura vuelve solo cuando
+  un fsync cubre su registro, y un mismo fsync cubre a todos los registros
+  anexados mientras corría el anterior.
+- Al iniciar se carga el último snapshot (reservas.json) y se reaplica
+  el journal encima.
+- Cuando el journal supera un umbral (el mayor entre COMPACT_THRESHOLD y
+  el tamaño del snapshot), se compacta en segundo plano:
+  se rota el log y un hilo escribe un snapshot nuevo.
+- Un registro final truncado o corrupto (caída a mitad de escritura) se
+  detecta por el CRC/salto de línea y se descarta durante la recuperación.
+  Un registro dañado con registros válidos detrás no es una escritura
+  interrumpida: la carga se detiene con un error y el archivo no se toca.
+- Varios procesos pueden compartir el journal: carga, anexado y
+  compactación corren bajo el StoreLock del almacén, y la compactación
+  solo descarta el log rotado si sigue siendo el mismo archivo que rotó.
+"""
+
+import json
+import os
+import threading
+import zlib
+from contextlib import nullcontext
+import instrumentation
+from persistence import Persistence, gc_paused
+from storage import locked, committing
+
+
+class JournalPersistence(Persistence):
+    # Cada cambio es una línea anexada al journal.
+    incremental_writes = True
+    # Umbral por defecto para compactar el journal (bytes).
+    COMPACT_THRESHOLD = 1024 * 1024
+
+    def __init__(self, filepath="reservas.json", compact_threshold=None, trusted=False):
+        super().__init__(filepath, trusted=trusted)
+        self.journal_path = filepath + ".journal"
+        # Journal rotado que está siendo compactado (o quedó tras una caída).
+        self.old_journal_path = self.journal_path + ".old"
+        self.compact_threshold = compact_threshold or self.COMPACT_THRESHOLD
+
+        # Un único lock protege el archivo abierto y el estado del group commit.
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._file = None
+        self._size = 0
+        # Tamaño del último snapshot: el umbral de compactación crece con él, así
+        # una importación masiva no reescribe el snapshot completo cada pocos MB.
+        self._snapshot_size = self._file_size(filepath)
+        self._compactor = None
+        # Group commit: cada anexado recibe un número de secuencia y su escritor
+        # espera a que un fsync lo cubra (_synced >= su número). _syncing indica
+        # que hay un fsync en curso (corre sin el lock).
+        self._appended = 0
+        self._synced = 0
+        self._syncing = False
+
+    # ------------------------------
+    # Recuperación
+    # ------------------------------
+    @locked
+    def load_reservations(self):
+        """Carga el snapshot y reaplica el journal (rotado y actual) encima."""
+        with self._lock:
+            # Otro proceso pudo rotar o borrar el journal: el próximo anexado lo reabre.
+            if self._file is not None:
+                self._sync_locked()
+                self._file.close()
+                self._file = None
+        state = {}
+        for i, item in enumerate(self._read_records()):
+            # Registros antiguos sin id se conservan con una clave sintética.
+            state[item.get("id") or f"_sin_id_{i}"] = item
+        clients = {c.get("documento"): c for c in self._read_client_records() if type(c) is dict}
+
+        recovered_old = os.path.exists(self.old_journal_path)
+        if recovered_old:
+            # Una compactación anterior no terminó: su log aún es necesario.
+            self._replay(self.old_journal_path, state, clients)
+        self._replay(self.journal_path, state, clients)
+
+        with gc_paused() if self.trusted else nullcontext():
+            reservations, migrated = self._build_reservations(clients.values(), state.values())
+        if recovered_old or (migrated and self.auto_migrate):
+            # Consolida de inmediato para no arrastrar dos logs (o un formato plano antiguo).
+            self._migrate(reservations)
+        return reservations
+
+    def _replay(self, path, state, clients):
+        # Aplica cada registro válido sobre 'state'. Reaplicar un sufijo ya
+        # incluido en el snapshot es inocuo: cada op fija o borra una clave.
+        if not os.path.exists(path):
+            return
+        with open(path, "rb") as f:
+            raw = f.read()
+
+        offset = 0
+        while offset < len(raw):
+            nl = raw.find(b"\n", offset)
+            # Registro final sin salto de línea: escritura interrumpida.
+            entry = self._decode(raw[offset:nl]) if nl != -1 else None
+            if entry is None:
+                break
+            self._apply(entry, state, clients)
+            offset = nl + 1
+
+        if offset < len(raw):
+            if nl != -1 and nl + 1 < len(raw):
+                # Hay registros después del dañado: no es una escritura interrumpida
+                # sino corrupción. No se descarta nada; se detiene la carga.
+                raise ValueError(f"Journal {path} dañado en el byte {offset} (hay registros "
+                                 f"posteriores). Revíselo o restáurelo antes de continuar.")
+            # Se descarta el último registro, incompleto, para que los nuevos no queden detrás.
+            print(f"[WARN] Journal {path}: se descartaron {len(raw) - offset} bytes dañados al final.")
+            with open(path, "r+b") as f:
+                f.truncate(offset)
+
+    @staticmethod
+    def _decode(line):
+        # Devuelve el dict del registro o None si el CRC o el JSON no cuadran.
+        try:
+            crc_hex, payload = line.split(b" ", 1)
+            if int(crc_hex, 16) != zlib.crc32(payload):
+                return None
+            return json.loads(payload.decode("utf-8"))
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _apply(entry, state, clients):
+        op = entry.get("op")
+        if op in ("create", "update"):
+            data = entry["r"]
+            state[data["id"]] = data
+        elif op == "delete":
+            state.pop(entry["id"], None)
+        elif op == "client":
+            data = entry["c"]
+            clients[data["documento"]] = data
+
+    # ------------------------------
+    # Escritura de registros
+    # ------------------------------
+    @committing
+    def insert_reservation(self, reservation, reservations):
+        self._append([{"op": "create", "r": reservation.to_record()}], reservations)
+
+    @committing
+    def update_reservation(self, reservation, reservations):
+        self._append([{"op": "update", "r": reservation.to_record()}], reservations)
+
+    @committing
+    def delete_reservation(self, res_id, reservations):
+        self._append([{"op": "delete", "id": res_id}], reservations)
+
+    @committing
+    def apply_changes(self, changes, reservations):
+        # Todo el lote va en un solo write y lo cubre un mismo fsync.
+        self._append([self._entry(op, data) for op, data in changes], reservations)
+
+    @committing
+    def save_client(self, client, reservations):
+        self._append([self._entry("client", client)], reservations)
+
+    @staticmethod
+    def _entry(op, data):
+        if op == "delete":
+            return {"op": op, "id": data}
+        if op == "client":
+            return {"op": op, "c": data.to_dict()}
+        return {"op": op, "r": data.to_record()}
+
+    @staticmethod
+    def _encode(entry):
+        payload = json.dumps(entry, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return b"%08x " % zlib.crc32(payload) + payload + b"\n"
+
+    def _append(self, entries, reservations):
+        # Vuelve cuando el registro está en disco (fsync), no solo en el SO.
+        chunk = b"".join(self._encode(e) for e in entries)
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.journal_path, "ab")
+                self._size = self._file.tell()
+            start = self._size
+            try:
+                self._file.write(chunk)
+                self._file.flush()
+            except OSError:
+                self._discard_tail(start)
+                raise
+            self._size += len(chunk)
+            instrumentation.count("storage.bytes_written", len(chunk))
+            self._appended += 1
+            seq = self._appended
+            # Si un ".old" previo no pudo compactarse, no se rota encima de él.
+            needs_compaction = (self._size >= max(self.compact_threshold, self._snapshot_size)
+                                and self._compactor is None
+                                and not os.path.exists(self.old_journal_path))
+            if needs_compaction:
+                rotated = self._rotate()
+                # Los dicts se toman aquí (sin E/S); el volcado a disco va en segundo plano.
+                data = [r.to_record() for r in reservations]
+                clients = self.clients.to_records()
+                self._compactor = threading.Thread(target=self._compact, args=(clients, data, rotated),
+                                                   name="journal-compact", daemon=True)
+                self._compactor.start()
+            # La rotación ya sincronizó; si no, se espera el fsync que cubra a 'seq'.
+            if self._synced < seq:
+                try:
+                    self._sync_locked()
+                except OSError:
+                    # Bajo el bloqueo del almacén este lote es lo último del journal.
+                    self._discard_tail(start)
+                    raise
+
+    def _discard_tail(self, size):
+        # Requiere self._lock. Quita del journal lo anexado desde 'size' tras una
+        # escritura o fsync fallidos: el cambio no se confirma (Manager lo deshace) y
+        # los registros siguientes no deben quedar detrás de uno a medias.
+        f, self._file = self._file, None
+        try:
+            f.close()
+        except OSError:
+            pass
+        os.truncate(self.journal_path, size)
+        self._size = size
+        self._synced = self._appended
+
+    def _sync_locked(self):
+        # Requiere self._lock. Vuelve cuando todo lo anexado hasta ahora está en disco.
+        # El fsync corre sin el lock: lo que otros hilos anexen mientras tanto lo cubre
+        # el siguiente, y quien llega con un fsync en curso lo espera en vez de repetirlo.
+        target = self._appended
+        while self._synced < target:
+            if self._syncing:
+                self._cond.wait()
+                continue
+            if self._file is None:
+                # Sin archivo abierto no queda nada por sincronizar (ver _rotate/load).
+                self._synced = self._appended
+                break
+            self._syncing = True
+            covered = self._appended
+            fd = self._file.fileno()
+            self._lock.release()
+            try:
+                os.fsync(fd)
+            finally:
+                self._lock.acquire()
+                self._syncing = False
+                self._cond.notify_all()
+            self._synced = max(self._synced, covered)
+
+    # ------------------------------
+    # Compactación
+    # ------------------------------
+    def _rotate(self):
+        # Requiere self._lock. Cierra el journal actual y lo aparta como ".old";
+        # los registros nuevos van a un journal vacío.
+        self._sync_locked()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._size = 0
+        if not os.path.exists(self.journal_path):
+            return None
+        os.replace(self.journal_path, self.old_journal_path)
+        return self._file_signature(self.old_journal_path)
+
+    @staticmethod
+    def _file_size(path):
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    @staticmethod
+    def _file_signature(path):
+        # Identifica un archivo concreto (no solo su nombre).
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def _compact(self, clients, data, rotated):
+        # Bajo el bloqueo del almacén: si entretanto alguien consolidó (el ".old"
+        # ya no es el que se rotó aquí), este snapshot estaría desactualizado.
+        try:
+            with self.store_lock:
+                if rotated is not None and self._file_signature(self.old_journal_path) == rotated:
+                    # El snapshot se escribe con fsync antes de descartar el log rotado.
+                    self._write_json(self.clients_path, clients, fsync=True)
+                    self._write_snapshot(data, fsync=True)
+                    os.remove(self.old_journal_path)
+                    self._snapshot_size = self._file_size(self.filepath)
+        except OSError as e:
+            # El log rotado se conserva: la próxima carga lo reaplica y consolida.
+            print(f"[ERROR] Compactación del journal fallida: {e}")
+        finally:
+            with self._lock:
+                self._compactor = None
+
+    def _wait_compaction(self):
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+
+    # ------------------------------
+    # Snapshot completo / cierre
+    # ------------------------------
+    @committing
+    def save_reservations(self, reservations):
+        """Escribe un snapshot completo y vacía el journal."""
+        data = [r.to_record() for r in reservations]
+        with self._lock:
+            # Si falla, el error se propaga y los logs quedan intactos.
+            self._sync_locked()
+            self._write_clients(fsync=True)
+            self._write_snapshot(data, fsync=True)
+            # El snapshot ya contiene todo: ambos logs sobran.
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            for path in (self.journal_path, self.old_journal_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._size = 0
+            self._snapshot_size = self._file_size(self.filepath)
+
+    def flush(self):
+        """Fuerza el fsync de los registros pendientes."""
+        with self._lock:
+            self._sync_locked()
+
+    def close(self):
+        """Sincroniza lo pendiente y cierra el journal."""
+        self._wait_compaction()
+        with self._lock:
+            self._sync_locked()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        super().close()
@@ -10,13 +10,17 @@ main.py
 
 Punto de entrada principal del sistema de reservas de canchas.
 Inicia la interfaz gráfica DesignApp y carga los datos persistidos.
+
+tkinter, tkcalendar y la interfaz se importan dentro de main(): importar
+este módulo (o cli.py / server.py) no carga nada de la GUI.
 """
 
-import tkinter as tk
-from design import DesignApp
 
 def main():
     """Inicializa la aplicación de reservas."""
+    import tkinter as tk
+    from design import DesignApp
+
     root = tk.Tk()
     app = DesignApp(root)
     root.mainloop()
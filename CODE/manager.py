@@ -4,100 +4,903 @@
 # Juan David Rivera Durán
 
 
-from datetime import datetime, date
-from typing import List, Dict, Optional
+import os
+import threading
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, date, timedelta
+from functools import lru_cache, wraps
+from itertools import islice
+from typing import Callable, List, Dict, Optional, Tuple
+import instrumentation
 from client import Client
 from court import Court
-from reservation import Reservation
+from events import EventBus, ChangeEvent, CREATED, UPDATED, CANCELLED, RELOADED
+from reservation import Reservation, hora_to_minutes, minutes_to_hora
+from storage import Storage, verify_reservations
+from sorted_index import SortedIndex
+from interval_index import IntervalIndex
+from court_allocator import CourtAllocator
+from analytics import Rollups
+from slot_ledger import SlotLedger
+from pricing import DIAS, PricingConfig
+from write_behind import WriteBehindWorker
 from persistence import Persistence
 
+
+@lru_cache(maxsize=4096)
+def _parse_fecha(fecha: str) -> date:
+    # strptime es caro y en un lote (importación) las fechas se repiten por
+    # cada cancha y hora: se memoriza el resultado por cadena.
+    return datetime.strptime(fecha, "%Y-%m-%d").date()
+
+
+def _transactional(method):
+    # Ejecuta una operación de escritura dentro de Manager._transaction().
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._transaction():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+# Con RESERVAS_METRICS=1 cada método público se mide como "Manager.<método>".
+@instrumentation.instrumented("Manager")
 class Manager:
-    def __init__(self):
-        # Persistence maneja el archivo JSON de reservas.
-        self.persistence = Persistence("reservas.json")
-        # Inicializa las canchas disponibles (puede extenderse fácilmente).
-        self.courts = self._load_courts()
-        # Carga las reservas persistidas (lista de objetos Reservation).
-        self.reservations: List[Reservation] = self.persistence.load_reservations()
+    # Horario reservable: de HORA_INICIO a HORA_FIN (inclusive) en bloques de una hora,
+    # es decir, de 10:00 a 22:00. Las tablas de disponibilidad usan estas horas.
+    HORA_INICIO = 10
+    HORA_FIN = 21
+    HORAS = [f"{h}:00" for h in range(HORA_INICIO, HORA_FIN + 1)]
+    # Las reservas son intervalos [hora, hora_fin) de cualquier duración múltiplo de
+    # GRANULARIDAD_MIN minutos, alineados a ese paso (p. ej. 10:30 - 12:00).
+    GRANULARIDAD_MIN = 30
+    HORAS_INICIO = [minutes_to_hora(m) for m in range(HORA_INICIO * 60, (HORA_FIN + 1) * 60, GRANULARIDAD_MIN)]
+    # Canchas físicas: (tipo, precio por hora, cantidad). Dentro de un tipo cada cancha
+    # se identifica por su número (1..cantidad); el cliente reserva un tipo y, si no
+    # indica número, se le asigna una cancha libre. Se usan si no existe el archivo de
+    # configuración de canchas y tarifas (ver pricing.py).
+    CANCHAS = (("Sintética", 5.0, 6), ("Vóley", 7.5, 1))
+    # Cancha que se asigna entre las libres: "primera" o "compacta" (ver court_allocator.py).
+    ASIGNACION = "compacta"
+    # Búsqueda de horarios libres: días que se recorren si no se indica la fecha final,
+    # y máximo de días por búsqueda.
+    BUSQUEDA_DIAS = 30
+    BUSQUEDA_MAX_DIAS = 366
+    # Motivos de cambios diferidos descartados que se recuerdan para take_dropped().
+    DESCARTES_MAX = 1000
+
+    # Columnas por las que se puede paginar ordenado (clave de orden de cada una).
+    SORT_KEYS = {
+        "nombre": lambda r: (r.client.nombre.casefold(),),
+        "email": lambda r: (r.client.email.casefold(),),
+        "fecha": lambda r: (r.fecha, hora_to_minutes(r.hora)),
+        "hora": lambda r: (hora_to_minutes(r.hora), r.fecha),
+        "cancha": lambda r: (r.court.tipo, r.court.numero, r.fecha, hora_to_minutes(r.hora)),
+        "precio": lambda r: (r.precio,),
+    }
+    # Columnas que dependen de los datos del cliente (cambian con update_client).
+    CLIENT_SORT_KEYS = ("nombre", "email")
+    # Archivo del almacén de cada modo (RESERVAS_STORAGE).
+    STORE_PATHS = {"json": "reservas.json", "journal": "reservas.json", "sqlite": "reservas.db",
+                   "partitioned": "reservas.json"}
+
+    def __init__(self, persistence: Optional[Storage] = None, write_behind: Optional[bool] = None,
+                 on_error: Optional[Callable[[Exception], None]] = None, config_path: Optional[str] = None,
+                 slot_ledger: Optional[bool] = None):
+        # El backend de almacenamiento maneja las reservas persistidas. Si no se inyecta
+        # uno, se elige según RESERVAS_STORAGE ("json" por defecto, "journal", "sqlite"
+        # o "partitioned");
+        # RESERVAS_TRUSTED_LOAD=1 activa la carga confiable (sin revalidar clientes).
+        self.persistence = persistence or self._create_persistence(
+            os.environ.get("RESERVAS_STORAGE", "json"),
+            trusted=os.environ.get("RESERVAS_TRUSTED_LOAD") == "1")
+        # Canchas y tarifas desde el archivo de configuración (RESERVAS_CONFIG,
+        # "canchas.json" por defecto); se recarga en caliente con refresh().
+        self._config = PricingConfig(config_path or os.environ.get("RESERVAS_CONFIG", "canchas.json"),
+                                     self.CANCHAS, self.GRANULARIDAD_MIN)
+        self._load_courts()
+        # Registro de clientes normalizado (documento -> Client), lo llena el backend al cargar.
+        self.clients = self.persistence.clients
+        # Las escrituras se serializan con este lock (entre hilos) y el del almacén
+        # (entre procesos); las lecturas no toman ninguno.
+        self._write_lock = threading.RLock()
+        # Un volcado diferido a la vez. Mientras escribe (_flushing) retiene el lock del
+        # almacén pero no el de escritura: las mutaciones siguen encolándose sin esperar
+        # la E/S (el almacén ya se sincronizó al empezar y nadie más puede escribirlo).
+        self._flush_lock = threading.Lock()
+        self._flushing = False
+        # Cambios ya aplicados en memoria y aún no escritos (modo write-behind o bulk()).
+        self._pending: List[Tuple[str, object]] = []
+        self._bulk_depth = 0
+        # Cambios diferidos descartados al reaplicarlos (id de reserva -> motivo), para
+        # que quien esperaba su escritura sepa que no se guardó (ver take_dropped).
+        self._dropped: Dict[str, str] = {}
+        # Hilo write-behind (se crea tras la carga inicial).
+        self._writer: Optional[WriteBehindWorker] = None
+        # Eventos de cambio para las vistas (ver events.py): cada mutación publica
+        # sus deltas a los suscriptores de manager.events.
+        self.events = EventBus()
+        # Agregados de ocupación e ingresos (ver analytics.py): se construyen con el
+        # primer reporte y desde entonces se mantienen con cada cambio.
+        self._rollups: Optional[Rollups] = None
+        # Libro de slots mapeado en memoria para lectores livianos (ver slot_ledger.py):
+        # con slot_ledger=True o RESERVAS_LEDGER=1, si el almacén es un archivo.
+        if slot_ledger is None:
+            slot_ledger = os.environ.get("RESERVAS_LEDGER") == "1"
+        filepath = getattr(self.persistence, "filepath", None)
+        self._ledger = SlotLedger(filepath + ".slots", self.GRANULARIDAD_MIN, writable=True) \
+            if slot_ledger and filepath else None
+        # Carga las reservas persistidas y construye los índices.
+        with self._write_lock, self.persistence.lock():
+            self._load_state()
+        # write_behind=True (o RESERVAS_WRITE_BEHIND=1): las mutaciones vuelven sin
+        # escribir y un hilo agrupa las ráfagas en una sola escritura. on_error recibe
+        # (desde ese hilo) los errores de persistencia.
+        if write_behind is None:
+            write_behind = os.environ.get("RESERVAS_WRITE_BEHIND") == "1"
+        self._writer = WriteBehindWorker(self._flush_pending, on_error) if write_behind else None
+
+    def _load_state(self) -> None:
+        # Carga desde el backend y arma índices nuevos; se publican al final, de modo
+        # que una lectura concurrente ve el estado anterior o el nuevo, nunca uno a medias.
+        # Requiere el lock de escritura y el del almacén.
+        # Mapa id -> Reservation. Es el almacén principal: un dict conserva el
+        # orden de inserción, así que también hace de "lista" ordenada.
+        by_id: Dict[str, Reservation] = {}
+        # Índice documento -> {id: Reservation} ("todas las reservas de un cliente").
+        by_doc: Dict[str, Dict[str, Reservation]] = {}
+        # Índice tipo de cancha -> {id: Reservation}.
+        by_court: Dict[str, Dict[str, Reservation]] = {}
+        for r in self.persistence.load_reservations():
+            by_id[r.id] = r
+            by_doc.setdefault(r.client.documento, {})[r.id] = r
+            by_court.setdefault(r.court.tipo, {})[r.id] = r
+        # Índice de ocupación: intervalos [hora, hora_fin) por (tipo, número, fecha).
+        intervals = IntervalIndex(self._interval(r) + (r.id,) for r in by_id.values())
+        # Bloques ocupados por cancha de cada (tipo, fecha), para asignar canchas libres.
+        allocator = CourtAllocator(self.GRANULARIDAD_MIN, (
+            ((r.court.tipo, r.fecha), r.court.numero, hora_to_minutes(r.hora), hora_to_minutes(r.hora_fin))
+            for r in by_id.values()))
+        # Índices ordenados por columna (el resto se construye la primera vez que se
+        # pide). El de (fecha, hora) sirve a las consultas por rango: siempre presente,
+        # se arma con un solo sort y luego se mantiene con bisect.
+        sorted_indexes = {"fecha": SortedIndex(self.SORT_KEYS["fecha"], by_id.values())}
+        # Índice email (sin distinguir mayúsculas) -> documentos de los clientes con ese email.
+        docs_by_email: Dict[str, set] = {}
+        for c in self.clients:
+            docs_by_email.setdefault(c.email.casefold(), set()).add(c.documento)
+        # Agregados para reportes: solo si ya se usaban (si no, se arman al pedirlos).
+        rollups = Rollups.from_reservations(by_id.values()) if self._rollups is not None else None
+
+        self._by_id, self._intervals, self._by_doc, self._by_court = by_id, intervals, by_doc, by_court
+        self._allocator, self._rollups = allocator, rollups
+        self._sorted, self._docs_by_email = sorted_indexes, docs_by_email
+        # Versión del almacén que refleja la memoria (concurrencia optimista).
+        self._version = self.persistence.version()
+        self._sync_ledger(lambda ledger: ledger.rebuild(self._court_keys(), by_id.values(), self._version))
+
+    # ------------------------------
+    # Concurrencia
+    # ------------------------------
+    @contextmanager
+    def _transaction(self):
+        # Sección de escritura: exclusiva entre hilos y entre procesos. Si otro
+        # proceso confirmó cambios desde la última carga, se recarga antes de
+        # validar, así la operación se decide sobre el estado vigente.
+        with self._write_lock:
+            if self._flushing and self._defers_writes():
+                yield
+                return
+            with self.persistence.lock():
+                self._sync_with_store()
+                yield
+
+    def _defers_writes(self) -> bool:
+        # Las mutaciones solo se encolan (write-behind o dentro de bulk()).
+        return self._writer is not None or self._bulk_depth > 0
+
+    def _sync_with_store(self) -> None:
+        # Requiere ambos locks. Si otro proceso escribió, recarga y reaplica encima
+        # los cambios propios aún pendientes de escritura.
+        if self.persistence.version() != self._version:
+            self._load_state()
+            if self._pending:
+                self._replay_pending()
+            self._publish_reload()
+
+    def _replay_pending(self) -> None:
+        # Reaplica sobre el estado recién cargado los cambios diferidos. Los que ya
+        # no caben (slot tomado o reserva cancelada en otro puesto) se descartan y
+        # se informan por el canal de errores.
+        pending, self._pending = self._pending, []
+        for op, data in pending:
+            try:
+                if op == "client":
+                    self._commit_client(data, self._pending)
+                elif op == "create":
+                    self._relocate(data)
+                    data.client = self._commit_client(data.client, self._pending)
+                    self._index_add(data)
+                    self._pending.append(("create", data))
+                elif op == "update":
+                    r = self._by_id.get(data.id)
+                    if r is None:
+                        raise ValueError(f"la reserva {data.id} fue cancelada.")
+                    self._relocate(data, exclude_id=data.id)
+                    client = self._commit_client(data.client, self._pending)
+                    self._set_fields(r, (client, data.court, data.fecha, data.hora, data.hora_fin, data.precio))
+                    self._pending.append(("update", r))
+                else:
+                    r = self._by_id.get(data)
+                    if r is not None:
+                        self._index_remove(r)
+                        self._pending.append(("delete", data))
+            except ValueError as e:
+                error = ValueError(f"Cambio descartado por conflicto con otro puesto: {e}")
+                if op != "client":
+                    self._dropped[data if op == "delete" else data.id] = str(error)
+                    if len(self._dropped) > self.DESCARTES_MAX:
+                        self._dropped.pop(next(iter(self._dropped)), None)
+                self._report(error)
+
+    def _relocate(self, r: Reservation, exclude_id: Optional[str] = None) -> None:
+        # Para reaplicar un cambio diferido: si otro puesto tomó su cancha, pasa a otra
+        # libre del mismo tipo. ValueError si no queda ninguna.
+        if self._is_free(r, exclude_id):
+            return
+        _, start, end = self._interval(r)
+        court = self._pick_court(r.court.tipo, r.fecha, start, end,
+                                 self._free_courts(r.court.tipo, r.fecha, start, end, exclude_id))
+        if court is None:
+            raise ValueError(f"el horario {r.fecha} {r.hora}-{r.hora_fin} ({r.court.tipo}) ya fue reservado.")
+        r.court = court
+
+    def _flush_pending(self) -> None:
+        # Vuelca los cambios diferidos con UNA escritura (lo llama el hilo write-behind).
+        # Los cambios se toman bajo el lock de escritura y la E/S corre sin él, solo con
+        # el del almacén, así la UI no espera al disco para seguir operando.
+        with self._flush_lock, ExitStack() as store:
+            with self._write_lock:
+                store.enter_context(self.persistence.lock())
+                self._sync_with_store()
+                if not self._pending:
+                    return
+                changes, self._pending = self._pending, []
+                # Copias de lo que se escribe: la UI puede editar esas reservas mientras tanto.
+                written = [(op, self._copy(data)) if op in ("create", "update") else (op, data)
+                           for op, data in changes]
+                reservations = list(self._by_id.values())
+                self._flushing = True
+            try:
+                self._write(written, reservations)
+            except Exception:
+                with self._write_lock:
+                    # Siguen pendientes (en memoria ya están aplicados): se reintenta.
+                    self._pending = changes + self._pending
+                    self._flushing = False
+                raise
+            with self._write_lock:
+                self._flushing = False
+
+    @staticmethod
+    def _copy(r: Reservation) -> Reservation:
+        return Reservation(r.client, r.court, r.fecha, r.hora, r.id, r.hora_fin, r.precio)
+
+    def _report(self, error: Exception) -> None:
+        if self._writer is not None:
+            self._writer.report(error)
+        else:
+            print(f"[WARN] {error}")
+
+    def flush(self) -> None:
+        """Escribe de inmediato los cambios diferidos (write-behind o bulk())."""
+        self._flush_pending()
+
+    def take_dropped(self, res_id: str) -> Optional[str]:
+        """
+        Motivo por el que se descartó un cambio diferido sobre la reserva (conflicto
+        con otro puesto al reaplicarlo), o None. Tras un flush() que cubre el cambio,
+        dice si de verdad se guardó. El motivo se entrega una sola vez.
+        """
+        # Sin lock (como las lecturas): pop es atómico y no bloquea tras un volcado.
+        return self._dropped.pop(res_id, None)
+
+    @contextmanager
+    def bulk(self):
+        """
+        Agrupa las escrituras de muchas operaciones (p. ej. una importación):
+        dentro del bloque los cambios solo se encolan y se escriben juntos al
+        salir, o antes con flush().
+        """
+        with self._write_lock:
+            self._bulk_depth += 1
+        try:
+            yield self
+        finally:
+            with self._write_lock:
+                self._bulk_depth -= 1
+                outermost = self._bulk_depth == 0
+            if outermost and self._writer is None:
+                self._flush_pending()
+
+    def refresh(self) -> bool:
+        """
+        Recarga si otro proceso escribió desde la última carga. True si recargó.
+        También aplica los cambios del archivo de canchas y tarifas (reload_config).
+        """
+        self.reload_config()
+        # Comparación barata sin bloqueo; solo si difiere se toma el bloqueo.
+        if self.persistence.version() == self._version:
+            return False
+        with self._write_lock:
+            if self._flushing:
+                # La diferencia es el volcado propio en curso, que actualiza la versión.
+                return False
+            with self.persistence.lock():
+                if self.persistence.version() == self._version:
+                    return False
+                self._sync_with_store()
+                return True
+
+    @property
+    def reservations(self) -> List[Reservation]:
+        # Vista en forma de lista (orden de inserción) derivada del mapa por id,
+        # de modo que nunca puede desincronizarse de los índices.
+        return list(self._by_id.values())
+
+    @staticmethod
+    def _create_persistence(mode: str, trusted: bool = False) -> Storage:
+        # Fábrica simple de modos de almacenamiento.
+        # Los backends alternativos se importan solo al elegirlos (arranque más corto).
+        path = Manager.STORE_PATHS.get(mode)
+        if path is None:
+            raise ValueError(f"Modo de almacenamiento desconocido: {mode}")
+        if mode == "journal":
+            from journal import JournalPersistence
+            return JournalPersistence(path, trusted=trusted)
+        if mode == "sqlite":
+            from sqlite_storage import SQLitePersistence
+            return SQLitePersistence(path, trusted=trusted)
+        if mode == "partitioned":
+            from partitioned import PartitionedPersistence
+            return PartitionedPersistence(path, trusted=trusted)
+        return Persistence(path, trusted=trusted)
 
     # ------------------------------
     # Carga inicial de canchas
     # ------------------------------
-    def _load_courts(self):
-        # Devuelve lista de Court predefinidas.
-        return [Court("Sintética", 5.0), Court("Vóley", 7.5)]
+    def _load_courts(self) -> None:
+        # Canchas de la tabla de tarifas vigente: una Court por cancha física y el
+        # índice tipo -> canchas de ese tipo (la posición i es la cancha número i+1).
+        # Se publican juntas: una lectura concurrente ve la configuración anterior o la nueva.
+        pricing = self._config.table
+        courts = [Court.canonical(tipo, numero, precio)
+                  for tipo, precio, cantidad in pricing.courts for numero in range(1, cantidad + 1)]
+        by_type: Dict[str, List[Court]] = {}
+        for c in courts:
+            by_type.setdefault(c.tipo, []).append(c)
+        self.courts, self._courts_by_type, self.pricing = courts, by_type, pricing
+
+    def reload_config(self) -> bool:
+        """
+        Vuelve a leer el archivo de canchas y tarifas si cambió. True si se aplicó;
+        si el archivo nuevo es inválido se informa y sigue la configuración anterior.
+        Las reservas existentes conservan su precio.
+        """
+        # refresh() la llama en cada sondeo de la UI: sin cambios no se toma el lock
+        # (que un volcado en curso puede estar reteniendo).
+        if not self._config.changed():
+            return False
+        with self._write_lock:
+            try:
+                if not self._config.reload():
+                    return False
+            except ValueError as e:
+                self._report(ValueError(f"Configuración de canchas no aplicada: {e}"))
+                return False
+            self._load_courts()
+            return True
 
     def get_court_types(self):
-        # Útil para poblar UIs: lista de nombres de canchas.
-        return [c.tipo for c in self.courts]
+        # Útil para poblar UIs: lista de tipos de cancha.
+        return list(self._courts_by_type)
+
+    def get_court_count(self, tipo: str) -> int:
+        # Cantidad de canchas físicas del tipo (0 si no existe).
+        return len(self._courts_by_type.get(tipo, ()))
 
     def get_price_for_court(self, tipo: str) -> float:
-        # Busca la cancha por tipo y retorna su precio, o 0.0 si no existe.
-        c = next((x for x in self.courts if x.tipo == tipo), None)
-        return c.precio_por_hora if c else 0.0
+        # Tarifa base por hora del tipo (sin reglas), o 0.0 si no existe.
+        return self.pricing.base_rate(tipo)
+
+    def get_price(self, cancha: str, fecha: str, hora: str, hora_fin: Optional[str] = None,
+                  documento: Optional[str] = None) -> float:
+        """Precio de reservar [hora, hora_fin) en la fecha según las tarifas vigentes (socio si documento lo es)."""
+        self._court(cancha)
+        self.__validate_fecha_not_past(fecha, allow_past=True)
+        hora, hora_fin = self.__validate_interval(hora, hora_fin)
+        return self.pricing.price(cancha, fecha, hora_to_minutes(hora), hora_to_minutes(hora_fin), documento)
+
+    def _court(self, tipo: str, numero: Optional[int] = None) -> Court:
+        # Cancha número 'numero' del tipo (la 1 si no se indica). ValueError si no existe.
+        courts = self._courts_by_type.get(tipo)
+        if not courts:
+            raise ValueError("Cancha no válida.")
+        if numero is None:
+            return courts[0]
+        if type(numero) is not int or not 1 <= numero <= len(courts):
+            raise ValueError(f"Número de cancha no válido. {tipo}: 1 - {len(courts)}")
+        return courts[numero - 1]
+
+    # ------------------------------
+    # Índices internos
+    # ------------------------------
+    @staticmethod
+    def _interval(r: Reservation) -> Tuple[Tuple[str, int, str], int, int]:
+        # Entrada de ocupación de una reserva: ((tipo, número, fecha), inicio, fin) en minutos.
+        return (r.court.tipo, r.court.numero, r.fecha), hora_to_minutes(r.hora), hora_to_minutes(r.hora_fin)
+
+    def _is_free(self, r: Reservation, exclude_id: Optional[str] = None) -> bool:
+        # True si el intervalo de r no se solapa con otra reserva (salvo exclude_id).
+        return self._intervals.is_free(*self._interval(r), exclude_id)
+
+    def _index_add(self, r: Reservation) -> None:
+        # Registra la reserva en todos los índices.
+        self._by_id[r.id] = r
+        self._occupy_slot(r)
+        self._bucket_add(r)
+        for index in self._sorted.values():
+            index.add(r)
+        if self._rollups is not None:
+            self._rollups.add(r)
+
+    def _index_remove(self, r: Reservation) -> None:
+        # Quita la reserva de todos los índices (de ocupación, solo su propio intervalo:
+        # datos antiguos podrían tener duplicados).
+        self._by_id.pop(r.id, None)
+        self._release_slot(r)
+        self._bucket_remove(r)
+        for index in self._sorted.values():
+            index.remove(r.id)
+        if self._rollups is not None:
+            self._rollups.remove(r)
+
+    def _index_add_many(self, rs: List[Reservation]) -> None:
+        # Como _index_add para muchas reservas: los índices ordenados se fusionan una vez.
+        for r in rs:
+            self._by_id[r.id] = r
+            self._occupy_slot(r)
+            self._bucket_add(r)
+        for index in self._sorted.values():
+            index.add_many(rs)
+        if self._rollups is not None:
+            for r in rs:
+                self._rollups.add(r)
+
+    def _bucket_add(self, r: Reservation) -> None:
+        # Índices hash documento -> reservas y cancha -> reservas.
+        self._by_doc.setdefault(r.client.documento, {})[r.id] = r
+        self._by_court.setdefault(r.court.tipo, {})[r.id] = r
+
+    def _bucket_remove(self, r: Reservation) -> None:
+        for buckets, key in ((self._by_doc, r.client.documento), (self._by_court, r.court.tipo)):
+            bucket = buckets.get(key)
+            if bucket is not None:
+                bucket.pop(r.id, None)
+                if not bucket:
+                    del buckets[key]
+
+    def _sort_index(self, sort_by: str) -> SortedIndex:
+        # Índice ordenado de una columna; se arma una vez y luego se mantiene con bisect.
+        index = self._sorted.get(sort_by)
+        if index is None:
+            key = self.SORT_KEYS.get(sort_by)
+            if key is None:
+                raise ValueError(f"Columna de orden no válida: {sort_by}")
+            index = self._sorted[sort_by] = SortedIndex(key, self._by_id.values())
+        return index
+
+    def _upsert_client(self, client: Client) -> Tuple[Client, bool]:
+        # Alta/actualización en el registro manteniendo los índices que dependen
+        # de los datos del cliente (email y orden por nombre/email).
+        current = self.clients.get(client.documento)
+        old_email = current.email.casefold() if current is not None else None
+        canonical, changed = self.clients.upsert(client)
+        if changed:
+            new_email = canonical.email.casefold()
+            if old_email != new_email:
+                if old_email is not None:
+                    docs = self._docs_by_email.get(old_email)
+                    if docs is not None:
+                        docs.discard(canonical.documento)
+                        if not docs:
+                            del self._docs_by_email[old_email]
+                self._docs_by_email.setdefault(new_email, set()).add(canonical.documento)
+            self._resort_client(canonical.documento)
+        return canonical, changed
+
+    def _resort_client(self, documento: str) -> None:
+        # Los datos del cliente cambiaron en el registro: reubica sus reservas
+        # en los índices ordenados por nombre/email.
+        for sort_by in self.CLIENT_SORT_KEYS:
+            index = self._sorted.get(sort_by)
+            if index is not None:
+                for r in self._by_doc.get(documento, {}).values():
+                    index.update(r)
+
+    # ------------------------------
+    # Clientes y persistencia de cambios
+    # ------------------------------
+    def _commit_client(self, client: Client, changes: List[Tuple[str, object]]) -> Client:
+        # Registra/actualiza el cliente en el registro normalizado y devuelve la
+        # instancia canónica. Si sus datos cambiaron, agrega un cambio "client" al lote.
+        canonical, changed = self._upsert_client(client)
+        if changed:
+            changes.append(("client", canonical))
+        return canonical
+
+    def _persist(self, changes: List[Tuple[str, object]]) -> None:
+        # Se llama dentro de _transaction(). En modo write-behind (o dentro de bulk())
+        # solo se encolan los cambios: se agrupan y se vuelcan después.
+        if self._writer is not None or self._bulk_depth:
+            self._pending.extend(changes)
+            if self._writer is not None:
+                self._writer.mark_dirty()
+            return
+        self._write(changes)
+
+    def _write(self, changes: List[Tuple[str, object]], reservations=None) -> None:
+        # Un único cambio usa la operación por registro del backend; varios, un lote.
+        # Tras escribir, la memoria queda al día con la nueva versión del almacén.
+        # 'reservations': estado que acompaña a los cambios (por defecto, el vigente).
+        if reservations is None:
+            reservations = self._by_id.values()
+        if len(changes) == 1:
+            op, data = changes[0]
+            if op == "create":
+                self.persistence.insert_reservation(data, reservations)
+            elif op == "update":
+                self.persistence.update_reservation(data, reservations)
+            elif op == "delete":
+                self.persistence.delete_reservation(data, reservations)
+            else:
+                self.persistence.save_client(data, reservations)
+        else:
+            self.persistence.apply_changes(changes, reservations)
+        self._version = self.persistence.version()
+        self._sync_ledger(lambda ledger: ledger.apply(changes, self._version))
+
+    # ------------------------------
+    # Libro de slots
+    # ------------------------------
+    def _court_keys(self) -> List[Tuple[str, int]]:
+        return [(c.tipo, c.numero) for c in self.courts]
+
+    def _sync_ledger(self, update: Callable[[SlotLedger], None]) -> None:
+        # Lleva al libro de slots un estado ya confirmado en el almacén (con su lock).
+        # Si falla, se informa y el libro deja de mantenerse: su versión queda atrás
+        # de la del almacén y los lectores vuelven a consultar vía Manager.
+        if self._ledger is None:
+            return
+        try:
+            update(self._ledger)
+        except Exception as e:
+            self._ledger.close()
+            self._ledger = None
+            self._report(RuntimeError(f"Libro de slots desactivado: {e}"))
+
+    # ------------------------------
+    # Eventos
+    # ------------------------------
+    def _snapshots(self, rs) -> Dict[str, Dict]:
+        # Estado previo de las reservas que van a cambiar (para 'previous' de los
+        # eventos); vacío si nadie escucha.
+        return {r.id: r.to_dict() for r in rs} if self.events.active else {}
+
+    def _publish(self, changes: List[Tuple[str, object]], before: Optional[Dict[str, Dict]] = None) -> None:
+        # Publica un lote de cambios ya aplicados: un evento por reserva afectada. Un
+        # cambio "client" actualiza además las demás reservas de ese cliente.
+        if not self.events.active:
+            return
+        before = before or {}
+        events, seen = [], set()
+        for op, data in changes:
+            if op == "delete":
+                seen.add(data)
+                events.append(ChangeEvent(CANCELLED, data, previous=before.get(data)))
+            elif op != "client":
+                seen.add(data.id)
+                events.append(ChangeEvent(CREATED if op == "create" else UPDATED, data.id,
+                                          data.to_dict(), before.get(data.id)))
+        for op, client in changes:
+            if op == "client":
+                for r in list(self._by_doc.get(client.documento, {}).values()):
+                    if r.id not in seen:
+                        seen.add(r.id)
+                        events.append(ChangeEvent(UPDATED, r.id, r.to_dict()))
+        if events:
+            self.events.publish(events)
+
+    def _publish_reload(self) -> None:
+        if self.events.active:
+            self.events.publish([ChangeEvent(RELOADED)])
+
+    def _occupy_slot(self, r: Reservation) -> None:
+        # Ocupa el intervalo de la reserva en su cancha.
+        key, start, end = self._interval(r)
+        self._intervals.add(key, start, end, r.id)
+        self._allocator.occupy((r.court.tipo, r.fecha), r.court.numero, start, end)
+
+    def _release_slot(self, r: Reservation) -> None:
+        # Libera el intervalo que ocupa la reserva. Si en esa cancha quedan otras que se
+        # cruzan (datos antiguos con duplicados), sus bloques se vuelven a marcar.
+        key, start, end = self._interval(r)
+        self._intervals.remove(key, start, end, r.id)
+        day = (r.court.tipo, r.fecha)
+        self._allocator.release(day, r.court.numero, start, end)
+        for other in self._intervals.overlapping(key, start, end):
+            o = self._by_id.get(other)
+            if o is not None:
+                self._allocator.occupy(day, o.court.numero, hora_to_minutes(o.hora), hora_to_minutes(o.hora_fin))
+
+    def _free_courts(self, tipo: str, fecha: str, start: int, end: int, exclude_id: Optional[str] = None) -> int:
+        # Máscara de las canchas del tipo libres durante [start, end) (bit k = cancha k+1),
+        # sin recorrer reservas. exclude_id (edición) no cuenta como ocupación.
+        busy = self._allocator.busy((tipo, fecha), start, end)
+        r = self._by_id.get(exclude_id) if exclude_id is not None else None
+        if r is not None and r.court.tipo == tipo and r.fecha == fecha:
+            # Su cancha queda libre si ninguna otra reserva se cruza con el intervalo.
+            if self._intervals.is_free((tipo, r.court.numero, fecha), start, end, exclude_id):
+                busy &= ~(1 << (r.court.numero - 1))
+        return ((1 << len(self._courts_by_type.get(tipo, ()))) - 1) & ~busy
+
+    def _pick_court(self, tipo: str, fecha: str, start: int, end: int, free: int,
+                    numero: Optional[int] = None, fixed: bool = False) -> Optional[Court]:
+        # Cancha para [start, end) entre las de la máscara 'free': la número 'numero' si
+        # está libre; si no (o sin número), la que elija el asignador según ASIGNACION,
+        # salvo que el número sea obligatorio (fixed). None si no hay lugar.
+        if numero is not None and free >> (numero - 1) & 1:
+            return self._courts_by_type[tipo][numero - 1]
+        if fixed:
+            return None
+        numero = self._allocator.choose((tipo, fecha), start, end, free, self.ASIGNACION)
+        return self._courts_by_type[tipo][numero - 1] if numero else None
 
     # ------------------------------
     # Validaciones internas
     # ------------------------------
-    def __hour_to_int(self, hora: str) -> int:
-        # Convierte "HH:MM" a entero con la hora (HH). Lanza ValueError en formato inválido.
+    @staticmethod
+    def __to_minutes(hora: str) -> int:
+        # Convierte "HH:MM" a minutos. Lanza ValueError en formato inválido.
         try:
-            return int(hora.split(":")[0])
+            return hora_to_minutes(hora)
         except Exception:
-            raise ValueError("Formato de hora inválido. Debe ser 'HH:00'")
+            raise ValueError("Formato de hora inválido. Debe ser 'HH:MM'")
 
-    def __validate_hour_in_range(self, hora: str):
-        # Se permite rango 10 a 21 (inclusive). Lanza ValueError si está fuera del rango.
-        h = self.__hour_to_int(hora)
-        if h < 10 or h > 21:
-            raise ValueError("Hora fuera de rango. Rango permitido: 10:00 - 21:00")
+    def __validate_interval(self, hora: str, hora_fin: Optional[str]) -> Tuple[str, str]:
+        # Valida [hora, hora_fin) dentro del horario (10:00 a 22:00) y alineado a
+        # GRANULARIDAD_MIN; sin hora_fin, la reserva dura una hora. Devuelve ambas
+        # horas normalizadas ("H:MM").
+        start = self.__to_minutes(hora)
+        end = self.__to_minutes(hora_fin) if hora_fin else start + 60
+        if start < self.HORA_INICIO * 60 or end > (self.HORA_FIN + 1) * 60:
+            raise ValueError(f"Horario fuera de rango. Rango permitido: {self.HORA_INICIO}:00 - {self.HORA_FIN + 1}:00")
+        if end <= start:
+            raise ValueError("La hora de fin debe ser posterior a la de inicio.")
+        if start % self.GRANULARIDAD_MIN or end % self.GRANULARIDAD_MIN:
+            raise ValueError(f"Las horas deben ir en bloques de {self.GRANULARIDAD_MIN} minutos.")
+        return minutes_to_hora(start), minutes_to_hora(end)
 
-    def __validate_fecha_not_past(self, fecha: str):
-        # Valida formato YYYY-MM-DD y que la fecha no sea pasada.
+    def __validate_fecha_not_past(self, fecha: str, allow_past: bool = False):
+        # Valida formato YYYY-MM-DD y que la fecha no sea pasada (salvo importaciones
+        # de históricos, con allow_past=True).
         try:
-            d = datetime.strptime(fecha, "%Y-%m-%d").date()
+            d = _parse_fecha(fecha)
         except Exception:
             raise ValueError("Formato de fecha inválido. Use YYYY-MM-DD")
-        if d < date.today():
+        if d < date.today() and not allow_past:
             raise ValueError("No se pueden crear reservas en fechas pasadas.")
 
     # ------------------------------
     # Disponibilidad
     # ------------------------------
-    def check_availability(self, cancha: str, fecha: str, hora: str, exclude_id: Optional[str] = None) -> bool:
-        """True si la cancha está disponible en fecha/hora, ignorando exclude_id (para edición)."""
-        # Recorre las reservas cargadas y verifica colisión por cancha+fecha+hora.
-        for r in self.reservations:
-            if exclude_id and r.id == exclude_id:
-                # Permite ignorar la propia reserva al editar.
-                continue
-            if r.court.tipo == cancha and r.fecha == fecha and r.hora == hora:
-                return False
-        return True
+    def check_availability(self, cancha: str, fecha: str, hora: str, exclude_id: Optional[str] = None,
+                           hora_fin: Optional[str] = None, cancha_num: Optional[int] = None) -> bool:
+        """
+        True si hay alguna cancha del tipo libre en fecha durante [hora, hora_fin)
+        (una hora si no se indica el fin), o si lo está la número cancha_num cuando
+        se indica, ignorando exclude_id (para edición). Cualquier solapamiento,
+        aunque sea parcial, la ocupa.
+        """
+        start = self.__to_minutes(hora)
+        end = self.__to_minutes(hora_fin) if hora_fin else start + 60
+        if cancha_num is not None:
+            # Búsqueda binaria en los intervalos de esa cancha y fecha: O(log n). Libre
+            # si nadie se solapa o si solo la propia reserva (edición).
+            court = self._court(cancha, cancha_num)
+            return self._intervals.is_free((court.tipo, court.numero, fecha), start, end, exclude_id)
+        self._court(cancha)
+        return bool(self._free_courts(cancha, fecha, start, end, exclude_id))
+
+    def get_free_courts(self, cancha: str, fecha: str, hora: str, hora_fin: Optional[str] = None) -> List[int]:
+        """Números de las canchas del tipo libres en fecha durante [hora, hora_fin)."""
+        self._court(cancha)
+        start = self.__to_minutes(hora)
+        end = self.__to_minutes(hora_fin) if hora_fin else start + 60
+        return self._court_numbers(self._free_courts(cancha, fecha, start, end))
+
+    @staticmethod
+    def _court_numbers(mask: int) -> List[int]:
+        # Máscara de canchas -> números (bit k = cancha k+1).
+        return [k + 1 for k in range(mask.bit_length()) if mask >> k & 1]
+
+    def get_availability_grid(self, fecha_inicio: str, fecha_fin: str,
+                              canchas: Optional[List[str]] = None) -> Dict:
+        """
+        Ocupación cancha x fecha x hora para un rango de fechas (inclusive).
+
+        Devuelve {"fechas": [...], "horas": HORAS, "canchas": {tipo: [bitmap por fecha]},
+        "parcial": {tipo: [bitmap por fecha]}, "libres": {tipo: [[n por hora] por fecha]}}:
+        el bit i de "canchas" indica que ninguna cancha del tipo está libre toda la hora
+        HORAS[i], el de "parcial", que aun así alguna tiene libre una parte de esa hora,
+        y "libres" cuenta las canchas libres la hora completa.
+        """
+        try:
+            inicio = datetime.strptime(fecha_inicio, "%Y-%m-%d").date()
+            fin = datetime.strptime(fecha_fin, "%Y-%m-%d").date()
+        except Exception:
+            raise ValueError("Formato de fecha inválido. Use YYYY-MM-DD")
+        if fin < inicio:
+            raise ValueError("La fecha final debe ser posterior a la inicial.")
+
+        fechas = [(inicio + timedelta(days=d)).isoformat() for d in range((fin - inicio).days + 1)]
+        tipos = canchas if canchas is not None else self.get_court_types()
+        for tipo in tipos:
+            self._court(tipo)
+        # Bloques del asignador que forman cada hora de la grilla.
+        per_hour = 60 // self.GRANULARIDAD_MIN
+        first = self.HORA_INICIO * per_hour
+        grid, partial, free_counts = {}, {}, {}
+        # Por cada tipo y fecha solo se combinan las máscaras de sus bloques: el costo
+        # depende del tamaño de la grilla, no de la cantidad de reservas ni de canchas.
+        for tipo in tipos:
+            all_courts = (1 << len(self._courts_by_type[tipo])) - 1
+            rows, partial_rows, count_rows = [], [], []
+            for fecha in fechas:
+                day = self._allocator.day((tipo, fecha))
+                bits = partial_bits = 0
+                counts = []
+                for i in range(len(self.HORAS)):
+                    blocks = day[first + i * per_hour:first + (i + 1) * per_hour]
+                    busy = 0
+                    for mask in blocks:
+                        busy |= mask
+                    free = all_courts & ~busy
+                    counts.append(free.bit_count())
+                    if not free:
+                        bits |= 1 << i
+                        if any(all_courts & ~mask for mask in blocks):
+                            partial_bits |= 1 << i
+                rows.append(bits)
+                partial_rows.append(partial_bits)
+                count_rows.append(counts)
+            grid[tipo], partial[tipo], free_counts[tipo] = rows, partial_rows, count_rows
+        return {"fechas": fechas, "horas": list(self.HORAS), "canchas": grid, "parcial": partial,
+                "libres": free_counts}
+
+    def find_free_slots(self, cancha: str, fecha_inicio: Optional[str] = None, fecha_fin: Optional[str] = None,
+                        duracion: int = 60, horas: Optional[List[str]] = None, dias: Optional[List[str]] = None,
+                        k: int = 5) -> List[Dict]:
+        """
+        Los k primeros horarios (por fecha y hora) en que alguna cancha del tipo está
+        libre durante 'duracion' minutos, entre fecha_inicio (hoy por defecto, nunca
+        antes) y fecha_fin (BUSQUEDA_DIAS días por defecto), inclusive.
+
+        horas limita las horas de inicio ("H:MM") y dias los días de la semana
+        ("lun" ... "dom"). Devuelve [{"fecha", "hora", "hora_fin", "libres": [números]}].
+        Cada día se resuelve con el bitmap de inicios libres del asignador: los días
+        completos se descartan sin recorrer reservas.
+        """
+        self._court(cancha)
+        try:
+            inicio = _parse_fecha(fecha_inicio) if fecha_inicio else date.today()
+            fin = _parse_fecha(fecha_fin) if fecha_fin else inicio + timedelta(days=self.BUSQUEDA_DIAS - 1)
+        except Exception:
+            raise ValueError("Formato de fecha inválido. Use YYYY-MM-DD")
+        if fin < inicio:
+            raise ValueError("La fecha final debe ser posterior a la inicial.")
+        if (fin - inicio).days >= self.BUSQUEDA_MAX_DIAS:
+            raise ValueError(f"La búsqueda admite hasta {self.BUSQUEDA_MAX_DIAS} días.")
+        if type(k) is not int or k < 1:
+            raise ValueError("La cantidad de resultados debe ser un entero positivo.")
+        g = self.GRANULARIDAD_MIN
+        if type(duracion) is not int or duracion <= 0 or duracion % g:
+            raise ValueError(f"La duración debe ser un múltiplo positivo de {g} minutos.")
+        first, last = self.HORA_INICIO * 60 // g, (self.HORA_FIN + 1) * 60 // g
+        # Inicios permitidos como bitmap de bloques del día.
+        allowed = (1 << last) - (1 << first)
+        if horas is not None:
+            allowed = 0
+            for hora in horas:
+                start = self.__to_minutes(hora)
+                if start % g or not first <= start // g < last:
+                    raise ValueError(f"Hora de inicio no válida: {hora}")
+                allowed |= 1 << start // g
+        try:
+            weekdays = set(range(len(DIAS))) if dias is None else {DIAS.index(d) for d in dias}
+        except ValueError:
+            raise ValueError(f"Días válidos: {', '.join(DIAS)}.")
+
+        courts = len(self._courts_by_type[cancha])
+        length = duracion // g
+        found: List[Dict] = []
+        fecha = max(inicio, date.today())
+        while fecha <= fin and len(found) < k:
+            if fecha.weekday() in weekdays:
+                iso = fecha.isoformat()
+                starts = self._allocator.free_starts((cancha, iso), courts, length, first, last) & allowed
+                while starts and len(found) < k:
+                    low = starts & -starts
+                    starts ^= low
+                    start = (low.bit_length() - 1) * g
+                    end = start + duracion
+                    found.append({"fecha": iso, "hora": minutes_to_hora(start), "hora_fin": minutes_to_hora(end),
+                                  "libres": self._court_numbers(self._free_courts(cancha, iso, start, end))})
+            fecha += timedelta(days=1)
+        return found
 
     # ------------------------------
     # Crear reserva
     # ------------------------------
-    def create_reservation(self, nombre: str, documento: str, telefono: str,
-                           email: str, cancha: str, fecha: str, hora: str) -> None:
-        # Valida fecha y hora antes de instanciar objetos que validan sus campos.
-        self.__validate_fecha_not_past(fecha)
-        self.__validate_hour_in_range(hora)
+    def _build_reservation(self, nombre: str, documento: str, telefono: str,
+                           email: str, cancha: str, fecha: str, hora: str,
+                           allow_past: bool = False, hora_fin: Optional[str] = None,
+                           cancha_num: Optional[int] = None) -> Reservation:
+        # Valida fecha y horario antes de instanciar objetos que validan sus campos.
+        # No consulta disponibilidad ni asigna cancha (sin cancha_num queda la 1 del
+        # tipo): eso depende del contexto (individual o lote).
+        self.__validate_fecha_not_past(fecha, allow_past)
+        hora, hora_fin = self.__validate_interval(hora, hora_fin)
 
-        # Crear objetos Client y Court; Client valida campos personales.
+        # Crear objetos Client y Court; Client valida campos personales. El precio
+        # sale de la tabla de tarifas (franja, día y socio).
         client = Client(nombre, documento, telefono, email)
-        court = next((c for c in self.courts if c.tipo == cancha), None)
-        if not court:
-            raise ValueError("Cancha no válida.")
+        court = self._court(cancha, cancha_num)
+        precio = self.pricing.price(cancha, fecha, hora_to_minutes(hora), hora_to_minutes(hora_fin), documento)
+        return Reservation(client, court, fecha, hora, hora_fin=hora_fin, precio=precio)
 
-        # Verificar disponibilidad
-        if not self.check_availability(cancha, fecha, hora):
-            raise ValueError("Esa hora ya está ocupada para la cancha seleccionada.")
+    @_transactional
+    def create_reservation(self, nombre: str, documento: str, telefono: str,
+                           email: str, cancha: str, fecha: str, hora: str,
+                           hora_fin: Optional[str] = None, cancha_num: Optional[int] = None) -> Reservation:
+        # Devuelve la reserva creada (su id lo necesitan la API HTTP y otros clientes).
+        # Sin hora_fin la reserva dura una hora; sin cancha_num se asigna una cancha
+        # libre del tipo (r.court indica cuál).
+        r = self._build_reservation(nombre, documento, telefono, email, cancha, fecha, hora,
+                                    hora_fin=hora_fin, cancha_num=cancha_num)
 
-        # Crear Reservation y persistir
-        r = Reservation(client, court, fecha, hora)
-        self.reservations.append(r)
-        self.persistence.save_reservations(self.reservations)
+        # Verificar disponibilidad (cualquier solapamiento con otra reserva la impide)
+        _, start, end = self._interval(r)
+        court = self._pick_court(r.court.tipo, r.fecha, start, end,
+                                 self._free_courts(r.court.tipo, r.fecha, start, end),
+                                 cancha_num, fixed=cancha_num is not None)
+        if court is None:
+            raise ValueError("Ese horario se cruza con otra reserva de la cancha seleccionada.")
+        r.court = court
+
+        # Registrar Reservation (con el cliente canónico del registro) y persistir
+        changes: List[Tuple[str, object]] = []
+        r.client = self._commit_client(r.client, changes)
+        changes.append(("create", r))
+        self._index_add(r)
+        try:
+            self._persist(changes)
+        except Exception:
+            # Si el backend rechaza la escritura, la memoria vuelve al estado anterior.
+            self._index_remove(r)
+            raise
+        self._publish(changes)
+        return r
 
     # ------------------------------
     # Listar reservas
@@ -106,25 +909,242 @@ class Manager:
         # Devuelve una lista de dicts (usado por la UI para mostrar datos).
         return [r.to_dict() for r in self.reservations]
 
+    def get_reservations_page(self, offset: int = 0, limit: int = 100, sort_by: Optional[str] = None,
+                              descending: bool = False, documento: Optional[str] = None,
+                              fecha: Optional[str] = None, cancha: Optional[str] = None) -> List[Dict]:
+        """
+        Página de reservas como dicts (mismo formato que get_all_reservations).
+
+        sort_by es una de SORT_KEYS (None = orden de inserción); los filtros
+        documento/fecha/cancha son opcionales. Solo se convierten a dict las
+        filas de la página pedida.
+        """
+        if offset < 0 or limit < 1:
+            raise ValueError("Paginación inválida: offset >= 0 y limit >= 1.")
+
+        def matches(r: Reservation) -> bool:
+            return (fecha is None or r.fecha == fecha) and (cancha is None or r.court.tipo == cancha)
+
+        if documento is not None:
+            # Pocas reservas por cliente: se filtran y ordenan directamente.
+            rows = [r for r in list(self._by_doc.get(documento, {}).values()) if matches(r)]
+            if sort_by is not None:
+                key = self.SORT_KEYS.get(sort_by)
+                if key is None:
+                    raise ValueError(f"Columna de orden no válida: {sort_by}")
+                rows.sort(key=key)
+            if descending:
+                rows.reverse()
+            return [r.to_dict() for r in rows[offset:offset + limit]]
+
+        # Las lecturas no toman lock: se trabaja sobre copias atómicas (list/slice)
+        # y se ignoran ids que una escritura concurrente acabe de quitar.
+        by_id = self._by_id
+        predicate = None
+        if fecha is not None or cancha is not None:
+            predicate = lambda res_id: res_id in by_id and matches(by_id[res_id])
+        if sort_by is None:
+            keys = list(by_id)
+            ids = reversed(keys) if descending else iter(keys)
+            if predicate is not None:
+                ids = filter(predicate, ids)
+            ids = islice(ids, offset, offset + limit)
+        else:
+            ids = self._sort_index(sort_by).ids(offset, limit, descending, predicate)
+        rows = (by_id.get(res_id) for res_id in ids)
+        return [r.to_dict() for r in rows if r is not None]
+
+    def count_reservations(self, documento: Optional[str] = None, fecha: Optional[str] = None,
+                           cancha: Optional[str] = None) -> int:
+        # Total de reservas que cumplen los filtros (sin filtros es O(1)).
+        if documento is None and fecha is None and cancha is None:
+            return len(self._by_id)
+        rows = list(self._by_doc.get(documento, {}).values() if documento is not None else self._by_id.values())
+        return sum(1 for r in rows
+                   if (fecha is None or r.fecha == fecha) and (cancha is None or r.court.tipo == cancha))
+
     # ------------------------------
     # Buscar por ID
     # ------------------------------
     def get_reservation_by_id(self, res_id: str) -> Optional[Reservation]:
-        # Retorna el objeto Reservation o None.
-        return next((r for r in self.reservations if r.id == res_id), None)
+        # Retorna el objeto Reservation o None (búsqueda O(1) en el mapa por id).
+        return self._by_id.get(res_id)
 
     def get_reservation_index_by_id(self, res_id: str) -> int:
-        # Retorna índice en la lista o -1 si no existe (útil para eliminar).
-        for i, r in enumerate(self.reservations):
-            if r.id == res_id:
+        # Retorna la posición en la lista o -1 si no existe.
+        # La pertenencia se resuelve en O(1); la posición solo se calcula si existe.
+        if res_id not in self._by_id:
+            return -1
+        for i, key in enumerate(self._by_id):
+            if key == res_id:
                 return i
         return -1
 
+    # ------------------------------
+    # Consultas filtradas
+    # ------------------------------
+    def find_reservations(self, documento: Optional[str] = None, fecha: Optional[str] = None,
+                          cancha: Optional[str] = None, email: Optional[str] = None) -> List[Reservation]:
+        """Reservas por documento, fecha, tipo de cancha y/o email (en orden de inserción)."""
+        if self.persistence.supports_queries and not self._pending and not self._flushing:
+            # El backend resuelve todos los filtros con sus índices; se devuelven los
+            # objetos en memoria. Con cambios diferidos sin escribir la base está
+            # atrasada y se filtra en memoria.
+            ids = self.persistence.find_reservations(documento=documento, fecha=fecha, cancha=cancha, email=email)
+            by_id = self._by_id
+            return [by_id[i] for i in ids if i in by_id]
+        email_key = email.casefold() if email is not None else None
+        # Punto de partida: el índice de documento si se filtra por él; si no, todas.
+        candidates = self._by_doc.get(documento, {}) if documento is not None else self._by_id
+        return [r for r in list(candidates.values())
+                if (fecha is None or r.fecha == fecha)
+                and (cancha is None or r.court.tipo == cancha)
+                and (email_key is None or r.client.email.casefold() == email_key)]
+
+    def query(self, fecha_desde: Optional[str] = None, fecha_hasta: Optional[str] = None,
+              cancha: Optional[str] = None, documento: Optional[str] = None,
+              email: Optional[str] = None, include_archive: bool = False) -> List[Reservation]:
+        """
+        Reservas que cumplen todos los filtros dados, ordenadas por fecha y hora.
+
+        Los filtros se combinan libremente (AND). Se elige como punto de partida
+        el índice con menos candidatos (rango de fechas, documento, email o
+        cancha) y el resto se verifica sobre esos candidatos, así el costo es
+        proporcional a los aciertos y no al total de reservas.
+
+        include_archive=True abre antes los meses archivados del rango (backend
+        particionado); sin él solo se consulta lo cargado.
+        """
+        for valor in (fecha_desde, fecha_hasta):
+            if valor is not None:
+                try:
+                    datetime.strptime(valor, "%Y-%m-%d")
+                except Exception:
+                    raise ValueError("Formato de fecha inválido. Use YYYY-MM-DD")
+        if include_archive:
+            self._open_archive(fecha_desde, fecha_hasta)
+        email_key = email.casefold() if email is not None else None
+
+        # Candidatos de cada índice aplicable: (tamaño, generador de reservas, ya ordenado).
+        plans = []
+        by_id = self._by_id
+        if fecha_desde is not None or fecha_hasta is not None:
+            lo = (fecha_desde,) if fecha_desde is not None else ()
+            # Cota superior exclusiva: el día siguiente a fecha_hasta.
+            hi = ((date.fromisoformat(fecha_hasta) + timedelta(days=1)).isoformat(),) \
+                if fecha_hasta is not None else ("\uffff",)
+            index = self._sorted["fecha"]
+            start, stop = index.span(lo, hi)
+            plans.append((stop - start, lambda: [by_id[i] for i in index.ids_between(lo, hi) if i in by_id], True))
+        # Sin lock de lectura: cada plan materializa sus candidatos con list() (copia atómica).
+        if documento is not None:
+            bucket = self._by_doc.get(documento, {})
+            plans.append((len(bucket), lambda: list(bucket.values()), False))
+        if email_key is not None:
+            buckets = [self._by_doc.get(doc, {}) for doc in list(self._docs_by_email.get(email_key, ()))]
+            plans.append((sum(len(b) for b in buckets), lambda: [r for b in buckets for r in list(b.values())], False))
+        if cancha is not None:
+            bucket = self._by_court.get(cancha, {})
+            plans.append((len(bucket), lambda: list(bucket.values()), False))
+        if not plans:
+            plans.append((len(by_id), lambda: list(by_id.values()), False))
+        _, candidates, ordered = min(plans, key=lambda p: p[0])
+
+        result = [r for r in candidates()
+                  if (fecha_desde is None or r.fecha >= fecha_desde)
+                  and (fecha_hasta is None or r.fecha <= fecha_hasta)
+                  and (cancha is None or r.court.tipo == cancha)
+                  and (documento is None or r.client.documento == documento)
+                  and (email_key is None or r.client.email.casefold() == email_key)]
+        if not ordered:
+            result.sort(key=self.SORT_KEYS["fecha"])
+        return result
+
+    def _open_archive(self, fecha_desde: Optional[str], fecha_hasta: Optional[str]) -> None:
+        # Carga (una vez) los meses archivados que se solapan con el rango; se indexan
+        # como el resto y siguen en memoria hasta la próxima recarga del almacén.
+        if not self.persistence.archived_months(fecha_desde, fecha_hasta):
+            return
+        with self._transaction():
+            months = self.persistence.archived_months(fecha_desde, fecha_hasta)
+            if months:
+                self._index_add_many(self.persistence.load_archive(months))
+                self._publish_reload()
+
+    def get_reservations_by_documento(self, documento: str) -> List[Reservation]:
+        # Todas las reservas de un cliente (O(k) en sus reservas, sin recorrer el total).
+        return list(self._by_doc.get(documento, {}).values())
+
+    # ------------------------------
+    # Reportes
+    # ------------------------------
+    def _analytics(self) -> Rollups:
+        # Agregados de ocupación e ingresos; la primera vez se arman bajo el lock de
+        # escritura, así ningún cambio queda fuera entre la construcción y la publicación.
+        rollups = self._rollups
+        if rollups is None:
+            with self._write_lock:
+                if self._rollups is None:
+                    self._rollups = Rollups.from_reservations(self._by_id.values())
+                rollups = self._rollups
+        return rollups
+
+    def get_usage_report(self, periodo: str = "dia", fecha_desde: Optional[str] = None,
+                         fecha_hasta: Optional[str] = None, cancha: Optional[str] = None,
+                         include_archive: bool = False) -> List[Dict]:
+        """
+        Ocupación e ingresos por cancha física y periodo ("dia", "semana" o "mes"):
+        [{"periodo", "cancha", "cancha_num", "reservas", "horas", "ingresos", "ocupacion"}].
+        ocupacion = horas reservadas / horas abiertas del periodo dentro del rango.
+        Sale de los agregados, sin recorrer reservas. include_archive como en query().
+        """
+        for valor in (fecha_desde, fecha_hasta):
+            if valor is not None:
+                try:
+                    datetime.strptime(valor, "%Y-%m-%d")
+                except Exception:
+                    raise ValueError("Formato de fecha inválido. Use YYYY-MM-DD")
+        if include_archive:
+            self._open_archive(fecha_desde, fecha_hasta)
+        minutos_dia = (self.HORA_FIN + 1 - self.HORA_INICIO) * 60
+        return self._analytics().period_report(periodo, minutos_dia, fecha_desde, fecha_hasta, cancha)
+
+    def get_hour_of_week_report(self, cancha: Optional[str] = None) -> List[Dict]:
+        """
+        Actividad por día de la semana y hora de cada cancha física, de todo lo cargado:
+        [{"dia", "hora", "cancha", "cancha_num", "reservas", "horas", "ingresos"}].
+        """
+        return self._analytics().hour_of_week_report(cancha)
+
+    # ------------------------------
+    # Clientes
+    # ------------------------------
+    def get_client(self, documento: str) -> Optional[Client]:
+        return self.clients.get(documento)
+
+    @_transactional
+    def update_client(self, documento: str, **kwargs) -> None:
+        """Actualiza los datos de un cliente; todas sus reservas ven el cambio."""
+        current = self.clients.get(documento)
+        if current is None:
+            raise ValueError("Cliente no encontrado.")
+        # Revalida con los valores nuevos (mantiene los antiguos si no se pasan).
+        client = Client(kwargs.get("nombre", current.nombre), documento,
+                        kwargs.get("telefono", current.telefono), kwargs.get("email", current.email))
+        _, changed = self._upsert_client(client)
+        if changed:
+            # Una sola escritura del cliente: las reservas no se tocan.
+            self._persist([("client", current)])
+            self._publish([("client", current)])
+
     # ------------------------------
     # Editar reserva
     # ------------------------------
-    def edit_reservation_by_id(self, res_id: str, **kwargs) -> None:
-        """Edita una reserva existente por su ID único."""
+    def _prepare_edit(self, res_id: str, kwargs: Dict) -> Tuple[Reservation, Tuple, bool]:
+        # Valida los nuevos valores de una edición y devuelve (reserva, campos nuevos,
+        # cancha fija) sin modificar nada. No consulta disponibilidad: la cancha de los
+        # campos es la indicada en cancha_num (fija), o si no la actual (mismo tipo) o
+        # la 1 del tipo nuevo, y puede reasignarse si no está libre.
         r = self.get_reservation_by_id(res_id)
         if not r:
             raise ValueError("Reserva no encontrada.")
@@ -137,47 +1157,293 @@ class Manager:
         cancha = kwargs.get("cancha", r.court.tipo)
         fecha = kwargs.get("fecha", r.fecha)
         hora = kwargs.get("hora", r.hora)
+        # Sin hora_fin nueva se conserva la duración (cambiar la hora desplaza el intervalo).
+        hora_fin = kwargs.get("hora_fin")
+        if hora_fin is None:
+            duracion = hora_to_minutes(r.hora_fin) - hora_to_minutes(r.hora)
+            hora_fin = minutes_to_hora(self.__to_minutes(hora) + duracion)
 
         # Validaciones
         self.__validate_fecha_not_past(fecha)
-        self.__validate_hour_in_range(hora)
+        hora, hora_fin = self.__validate_interval(hora, hora_fin)
 
         # Verificar que la cancha exista
-        court_obj = next((c for c in self.courts if c.tipo == cancha), None)
-        if not court_obj:
-            raise ValueError("Cancha no válida.")
-
-        # Comprobar disponibilidad ignorando la reserva actual (exclude_id)
-        if not self.check_availability(cancha, fecha, hora, exclude_id=res_id):
-            raise ValueError("La nueva fecha/hora está ocupada para la cancha seleccionada.")
+        numero = kwargs.get("cancha_num")
+        fixed = numero is not None
+        if not fixed and cancha == r.court.tipo and r.court.numero <= self.get_court_count(cancha):
+            numero = r.court.numero
+        court_obj = self._court(cancha, numero)
 
         # Crear un nuevo Client (revalida datos del cliente)
         new_client = Client(nombre, documento, telefono, email)
+        precio = self.pricing.price(cancha, fecha, hora_to_minutes(hora), hora_to_minutes(hora_fin), documento)
+        return r, (new_client, court_obj, fecha, hora, hora_fin, precio), fixed
+
+    def _set_fields(self, r: Reservation, fields: Tuple) -> Tuple:
+        # Actualiza campos de la reserva existente; el slot anterior se libera
+        # y se ocupa el nuevo en el mismo paso para que el índice no quede desfasado.
+        # La entrada en el mapa por id no se toca, así se conserva el orden.
+        # Devuelve los valores previos (para deshacer).
+        previous = (r.client, r.court, r.fecha, r.hora, r.hora_fin, r.precio)
+        rollups = self._rollups
+        if rollups is not None:
+            rollups.remove(r)
+        self._release_slot(r)
+        self._bucket_remove(r)
+        r.client, r.court, r.fecha, r.hora, r.hora_fin, r.precio = fields
+        self._occupy_slot(r)
+        self._bucket_add(r)
+        for index in self._sorted.values():
+            index.update(r)
+        if rollups is not None:
+            rollups.add(r)
+        return previous
+
+    @_transactional
+    def edit_reservation_by_id(self, res_id: str, **kwargs) -> None:
+        """Edita una reserva existente por su ID único."""
+        r, fields, fixed = self._prepare_edit(res_id, kwargs)
 
-        # Actualizar campos de la reserva existente
-        r.client = new_client
-        r.court = court_obj
-        r.fecha = fecha
-        r.hora = hora
-        r.precio = court_obj.precio_por_hora
+        # Comprobar disponibilidad ignorando la reserva actual (exclude_id). Se conserva
+        # la cancha si sigue libre; si no (y no se pidió una en concreto), se asigna otra.
+        court_obj, fecha, hora, hora_fin = fields[1:5]
+        start, end = hora_to_minutes(hora), hora_to_minutes(hora_fin)
+        keep = fixed or court_obj.tipo == r.court.tipo
+        court_obj = self._pick_court(court_obj.tipo, fecha, start, end,
+                                     self._free_courts(court_obj.tipo, fecha, start, end, exclude_id=res_id),
+                                     court_obj.numero if keep else None, fixed)
+        if court_obj is None:
+            raise ValueError("La nueva fecha/hora se cruza con otra reserva de la cancha seleccionada.")
+        fields = fields[:1] + (court_obj,) + fields[2:]
 
-        # Persistir cambios
-        self.persistence.save_reservations(self.reservations)
+        before = self._snapshots([r])
+        changes: List[Tuple[str, object]] = []
+        fields = (self._commit_client(fields[0], changes),) + fields[1:]
+        changes.append(("update", r))
+        previous = self._set_fields(r, fields)
+
+        # Persistir cambios; si el backend falla se restauran los valores previos
+        # (los datos del cliente ya actualizados en el registro se conservan).
+        try:
+            self._persist(changes)
+        except Exception:
+            self._set_fields(r, previous)
+            raise
+        self._publish(changes, before)
 
     # ------------------------------
     # Cancelar reserva
     # ------------------------------
+    @_transactional
     def cancel_reservation_by_id(self, res_id: str) -> None:
-        idx = self.get_reservation_index_by_id(res_id)
-        if idx == -1:
+        r = self._by_id.get(res_id)
+        if r is None:
             raise ValueError("Reserva no encontrada.")
-        # Elimina la reserva y persiste
-        del self.reservations[idx]
-        self.persistence.save_reservations(self.reservations)
+        # Elimina la reserva de los índices (O(1)) y persiste
+        self._index_remove(r)
+        try:
+            self._persist([("delete", res_id)])
+        except Exception:
+            self._index_add(r)
+            raise
+        self._publish([("delete", res_id)], self._snapshots([r]))
+
+    # ------------------------------
+    # Operaciones en lote
+    # ------------------------------
+    # Cada método valida todos los elementos, detecta conflictos con las reservas
+    # existentes y dentro del propio lote, y aplica todo o nada con UNA sola
+    # escritura en el backend. Devuelven un resultado por elemento:
+    #   {"index": i, "ok": bool, "applied": bool, "id": ..., "error": ...}
+    @staticmethod
+    def _batch_results(results: List[Dict]) -> List[Dict]:
+        # Marca si el lote se aplicó: solo cuando todos los elementos son válidos.
+        applied = all(item["ok"] for item in results)
+        for item in results:
+            item["applied"] = applied
+        return results
+
+    @_transactional
+    def create_reservations(self, requests: List[Dict], allow_past: bool = False) -> List[Dict]:
+        """Crea varias reservas de forma atómica (todas o ninguna)."""
+        if allow_past:
+            # Fechas pasadas pueden caer en meses archivados: se abren para que la
+            # detección de conflictos los vea.
+            fechas = [req["fecha"] for req in requests
+                      if isinstance(req, dict) and isinstance(req.get("fecha"), str)]
+            if fechas:
+                self._open_archive(min(fechas), max(fechas))
+        results, created = [], []
+        # Intervalos ya tomados por el lote (id -> posición, para el mensaje de conflicto)
+        # y sus bloques por cancha, para asignar canchas sin repetir dentro del lote.
+        claimed, claimed_by = IntervalIndex(), {}
+        claimed_slots = CourtAllocator(self.GRANULARIDAD_MIN)
+        for i, req in enumerate(requests):
+            try:
+                r = self._build_reservation(**req, allow_past=allow_past)
+                numero = req.get("cancha_num")
+                tipo, fecha = r.court.tipo, r.fecha
+                _, start, end = self._interval(r)
+                free = self._free_courts(tipo, fecha, start, end)
+                if not (free >> (numero - 1) & 1 if numero is not None else free):
+                    raise ValueError("Ese horario se cruza con otra reserva de la cancha seleccionada.")
+                court = self._pick_court(tipo, fecha, start, end,
+                                         free & ~claimed_slots.busy((tipo, fecha), start, end),
+                                         numero, fixed=numero is not None)
+                if court is None:
+                    # Libre en el almacén pero tomada por elementos anteriores del lote.
+                    numeros = [numero] if numero is not None else range(1, self.get_court_count(tipo) + 1)
+                    hits = [h for n in numeros for h in claimed.overlapping((tipo, n, fecha), start, end)]
+                    raise ValueError(f"Conflicto con el elemento {min(claimed_by[h] for h in hits)} del lote.")
+                r.court = court
+                claimed.add(*self._interval(r), r.id)
+                claimed_slots.occupy((tipo, fecha), court.numero, start, end)
+                claimed_by[r.id] = i
+                created.append(r)
+                results.append({"index": i, "ok": True, "id": r.id})
+            except (ValueError, TypeError) as e:
+                # TypeError cubre campos faltantes o desconocidos en el dict.
+                results.append({"index": i, "ok": False, "error": str(e)})
+
+        if len(created) != len(results):
+            return self._batch_results(results)
+
+        changes: List[Tuple[str, object]] = []
+        for r in created:
+            r.client = self._commit_client(r.client, changes)
+        self._index_add_many(created)
+        changes.extend(("create", r) for r in created)
+        try:
+            self._persist(changes)
+        except Exception:
+            for r in created:
+                self._index_remove(r)
+            raise
+        self._publish(changes)
+        return self._batch_results(results)
+
+    @_transactional
+    def edit_reservations(self, edits: List[Dict]) -> List[Dict]:
+        """Edita varias reservas de forma atómica. Cada elemento: {"id": ..., <campos>}."""
+        results, prepared = [], []
+        # Reservas editadas en el lote; permite intercambios dentro del lote.
+        targets = set()
+        for i, edit in enumerate(edits):
+            try:
+                changes = dict(edit)
+                res_id = changes.pop("id", None)
+                if res_id in targets:
+                    raise ValueError("Reserva repetida en el lote.")
+                r, fields, fixed = self._prepare_edit(res_id, changes)
+                targets.add(res_id)
+                prepared.append([i, r, fields, fixed])
+                results.append({"index": i, "ok": True, "id": res_id})
+            except ValueError as e:
+                results.append({"index": i, "ok": False, "id": edit.get("id"), "error": str(e)})
+
+        # Conflictos: el intervalo destino solo puede cruzarse con la propia reserva o
+        # con reservas que también se mueven en este lote; y los destinos del lote no
+        # pueden cruzarse entre sí. Sin cancha fija se prueba primero la de los campos
+        # y luego las demás del tipo (aquí no sirven las máscaras del asignador: las
+        # reservas del lote todavía ocupan su lugar anterior).
+        claimed, claimed_by = IntervalIndex(), {}
+        for item in prepared:
+            i, r, fields, fixed = item
+            court, fecha = fields[1], fields[2]
+            start, end = hora_to_minutes(fields[3]), hora_to_minutes(fields[4])
+            candidates = [court] if fixed else [court] + [c for c in self._courts_by_type[court.tipo] if c is not court]
+            error = "La nueva fecha/hora se cruza con otra reserva de la cancha seleccionada."
+            for candidate in candidates:
+                key = (candidate.tipo, candidate.numero, fecha)
+                if any(owner != r.id and owner not in targets
+                       for owner in self._intervals.overlapping(key, start, end)):
+                    continue
+                hits = claimed.overlapping(key, start, end)
+                if hits:
+                    error = f"Conflicto con el elemento {min(claimed_by[h] for h in hits)} del lote."
+                    continue
+                error = None
+                item[2] = fields = fields[:1] + (candidate,) + fields[2:]
+                break
+            claimed.add((fields[1].tipo, fields[1].numero, fecha), start, end, r.id)
+            claimed_by[r.id] = i
+            if error:
+                results[i].update(ok=False, error=error)
+
+        if not all(item["ok"] for item in results):
+            return self._batch_results(results)
+
+        before = self._snapshots([r for _, r, _, _ in prepared])
+        changes: List[Tuple[str, object]] = []
+        undo = []
+        for _, r, fields, _ in prepared:
+            fields = (self._commit_client(fields[0], changes),) + fields[1:]
+            undo.append((r, self._set_fields(r, fields)))
+        changes.extend(("update", r) for _, r, _, _ in prepared)
+        try:
+            self._persist(changes)
+        except Exception:
+            for r, previous in reversed(undo):
+                self._set_fields(r, previous)
+            raise
+        self._publish(changes, before)
+        return self._batch_results(results)
+
+    @_transactional
+    def cancel_reservations(self, res_ids: List[str]) -> List[Dict]:
+        """Cancela varias reservas de forma atómica."""
+        results, found = [], []
+        seen = set()
+        for i, res_id in enumerate(res_ids):
+            r = self._by_id.get(res_id)
+            if r is None:
+                results.append({"index": i, "ok": False, "id": res_id, "error": "Reserva no encontrada."})
+            elif res_id in seen:
+                results.append({"index": i, "ok": False, "id": res_id, "error": "Reserva repetida en el lote."})
+            else:
+                seen.add(res_id)
+                found.append(r)
+                results.append({"index": i, "ok": True, "id": res_id})
+
+        if len(found) != len(results):
+            return self._batch_results(results)
+
+        for r in found:
+            self._index_remove(r)
+        changes = [("delete", r.id) for r in found]
+        try:
+            self._persist(changes)
+        except Exception:
+            for r in found:
+                self._index_add(r)
+            raise
+        self._publish(changes, self._snapshots(found))
+        return self._batch_results(results)
 
     # ------------------------------
     # Guardar manualmente
     # ------------------------------
     def save_all(self) -> None:
-        # Método de conveniencia para forzar guardado desde fuera.
-        self.persistence.save_reservations(self.reservations)
\ No newline at end of file
+        # Método de conveniencia para forzar guardado desde fuera. El snapshot
+        # incluye los cambios diferidos, que dejan de estar pendientes.
+        with self._flush_lock, self._write_lock, self.persistence.lock():
+            self._sync_with_store()
+            self.persistence.save_reservations(self.reservations)
+            self._pending = []
+            self._version = self.persistence.version()
+            self._sync_ledger(lambda ledger: ledger.rebuild(self._court_keys(), self._by_id.values(), self._version))
+
+    def verify(self):
+        # Pase explícito de validación completa (útil tras una carga confiable).
+        # Devuelve [(id, mensaje)] con las reservas cuyos datos no validan.
+        return verify_reservations(list(self._by_id.values()))
+
+    def close(self) -> None:
+        # Vuelca lo diferido y libera recursos de persistencia (p. ej. sincroniza el journal).
+        try:
+            if self._writer is not None:
+                self._writer.close()
+        finally:
+            if self._ledger is not None:
+                self._ledger.close()
+            self.persistence.close()
@@ -0,0 +1,329 @@
+# Juan David Ocampo Gutierrez
+# Nicolás Castro Pacheco
+# Michell Valencia Berdugo
+# Juan David Rivera Durán
+
+"""
+partitioned.py
+--------------
+
+Modo de persistencia particionado por mes.
+
+En lugar de un único reservas.json que crece sin límite, cada mes tiene
+su propio archivo junto al de clientes (que sigue siendo uno solo):
+
+    reservas.clientes.json
+    reservas.2025-11.json        mes en curso / futuros  (activos)
+    reservas.2025-10.json.gz     meses cerrados          (histórico)
+
+- Al cargar solo se leen las particiones activas (mes actual en adelante).
+  Los meses ya cerrados se compactan en su archivo .json.gz en ese momento.
+- Cada escritura reescribe únicamente los meses que tocan los cambios, así
+  el costo de guardar depende de las particiones activas y no del histórico.
+- El histórico se abre bajo demanda (load_archive): Manager lo hace para las
+  consultas con include_archive=True y antes de importar fechas pasadas, de
+  modo que los meses que se escriben siempre están completos en memoria.
+- Un reservas.json único de versiones anteriores se reparte por mes la
+  primera vez que se carga y luego se elimina.
+"""
+
+import gzip
+import json
+import os
+import re
+from datetime import date
+
+import instrumentation
+from persistence import Persistence
+from storage import locked, committing
+
+# Nombre de una partición sin el prefijo "reservas.": "2025-10.json" o "2025-10.json.gz".
+_PARTITION_NAME = re.compile(r"(?P<month>\d{4}-\d{2})\.json(?P<gz>\.gz)?")
+
+
+def _month(fecha: str) -> str:
+    # "2025-10-17" -> "2025-10"
+    return fecha[:7]
+
+
+class PartitionedPersistence(Persistence):
+    # Cada escritura reescribe solo los meses afectados.
+    incremental_writes = True
+    supports_archive = True
+
+    def __init__(self, filepath="reservas.json", trusted=False, auto_migrate=True, cache=True):
+        # filepath es el nombre base (y el del archivo único anterior, si existe).
+        super().__init__(filepath, trusted=trusted, auto_migrate=auto_migrate, cache=cache)
+        base = os.path.splitext(filepath)[0]
+        self._base = base
+        self._dir = os.path.dirname(base) or "."
+        self._prefix = os.path.basename(base) + "."
+        # Meses cargados: mes -> {id: Reservation}, e id -> mes (para mover o borrar).
+        self._parts = {}
+        self._month_of = {}
+
+    # ------------------------------
+    # Archivos
+    # ------------------------------
+    @staticmethod
+    def _current_month():
+        return _month(date.today().isoformat())
+
+    def _plain_path(self, month):
+        return f"{self._base}.{month}.json"
+
+    def _archive_path(self, month):
+        return f"{self._base}.{month}.json.gz"
+
+    def _scan(self):
+        # Particiones en disco: mes -> (tiene .json, tiene .json.gz).
+        months = {}
+        for name in os.listdir(self._dir):
+            if not name.startswith(self._prefix):
+                continue
+            m = _PARTITION_NAME.fullmatch(name[len(self._prefix):])
+            if m:
+                plain, archived = months.get(m["month"], (False, False))
+                months[m["month"]] = (plain or not m["gz"], archived or bool(m["gz"]))
+        return months
+
+    def _read_archive(self, path):
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+        except (OSError, EOFError, ValueError) as e:
+            # A diferencia del JSON activo, no se trata como vacío: reescribir el mes
+            # a partir de una lectura fallida borraría el histórico.
+            raise ValueError(f"Archivo histórico dañado ({path}): {e}")
+
+    def _write_archive(self, path, data):
+        # Como _write_json: si falla, limpia el temporal y propaga el error.
+        temp_path = path + ".tmp"
+        try:
+            with gzip.open(temp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        instrumentation.count("storage.bytes_written", os.path.getsize(path))
+
+    @staticmethod
+    def _remove(path):
+        # Borra un archivo y su caché binaria, si existen.
+        for p in (path, path + ".cache"):
+            if os.path.exists(p):
+                os.remove(p)
+
+    def _write_partition(self, month):
+        # Reescribe un mes desde memoria (un mes vacío se elimina). Los meses
+        # cerrados van comprimidos y sustituyen al .json que pudiera quedar.
+        # Propaga los errores de escritura.
+        records = [r.to_record() for r in self._parts.get(month, {}).values()]
+        if month < self._current_month():
+            path = self._archive_path(month)
+            if records:
+                self._write_archive(path, records)
+            else:
+                self._remove(path)
+            self._remove(self._plain_path(month))
+        elif records:
+            self._write_json(self._plain_path(month), records)
+        else:
+            self._remove(self._plain_path(month))
+
+    def _write_months(self, months, restore):
+        # Escribe los meses indicados. Si uno falla, restore() devuelve la memoria al
+        # estado anterior, los meses ya escritos se reescriben como estaban y el error
+        # se propaga (committing no sube la versión y Manager deshace el cambio).
+        written = []
+        try:
+            for month in months:
+                self._write_partition(month)
+                written.append(month)
+        except Exception:
+            restore()
+            for month in written:
+                try:
+                    self._write_partition(month)
+                except Exception as e:
+                    print(f"[ERROR] No se pudo restaurar la partición {month}: {e}")
+            raise
+
+    def _restore(self, backup):
+        # Devuelve a su contenido previo los meses de 'backup' (mes -> copia).
+        for month in backup:
+            for res_id in self._parts.get(month, {}):
+                if self._month_of.get(res_id) == month:
+                    del self._month_of[res_id]
+        for month, part in backup.items():
+            self._parts[month] = part
+            for res_id in part:
+                self._month_of[res_id] = month
+
+    # ------------------------------
+    # Carga
+    # ------------------------------
+    def _read_records(self):
+        # Registros de las particiones activas (y del archivo único anterior, si queda).
+        current = self._current_month()
+        records = list(self._read_json(self.filepath))
+        for month, (plain, _) in sorted(self._scan().items()):
+            if plain and month >= current:
+                records.extend(self._read_json(self._plain_path(month)))
+        return records
+
+    def _load(self):
+        current = self._current_month()
+        self._roll_over(current)
+        legacy = os.path.exists(self.filepath)
+        reservations, migrated = self._build_reservations(self._read_client_records(), self._read_records())
+        self._parts, self._month_of = {}, {}
+        for r in reservations:
+            self._put(r)
+        if (legacy or migrated) and self.auto_migrate:
+            try:
+                self._migrate_legacy(current)
+            except OSError as e:
+                # Los datos siguen en el archivo único; se reintenta en la próxima carga.
+                print(f"[WARN] No se pudo repartir {self.filepath} por mes: {e}")
+        return [r for month in sorted(self._parts) for r in self._parts[month].values()]
+
+    def _roll_over(self, current):
+        # Pasa al histórico los meses activos que ya cerraron. No cambia datos,
+        # solo su formato, así que no incrementa la versión del almacén.
+        for month, (plain, archived) in self._scan().items():
+            if not plain or month >= current:
+                continue
+            # Si el .gz ya existe, se escribió a partir de este mismo .json. Un .json
+            # ilegible (se lee como vacío) se deja en su lugar para no perderlo.
+            if not archived:
+                records = self._read_json(self._plain_path(month))
+                if not records:
+                    continue
+                try:
+                    self._write_archive(self._archive_path(month), records)
+                except OSError as e:
+                    # El mes queda como .json activo y se reintenta en la próxima carga.
+                    print(f"[WARN] No se pudo archivar el mes {month}: {e}")
+                    continue
+            self._remove(self._plain_path(month))
+
+    @committing
+    def _migrate_legacy(self, current):
+        # Reparte el archivo único anterior por mes. Los meses cerrados se fusionan
+        # con su histórico (si ya había uno) y dejan de estar cargados.
+        for month in [m for m in self._parts if m < current]:
+            for r in self._load_month(month):
+                self._parts[month].setdefault(r.id, r)
+        self._write_clients()
+        for month in sorted(self._parts):
+            self._write_partition(month)
+        self._remove(self.filepath)
+        for month in [m for m in self._parts if m < current]:
+            for res_id in self._parts.pop(month):
+                del self._month_of[res_id]
+
+    def _load_month(self, month):
+        # Reservas de un mes en disco (sin registrarlas como cargadas).
+        if os.path.exists(self._archive_path(month)):
+            records = self._read_archive(self._archive_path(month))
+        else:
+            records = self._read_json(self._plain_path(month))
+        reservations, _ = self._build_reservations(None, records)
+        return reservations
+
+    def _put(self, r):
+        month = _month(r.fecha)
+        self._parts.setdefault(month, {})[r.id] = r
+        self._month_of[r.id] = month
+
+    def _partition(self, month):
+        # Mes cargado; si no lo estaba (histórico sin abrir) se carga completo antes
+        # de escribirlo, para no reemplazar el archivo por una parte de su contenido.
+        part = self._parts.get(month)
+        if part is None:
+            part = self._parts[month] = {}
+            for r in self._load_month(month):
+                part[r.id] = r
+                self._month_of[r.id] = month
+        return part
+
+    # ------------------------------
+    # Histórico
+    # ------------------------------
+    def archived_months(self, fecha_desde=None, fecha_hasta=None):
+        desde = _month(fecha_desde) if fecha_desde else None
+        hasta = _month(fecha_hasta) if fecha_hasta else None
+        return sorted(m for m in self._scan() if m not in self._parts
+                      and (desde is None or m >= desde) and (hasta is None or m <= hasta))
+
+    @locked
+    def load_archive(self, months):
+        loaded = []
+        for month in months:
+            if month not in self._parts:
+                loaded.extend(self._partition(month).values())
+        return loaded
+
+    # ------------------------------
+    # Escritura
+    # ------------------------------
+    @committing
+    def save_reservations(self, reservations):
+        """Reescribe los meses de 'reservations' y los activos; el histórico sin abrir no se toca."""
+        current = self._current_month()
+        previous = {m for m in self._parts if m >= current}
+        previous |= {m for m, (plain, _) in self._scan().items() if plain and m >= current}
+        old = self._parts, self._month_of
+        self._write_clients()
+        self._parts, self._month_of = {}, {}
+        for r in reservations:
+            self._put(r)
+
+        def restore():
+            self._parts, self._month_of = old
+        self._write_months(sorted(previous | set(self._parts)), restore)
+
+    def insert_reservation(self, reservation, reservations):
+        self.apply_changes([("create", reservation)], reservations)
+
+    def update_reservation(self, reservation, reservations):
+        self.apply_changes([("update", reservation)], reservations)
+
+    def delete_reservation(self, res_id, reservations):
+        self.apply_changes([("delete", res_id)], reservations)
+
+    @committing
+    def apply_changes(self, changes, reservations):
+        # Solo se reescriben los meses afectados (el de origen y el de destino si
+        # una edición movió la reserva de mes). Se guarda una copia previa de cada
+        # mes tocado para deshacer el lote si su escritura falla.
+        if any(op == "client" for op, _ in changes):
+            self._write_clients()
+        backup = {}
+
+        def touch(month):
+            part = self._partition(month)
+            if month not in backup:
+                backup[month] = dict(part)
+            return part
+        for op, data in changes:
+            if op == "client":
+                continue
+            if op == "delete":
+                month = self._month_of.get(data)
+                if month is not None:
+                    touch(month).pop(data, None)
+                    del self._month_of[data]
+                continue
+            month = _month(data.fecha)
+            old = self._month_of.get(data.id)
+            if old is not None and old != month:
+                touch(old).pop(data.id, None)
+            touch(month)[data.id] = data
+            self._month_of[data.id] = month
+        self._write_months(sorted(backup), lambda: self._restore(backup))
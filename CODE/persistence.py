@@ -4,52 +4,324 @@
 # Juan David Rivera Durán
 
 
+import gc
 import json
 import os
+import pickle
+from contextlib import contextmanager
+import instrumentation
+from client import Client
 from reservation import Reservation
+from columnar import ReservationColumns
+from storage import Storage, locked, committing
 
-class Persistence:
-    def __init__(self, filepath="reservas.json"):
+# Campos de texto obligatorios de cada registro de reserva persistido.
+_TEXT_FIELDS = ("documento", "cancha", "fecha", "hora")
+# Campos de texto obligatorios de un cliente (también presentes en el formato plano antiguo).
+_CLIENT_FIELDS = ("nombre", "documento", "telefono", "email")
+
+
+def _check_text_fields(item, fields):
+    get = item.get
+    for key in fields:
+        value = get(key)
+        if type(value) is not str or not value:
+            raise ValueError(f"Campo '{key}' ausente o inválido.")
+
+
+def check_schema(item):
+    # Verificación estructural barata (tipos y claves), sin regex: es lo único
+    # que se comprueba en la carga confiable.
+    if type(item) is not dict:
+        raise ValueError("Registro con formato inválido.")
+    _check_text_fields(item, _TEXT_FIELDS)
+    if "nombre" in item:
+        # Registro plano antiguo: trae también los datos del cliente.
+        _check_text_fields(item, _CLIENT_FIELDS)
+    if type(item.get("id", "")) is not str or type(item.get("precio", 0.0)) not in (int, float):
+        raise ValueError("Campos 'id'/'precio' con tipo inválido.")
+    # hora_fin es opcional: los registros anteriores son reservas de una hora.
+    if type(item.get("hora_fin", "")) is not str:
+        raise ValueError("Campo 'hora_fin' con tipo inválido.")
+    # cancha_num también: sin él la reserva es de la cancha 1 de su tipo.
+    numero = item.get("cancha_num", 1)
+    if type(numero) is not int or numero < 1:
+        raise ValueError("Campo 'cancha_num' con tipo inválido.")
+
+
+def check_client_schema(item):
+    # Igual que check_schema, para registros de cliente.
+    if type(item) is not dict:
+        raise ValueError("Cliente con formato inválido.")
+    _check_text_fields(item, _CLIENT_FIELDS)
+
+
+@contextmanager
+def gc_paused():
+    # Durante una carga masiva el recolector cíclico se dispara miles de veces
+    # sin liberar nada (todos los objetos siguen vivos); se pausa y se restaura.
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+class Persistence(Storage):
+    def __init__(self, filepath="reservas.json", trusted=False, auto_migrate=True, cache=True):
+        super().__init__(filepath + ".lock")
         # Administra carga/guardado de reservas a un archivo JSON.
         self.filepath = filepath
+        # Los clientes se guardan aparte: reservas.json -> reservas.clientes.json
+        self.clients_path = os.path.splitext(filepath)[0] + ".clientes.json"
+        # trusted=True: carga rápida que solo comprueba el esquema y no revalida
+        # los datos de Client (ya se validaron al escribirse). Ver verify_reservations.
+        self.trusted = trusted
+        # auto_migrate=True: un archivo plano antiguo se reescribe normalizado al cargarlo.
+        self.auto_migrate = auto_migrate
+        # cache=True: junto a cada JSON se guarda "<archivo>.cache", una copia en pickle
+        # de sus registros que se lee en lugar de parsear el JSON mientras este no cambie.
+        # Se genera al cargar y cada escritura del JSON la descarta.
+        self.cache = cache
 
+    @locked
     def load_reservations(self):
         """Carga reservas desde el JSON. Si no existe, devuelve lista vacía."""
+        if self.trusted:
+            with gc_paused():
+                return self._load()
+        return self._load()
+
+    def _load(self):
+        reservations, migrated = self._build_reservations(self._read_client_records(), self._read_records())
+        if migrated and self.auto_migrate:
+            # Formato plano antiguo: se escribe una vez el formato normalizado
+            # (clientes aparte) para que las escrituras parciales posteriores sean coherentes.
+            self._migrate(reservations)
+        return reservations
+
+    def _migrate(self, reservations):
+        # Reescritura opcional al cargar: si falla, los datos siguen en el formato
+        # anterior y se reintenta en la próxima carga.
+        try:
+            self.save_reservations(reservations)
+        except OSError as e:
+            print(f"[WARN] No se pudo reescribir {self.filepath} al cargar: {e}")
+
+    @locked
+    def load_columns(self):
+        """Carga las reservas en un ReservationColumns (sin crear objetos por registro)."""
+        cols = ReservationColumns()
+        with gc_paused():
+            clients = {c.get("documento"): c for c in self._read_client_records() if type(c) is dict}
+            for item in self._read_records():
+                try:
+                    check_schema(item)
+                    if "nombre" not in item:
+                        # Registro normalizado: se completa con los datos del cliente.
+                        item = {**clients[item["documento"]], **item}
+                    cols.append(item)
+                except (ValueError, KeyError) as e:
+                    print(f"[WARN] Reserva inválida ignorada: {e}")
+        return cols
+
+    def _read_json(self, path):
+        # Lee un archivo JSON como lista de dicts, sin construir objetos.
         # Si el archivo no existe, retornamos lista vacía (caso inicial).
-        if not os.path.exists(self.filepath):
+        if not os.path.exists(path):
             return []
 
         try:
-            # Intento de leer y parsear JSON.
-            with open(self.filepath, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            # Intento de leer y parsear JSON (o su caché binaria, si sigue vigente).
+            with open(path, "r", encoding="utf-8") as f:
+                # La firma se toma del archivo abierto: si otro proceso lo reemplaza
+                # mientras se lee, la caché queda asociada a lo que realmente se leyó.
+                signature = self._signature(os.fstat(f.fileno()))
+                data = self._read_cache(path, signature) if self.cache else None
+                if data is None:
+                    data = json.load(f)
+                    instrumentation.count("storage.bytes_read", signature[0])
+                    if self.cache:
+                        self._write_cache(path, signature, data)
+                else:
+                    instrumentation.count("storage.cache_hits")
         except (json.JSONDecodeError, FileNotFoundError):
             # Si el JSON está corrupto o hubo error, tratamos como sin datos.
             data = []
+        return data
 
+    # ------------------------------
+    # Caché binaria de los JSON
+    # ------------------------------
+    # "<archivo>.cache" contiene dos pickles: la firma (tamaño, mtime) del JSON del
+    # que se sacó y sus registros. Solo se usa si la firma coincide con el JSON
+    # actual, así que cualquier edición externa (o de otro proceso) la invalida.
+    # Vive junto a los datos: quien puede escribirla ya puede escribir el JSON.
+    @staticmethod
+    def _signature(st):
+        return (st.st_size, st.st_mtime_ns)
+
+    @staticmethod
+    def _read_cache(path, signature):
+        try:
+            with open(path + ".cache", "rb") as f:
+                if pickle.load(f) != signature:
+                    return None
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            # Caché dañada o de otra versión: se ignora y se vuelve a generar.
+            print(f"[WARN] Caché ignorada ({path}.cache): {e}")
+            return None
+
+    @staticmethod
+    def _write_cache(path, signature, data):
+        cache_path = path + ".cache"
+        temp_path = cache_path + ".tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                pickle.dump(signature, f, pickle.HIGHEST_PROTOCOL)
+                pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, cache_path)
+        except Exception as e:
+            # Sin caché solo se pierde velocidad en el próximo arranque.
+            print(f"[WARN] No se pudo escribir la caché {cache_path}: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    @staticmethod
+    def _remove_cache(path):
+        try:
+            os.remove(path + ".cache")
+        except FileNotFoundError:
+            pass
+
+    def _read_records(self):
+        return self._read_json(self.filepath)
+
+    def _read_client_records(self):
+        return self._read_json(self.clients_path)
+
+    def _build_client(self, item):
+        # Client validado o, en modo confiable, construido directamente.
+        if self.trusted:
+            check_client_schema(item)
+            return Client.from_trusted(item["nombre"], item["documento"], item["telefono"], item["email"])
+        return Client(item["nombre"], item["documento"], item["telefono"], item["email"])
+
+    def _build_reservations(self, client_records, data):
+        # Reconstruye el registro de clientes y las reservas que lo referencian.
+        # Devuelve (reservas, migrated); migrated indica que había registros planos antiguos.
+        # client_records=None conserva el registro actual (carga de reservas adicionales).
+        if client_records is not None:
+            self.clients.clear()
+            for item in client_records:
+                try:
+                    self.clients.upsert(self._build_client(item))
+                except Exception as e:
+                    print(f"[WARN] Cliente inválido ignorado: {e}")
+                    instrumentation.count("storage.clients_rejected")
+
+        build = Reservation.from_trusted_dict if self.trusted else Reservation.from_dict
         reservations = []
+        migrated = False
+        rejected = 0
         for item in data:
             try:
                 # Se intenta reconstruir cada reserva; si falla, se ignora y se loggea advertencia.
-                reservations.append(Reservation.from_dict(item))
+                if self.trusted:
+                    check_schema(item)
+                if "nombre" in item:
+                    # Formato plano antiguo: el cliente se extrae al registro.
+                    client, _ = self.clients.upsert(self._build_client(item))
+                    migrated = True
+                else:
+                    client = self.clients.get(item["documento"])
+                    if client is None:
+                        raise ValueError(f"Cliente {item['documento']} no registrado.")
+                reservations.append(build(item, client))
             except Exception as e:
                 # Impresión simple a stdout; en producción convendría logging estructurado.
                 print(f"[WARN] Reserva inválida ignorada: {e}")
-        return reservations
+                rejected += 1
+        instrumentation.count("storage.records_loaded", len(reservations))
+        instrumentation.count("storage.records_rejected", rejected)
+        return reservations, migrated
 
+    @committing
     def save_reservations(self, reservations):
-        """Guarda la lista de reservas de forma atómica."""
-        # Serializa la lista de Reservation a lista de dicts.
-        data = [r.to_dict() for r in reservations]
-        temp_path = self.filepath + ".tmp"
+        """Guarda clientes y reservas de forma atómica (cada archivo por separado)."""
+        # Primero los clientes: una reserva nunca debe referenciar un cliente no guardado.
+        self._write_clients()
+        self._save_records(reservations)
+
+    def _save_records(self, reservations):
+        # Serializa la lista de Reservation a registros normalizados.
+        self._write_snapshot([r.to_record() for r in reservations])
+
+    # ------------------------------
+    # Cambios por registro
+    # ------------------------------
+    # En JSON no hay escritura parcial: se reescribe el archivo de reservas y,
+    # solo si cambió algún cliente, el de clientes.
+    @committing
+    def insert_reservation(self, reservation, reservations):
+        self._save_records(reservations)
+
+    @committing
+    def update_reservation(self, reservation, reservations):
+        self._save_records(reservations)
+
+    @committing
+    def delete_reservation(self, res_id, reservations):
+        self._save_records(reservations)
+
+    @committing
+    def apply_changes(self, changes, reservations):
+        if any(op == "client" for op, _ in changes):
+            self._write_clients()
+        self._save_records(reservations)
+
+    @committing
+    def save_client(self, client, reservations):
+        self._write_clients()
+
+    # ------------------------------
+    # Escritura de archivos
+    # ------------------------------
+    def _write_clients(self, fsync=False):
+        self._write_json(self.clients_path, self.clients.to_records(), fsync)
+
+    def _write_snapshot(self, data, fsync=False):
+        # Escribe la lista de registros de reservas completa; con fsync=True se fuerza
+        # a disco antes del reemplazo (lo usa el modo journal antes de truncar el log).
+        self._write_json(self.filepath, data, fsync)
+
+    def _write_json(self, path, data, fsync=False):
+        # Si falla, limpia el temporal y propaga el error: la escritura no cuenta como
+        # confirmada (committing no sube la versión y Manager deshace o conserva el cambio).
+        temp_path = path + ".tmp"
         try:
             # Escritura en archivo temporal para evitar corrupción si falla a mitad.
             with open(temp_path, "w", encoding="utf-8") as f:
                 json.dump(data, f, ensure_ascii=False, indent=2)
+                f.flush()
+                if fsync:
+                    os.fsync(f.fileno())
+                size = f.tell()
+            if self.cache:
+                # La caché se descarta (no se reescribe en cada guardado) y la próxima
+                # carga la regenera. Se quita antes del reemplazo: con igual tamaño y
+                # mtime en la misma marca de tiempo, la firma no bastaría para invalidarla.
+                self._remove_cache(path)
             # Reemplazo atómico (en la mayoría de OS) del archivo original.
-            os.replace(temp_path, self.filepath)
-        except Exception as e:
-            # Si hay error, se limpia el archivo temporal y se reporta.
-            print(f"[ERROR] No se pudo guardar reservas: {e}")
+            os.replace(temp_path, path)
+        except Exception:
+            # Si hay error, se limpia el archivo temporal y se propaga.
             if os.path.exists(temp_path):
-                os.remove(temp_path)
\ No newline at end of file
+                os.remove(temp_path)
+            raise
+        instrumentation.count("storage.bytes_written", size)
@@ -0,0 +1,236 @@
+# Juan David Ocampo Gutierrez
+# Nicolás Castro Pacheco
+# Michell Valencia Berdugo
+# Juan David Rivera Durán
+
+"""
+pricing.py
+----------
+
+Configuración de canchas y tarifas (archivo JSON) y su tabla de precios
+precalculada.
+
+Formato del archivo (todas las claves salvo "canchas" son opcionales):
+
+    {
+      "canchas": [
+        {"tipo": "Sintética", "precio_por_hora": 5.0, "cantidad": 6},
+        {"tipo": "Vóley", "precio_por_hora": 7.5}
+      ],
+      "reglas": [
+        {"dias": ["lun", "mar", "mie", "jue", "vie"], "desde": "18:00", "hasta": "22:00", "factor": 1.5},
+        {"dias": ["sab", "dom", "festivo"], "factor": 1.2},
+        {"canchas": ["Vóley"], "dias": ["festivo"], "precio_por_hora": 12.0}
+      ],
+      "festivos": ["2025-12-25"],
+      "socios": {"descuento": 0.1, "documentos": ["1234567"]}
+    }
+
+Cada regla se aplica, en orden, a las franjas que cumplen sus filtros
+(canchas, días, desde/hasta; sin filtro = todas): "factor" multiplica la
+tarifa vigente de la franja y "precio_por_hora" la reemplaza. Los festivos
+usan las reglas de "festivo" en lugar de las de su día de la semana. Los
+socios (por documento) tienen un descuento sobre el total.
+
+Al cargar, las reglas se compilan en una tabla por (tipo, día, bloque de
+GRANULARIDAD minutos) con sumas acumuladas: el precio de cualquier
+intervalo es una resta de dos posiciones, sin recorrer reglas.
+"""
+
+import json
+import os
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Días de la semana (índice de date.weekday()) y el índice de los festivos.
+DIAS = ("lun", "mar", "mie", "jue", "vie", "sab", "dom")
+FESTIVO = len(DIAS)
+# Nombres aceptados en "dias" (con y sin tilde).
+_DIA_INDICE = {**{d: i for i, d in enumerate(DIAS)}, "mié": 2, "sáb": 5, "festivo": FESTIVO}
+
+_CLAVES_CANCHA = {"tipo", "precio_por_hora", "cantidad"}
+_CLAVES_REGLA = {"canchas", "dias", "desde", "hasta", "factor", "precio_por_hora"}
+_CLAVES_CONFIG = {"canchas", "reglas", "festivos", "socios"}
+
+
+def _minutes(hora, campo) -> int:
+    # "H:MM" -> minutos; ValueError con el nombre del campo si el formato es inválido.
+    try:
+        h, _, m = hora.partition(":")
+        minutes = int(h) * 60 + int(m or 0)
+    except (AttributeError, ValueError):
+        raise ValueError(f"Hora inválida en '{campo}': {hora!r}")
+    if not 0 <= minutes <= 24 * 60:
+        raise ValueError(f"Hora inválida en '{campo}': {hora!r}")
+    return minutes
+
+
+def _number(value, campo) -> float:
+    if type(value) not in (int, float) or value < 0:
+        raise ValueError(f"'{campo}' debe ser un número no negativo.")
+    return float(value)
+
+
+class PricingTable:
+    """Tarifas compiladas: precio de un intervalo en tiempo constante."""
+
+    def __init__(self, courts: Iterable[Tuple[str, float, int]], rules: Iterable[Dict] = (),
+                 holidays: Iterable[str] = (), members: Optional[Dict] = None, granularity: int = 30):
+        self.granularity = granularity
+        blocks = 24 * 60 // granularity
+        # (tipo, precio base por hora, cantidad), en el orden del archivo.
+        self.courts: List[Tuple[str, float, int]] = list(courts)
+        self._base = {tipo: precio for tipo, precio, _ in self.courts}
+        # Tarifa por hora de cada bloque: tipo -> día (0-6, FESTIVO) -> [tarifa por bloque].
+        rates = {tipo: [[precio] * blocks for _ in range(FESTIVO + 1)] for tipo, precio, _ in self.courts}
+        for n, rule in enumerate(rules):
+            self._apply_rule(rates, rule, n, blocks)
+        # Sumas acumuladas del costo de cada bloque: prefix[i] = costo de [0, i) bloques.
+        self._prefix: Dict[Tuple[str, int], List[float]] = {}
+        for tipo, dias in rates.items():
+            for dia, day_rates in enumerate(dias):
+                acc, prefix = 0.0, [0.0]
+                for rate in day_rates:
+                    acc += rate * granularity / 60
+                    prefix.append(acc)
+                self._prefix[(tipo, dia)] = prefix
+        self._holidays = frozenset(holidays)
+        members = members or {}
+        self._discount = members.get("descuento", 0.0)
+        self._members = frozenset(members.get("documentos", ()))
+
+    def _apply_rule(self, rates, rule, n, blocks) -> None:
+        # Aplica una regla sobre las tarifas por bloque (ValueError si es inválida).
+        campo = f"reglas[{n}]"
+        if not isinstance(rule, dict) or set(rule) - _CLAVES_REGLA:
+            raise ValueError(f"{campo}: regla inválida (claves permitidas: {', '.join(sorted(_CLAVES_REGLA))}).")
+        if ("factor" in rule) == ("precio_por_hora" in rule):
+            raise ValueError(f"{campo}: debe indicar 'factor' o 'precio_por_hora' (solo uno).")
+        tipos = rule.get("canchas", list(rates))
+        if not isinstance(tipos, list) or not all(isinstance(t, str) for t in tipos):
+            raise ValueError(f"{campo}: 'canchas' debe ser una lista de tipos de cancha.")
+        unknown = [t for t in tipos if t not in rates]
+        if unknown:
+            raise ValueError(f"{campo}: cancha desconocida {', '.join(map(str, unknown))}.")
+        try:
+            dias = [_DIA_INDICE[d] for d in rule.get("dias", DIAS + ("festivo",))]
+        except (KeyError, TypeError):
+            raise ValueError(f"{campo}: días válidos: {', '.join(DIAS)}, festivo.")
+        start = _minutes(rule.get("desde", "0:00"), f"{campo}.desde")
+        end = _minutes(rule.get("hasta", "24:00"), f"{campo}.hasta")
+        if end <= start:
+            raise ValueError(f"{campo}: 'hasta' debe ser posterior a 'desde'.")
+        # Bloques que toca la franja (una franja a mitad de bloque lo cubre entero).
+        span = range(start // self.granularity, min(-(-end // self.granularity), blocks))
+        if "factor" in rule:
+            factor = _number(rule["factor"], f"{campo}.factor")
+            apply = lambda rate: rate * factor
+        else:
+            precio = _number(rule["precio_por_hora"], f"{campo}.precio_por_hora")
+            apply = lambda rate: precio
+        for tipo in tipos:
+            for dia in dias:
+                day_rates = rates[tipo][dia]
+                for i in span:
+                    day_rates[i] = apply(day_rates[i])
+
+    def base_rate(self, tipo: str) -> float:
+        # Tarifa por hora sin reglas (0.0 si el tipo no existe).
+        return self._base.get(tipo, 0.0)
+
+    def day_index(self, fecha: str) -> int:
+        # Día de la tabla: FESTIVO o el día de la semana (0 = lunes).
+        return FESTIVO if fecha in self._holidays else date.fromisoformat(fecha).weekday()
+
+    def price(self, tipo: str, fecha: str, start: int, end: int, documento: Optional[str] = None) -> float:
+        """Precio de [start, end) (minutos) en la fecha; con descuento si documento es socio."""
+        prefix = self._prefix.get((tipo, self.day_index(fecha)))
+        if prefix is None:
+            return 0.0
+        g = self.granularity
+        total = prefix[-(-end // g)] - prefix[start // g]
+        if documento is not None and documento in self._members:
+            total *= 1 - self._discount
+        return round(total, 2)
+
+
+class PricingConfig:
+    """
+    Archivo de configuración de canchas y tarifas con recarga en caliente:
+    reload() vuelve a compilar la tabla solo si el archivo cambió.
+    """
+
+    def __init__(self, path: str, default_courts: Iterable[Tuple[str, float, int]], granularity: int = 30):
+        self.path = path
+        self.granularity = granularity
+        # Sin archivo se usan estas canchas, sin reglas.
+        self._default_courts = list(default_courts)
+        self._signature = None
+        self.table = self._load()
+
+    def _stat(self):
+        # Firma (tamaño, mtime) del archivo, o None si no existe.
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    def _load(self) -> PricingTable:
+        # Lee y compila el archivo (ValueError con el motivo si es inválido). La firma
+        # se registra aunque falle: un archivo inválido se informa una sola vez y se
+        # vuelve a leer cuando cambie de nuevo.
+        signature = self._signature = self._stat()
+        if signature is None:
+            return PricingTable(self._default_courts, granularity=self.granularity)
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            raise ValueError(f"No se pudo leer {self.path}: {e}")
+        return self._compile(data)
+
+    def _compile(self, data) -> PricingTable:
+        if not isinstance(data, dict) or set(data) - _CLAVES_CONFIG:
+            raise ValueError(f"{self.path}: claves permitidas: {', '.join(sorted(_CLAVES_CONFIG))}.")
+        courts = []
+        for n, item in enumerate(data.get("canchas") or ()):
+            campo = f"canchas[{n}]"
+            if not isinstance(item, dict) or set(item) - _CLAVES_CANCHA or \
+                    not isinstance(item.get("tipo"), str) or not item["tipo"].strip():
+                raise ValueError(f"{campo}: se espera {{\"tipo\", \"precio_por_hora\", \"cantidad\"}}.")
+            cantidad = item.get("cantidad", 1)
+            if type(cantidad) is not int or cantidad < 1:
+                raise ValueError(f"{campo}: 'cantidad' debe ser un entero positivo.")
+            courts.append((item["tipo"], _number(item.get("precio_por_hora"), f"{campo}.precio_por_hora"), cantidad))
+        if not courts:
+            raise ValueError(f"{self.path}: no define canchas.")
+        if len({tipo for tipo, _, _ in courts}) != len(courts):
+            raise ValueError(f"{self.path}: tipo de cancha repetido.")
+        if not isinstance(data.get("reglas", []), list):
+            raise ValueError(f"{self.path}: 'reglas' debe ser una lista.")
+        festivos = data.get("festivos", [])
+        if not isinstance(festivos, list):
+            raise ValueError(f"{self.path}: 'festivos' debe ser una lista de fechas (YYYY-MM-DD).")
+        for fecha in festivos:
+            try:
+                date.fromisoformat(fecha)
+            except (TypeError, ValueError):
+                raise ValueError(f"{self.path}: festivo inválido {fecha!r} (use YYYY-MM-DD).")
+        members = data.get("socios") or {}
+        if not isinstance(members, dict) or not 0 <= _number(members.get("descuento", 0.0), "socios.descuento") <= 1 \
+                or not isinstance(members.get("documentos", []), list) \
+                or not all(isinstance(doc, str) for doc in members.get("documentos", [])):
+            raise ValueError(f"{self.path}: 'socios' espera {{\"descuento\" (0 a 1), \"documentos\": [...]}}.")
+        return PricingTable(courts, data.get("reglas", ()), festivos, members, self.granularity)
+
+    def changed(self) -> bool:
+        """True si el archivo cambió desde la última lectura (solo un stat)."""
+        return self._stat() != self._signature
+
+    def reload(self) -> bool:
+        """Recompila si el archivo cambió. True si hay tabla nueva; si es inválido, ValueError."""
+        if not self.changed():
+            return False
+        self.table = self._load()
+        return True
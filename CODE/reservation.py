@@ -8,33 +8,78 @@ reservation.py
 ---------------
 
 Define la clase Reservation que vincula un Client y una Court
-en una fecha y hora específicas.
+en una fecha y un intervalo de horas [hora, hora_fin).
+
+Los registros anteriores a hora_fin (reservas de una hora fija) se
+cargan como intervalos de DURACION_DEFECTO minutos, y los anteriores a
+cancha_num (una sola cancha por tipo), en la cancha 1 de su tipo.
 """
 
 from datetime import datetime
+from functools import lru_cache
 from client import Client
 from court import Court
+import sys
 import uuid
 
+# Duración (minutos) de las reservas guardadas sin hora_fin.
+DURACION_DEFECTO = 60
+
+
+@lru_cache(maxsize=1024)
+def hora_to_minutes(hora: str) -> int:
+    # "H:MM" -> minutos desde la medianoche. Las horas distintas son pocas: se memoriza.
+    # Lanza ValueError si el formato es inválido.
+    h, _, m = hora.partition(":")
+    minutes = int(m or 0)
+    if not 0 <= minutes < 60:
+        raise ValueError(f"Hora inválida: {hora}")
+    return int(h) * 60 + minutes
+
+
+def minutes_to_hora(minutes: int) -> str:
+    # 630 -> "10:30" (mismo formato que las horas guardadas).
+    return f"{minutes // 60}:{minutes % 60:02d}"
+
+
+@lru_cache(maxsize=1024)
+def default_hora_fin(hora: str) -> str:
+    # Fin de una reserva guardada sin hora_fin (internado: se repite en miles de registros).
+    return sys.intern(minutes_to_hora(hora_to_minutes(hora) + DURACION_DEFECTO))
+
+
+def price_for(court: Court, hora: str, hora_fin: str) -> float:
+    # Precio de la cancha proporcional a la duración del intervalo.
+    return round(court.precio_por_hora * (hora_to_minutes(hora_fin) - hora_to_minutes(hora)) / 60, 2)
+
+
 class Reservation:
     """
     Representa una reserva completa.
     """
-    
-    def __init__(self, client: Client, court: Court, fecha: str, hora: str, id: str = None):
+
+    # Sin __dict__ por instancia: con cientos de miles de reservas el ahorro es grande.
+    __slots__ = ("id", "client", "court", "fecha", "hora", "hora_fin", "precio")
+
+    def __init__(self, client: Client, court: Court, fecha: str, hora: str, id: str = None,
+                 hora_fin: str = None, precio: float = None):
         # id: si no se provee, se genera un UUID4 en formato string.
         self.id = id or str(uuid.uuid4())
         self.client = client
         self.court = court
-        self.fecha = fecha
-        self.hora = hora
-        # Precio se toma directamente del objeto Court en el momento de creación.
-        self.precio = court.precio_por_hora
+        # Fechas y horas se repiten en miles de reservas: se internan para compartir el string.
+        self.fecha = sys.intern(fecha)
+        self.hora = sys.intern(hora)
+        # Fin del intervalo (exclusivo); por defecto, una hora después del inicio.
+        self.hora_fin = sys.intern(hora_fin) if hora_fin else default_hora_fin(hora)
+        # Precio: tarifa por hora de la Court en el momento de creación, según la duración
+        # (al reconstruir desde disco se conserva el guardado).
+        self.precio = price_for(court, self.hora, self.hora_fin) if precio is None else precio
 
     def to_dict(self):
-        # Devuelve un dict "plano" que contiene los campos usados en UI/persistencia.
-        # Observación: contiene los datos del cliente duplicados (nombre, documento...) en vez de
-        # referenciar un objeto cliente. Esto facilita la persistencia JSON simple.
+        # Devuelve un dict "plano" que contiene los campos usados en UI/exportación.
+        # Observación: contiene los datos del cliente duplicados (nombre, documento...);
+        # para persistir se usa to_record(), que solo referencia al cliente por documento.
         return {
             "id": self.id,
             "nombre": self.client.nombre,
@@ -42,21 +87,64 @@ class Reservation:
             "telefono": self.client.telefono,
             "email": self.client.email,
             "cancha": self.court.tipo,
+            "cancha_num": self.court.numero,
+            "fecha": self.fecha,
+            "hora": self.hora,
+            "hora_fin": self.hora_fin,
+            "precio": self.precio
+        }
+
+    def to_record(self):
+        # Registro normalizado para persistencia: el cliente se referencia por documento
+        # y sus datos viven en el registro de clientes (ver client_registry.py).
+        return {
+            "id": self.id,
+            "documento": self.client.documento,
+            "cancha": self.court.tipo,
+            "cancha_num": self.court.numero,
             "fecha": self.fecha,
             "hora": self.hora,
+            "hora_fin": self.hora_fin,
             "precio": self.precio
         }
 
     @classmethod
-    def from_dict(cls, data: dict):
-        # Reconstruye Reservation desde el dict guardado.
-        # Nota: al crear Client y Court a partir de los campos planos, se validan los datos
-        # de cliente mediante las validaciones de Client. Si los datos son inválidos, se lanzará excepción.
-        client = Client(data["nombre"], data["documento"], data["telefono"], data["email"])
-        # Para Court se toma el tipo y se usa 'precio' si está disponible en el dict.
-        court = Court(data["cancha"], data.get("precio", 0.0))
-        return cls(client, court, data["fecha"], data["hora"], id=data.get("id"))
+    def from_dict(cls, data: dict, client: Client = None):
+        # Reconstruye Reservation desde el dict guardado (plano o normalizado).
+        # Nota: si no se pasa 'client', se crea a partir de los campos planos y se validan
+        # sus datos mediante las validaciones de Client. Si son inválidos, se lanzará excepción.
+        if client is None:
+            client = Client(data["nombre"], data["documento"], data["telefono"], data["email"])
+        # Para Court se toma el tipo y el número (1 si falta) y se reutiliza la instancia
+        # canónica en lugar de crear una por reserva; su tarifa por hora es la de la
+        # configuración, no el total guardado.
+        # Sin hora_fin (registros de una hora fija) se asume DURACION_DEFECTO; el precio
+        # guardado se conserva tal cual.
+        precio = data.get("precio", 0.0)
+        court = Court.canonical(data["cancha"], data.get("cancha_num") or 1)
+        obj = cls(client, court, data["fecha"], data["hora"], id=data.get("id"),
+                  hora_fin=data.get("hora_fin"), precio=precio)
+        if hora_to_minutes(obj.hora_fin) <= hora_to_minutes(obj.hora):
+            raise ValueError(f"Intervalo inválido: {obj.hora} - {obj.hora_fin}")
+        return obj
+
+    @classmethod
+    def from_trusted_dict(cls, data: dict, client: Client = None):
+        # Variante rápida de from_dict para archivos propios ya validados al escribirse:
+        # no ejecuta las validaciones de Client (ver Client.from_trusted) y asigna los
+        # atributos directamente.
+        precio = data.get("precio", 0.0)
+        obj = cls.__new__(cls)
+        obj.id = data.get("id") or str(uuid.uuid4())
+        obj.client = client or Client.from_trusted(data["nombre"], data["documento"], data["telefono"], data["email"])
+        obj.court = Court.canonical(data["cancha"], data.get("cancha_num") or 1)
+        obj.fecha = sys.intern(data["fecha"])
+        obj.hora = sys.intern(data["hora"])
+        hora_fin = data.get("hora_fin")
+        obj.hora_fin = sys.intern(hora_fin) if hora_fin else default_hora_fin(obj.hora)
+        obj.precio = precio
+        return obj
 
     def __repr__(self):
         # Representación útil para logging/depuración.
-        return f"Reservation({self.client.nombre} - {self.court.tipo} - {self.fecha} {self.hora})"
\ No newline at end of file
+        return f"Reservation({self.client.nombre} - {self.court.nombre} - {self.fecha} {self.hora}-{self.hora_fin})"
\ No newline at end of file
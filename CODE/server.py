@@ -0,0 +1,463 @@
+# Juan David Ocampo Gutierrez
+# Nicolás Castro Pacheco
+# Michell Valencia Berdugo
+# Juan David Rivera Durán
+
+"""
+server.py
+---------
+
+API HTTP/JSON sin interfaz gráfica sobre Manager (asyncio, solo biblioteca
+estándar), para kioscos y el sitio web:
+
+    python server.py --host 0.0.0.0 --port 8080
+
+Rutas:
+ - GET    /canchas                          -> [{"tipo", "precio", "cantidad"}]
+ - GET    /reservas?offset=&limit=&sort_by=&descending=&documento=&fecha=&cancha=
+                                            -> {"total", "offset", "limit", "items"}
+ - POST   /reservas                         -> 201 reserva creada
+ - GET    /reservas/<id>                    -> reserva
+ - PATCH  /reservas/<id>                    -> reserva editada
+ - DELETE /reservas/<id>                    -> 204
+ - GET    /disponibilidad?cancha=&fecha=&hora=[&hora_fin=][&cancha_num=]
+                                            -> {"disponible": bool, "libres": [números]}
+ - GET    /disponibilidad?fecha_inicio=&fecha_fin=[&cancha=] -> grilla de ocupación
+ - GET    /horarios?cancha=[&fecha_inicio=][&fecha_fin=][&duracion=][&horas=10:00,18:30][&dias=sab,dom][&k=]
+                                            -> primeros horarios libres [{"fecha", "hora", "hora_fin", "libres"}]
+ - GET    /reportes/ocupacion?[periodo=dia|semana|mes][&fecha_desde=][&fecha_hasta=][&cancha=]
+                                            -> ocupación e ingresos por cancha y periodo
+ - GET    /reportes/horas?[cancha=]         -> actividad por día de la semana y hora
+ - GET    /precio?cancha=&fecha=&hora=[&hora_fin=][&documento=]
+                                            -> {"precio": float} según las tarifas vigentes
+ - GET    /metricas                         -> instrumentation.stats() (RESERVAS_METRICS=1)
+
+Las lecturas se atienden en el hilo del event loop (Manager no toma lock
+para leer). Las escrituras van a un único hilo, así los conflictos de
+slot se deciden en orden de llegada, y Manager trabaja en modo
+write-behind: las escrituras de muchos clientes se vuelcan juntas (group
+commit) y cada respuesta se envía solo cuando su cambio ya está en disco.
+Si antes del volcado otro proceso tomó el mismo horario, el cambio se
+descarta y la petición recibe 409.
+
+ApiTestClient permite probar la API en el mismo proceso, sin sockets.
+"""
+
+import argparse
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+import instrumentation
+from manager import Manager
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class _GroupCommit:
+    # Agrupa las esperas de durabilidad: un solo Manager.flush() cubre a todas
+    # las peticiones cuyas escrituras se aplicaron antes de empezar el volcado.
+    def __init__(self, manager, window):
+        self.manager = manager
+        self.window = window
+        self._waiters = []
+        self._task = None
+
+    async def wait(self):
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while self._waiters:
+            # Ventana breve para que más peticiones entren en el mismo volcado.
+            await asyncio.sleep(self.window)
+            waiters, self._waiters = self._waiters, []
+            try:
+                await loop.run_in_executor(None, self.manager.flush)
+            except Exception as e:
+                for future in waiters:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for future in waiters:
+                    if not future.done():
+                        future.set_result(None)
+
+
+class ReservasApp:
+    # Ventana (segundos) de agrupación de escrituras y de revisión de otros procesos.
+    COMMIT_WINDOW = 0.005
+    REFRESH_INTERVAL = 1.0
+    # Límite de filas por página en GET /reservas.
+    MAX_LIMIT = 1000
+
+    def __init__(self, manager=None):
+        # El propio servidor agrupa los volcados; el hilo write-behind de Manager
+        # queda como respaldo (escribe lo que nadie haya volcado aún).
+        self.manager = manager or Manager(write_behind=True, on_error=self._log_error)
+        # Un solo hilo de escritura: las mutaciones se serializan en orden de llegada.
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="api-writer")
+        self._commit = None
+        self._routes = [
+            ("GET", ("canchas",), self._list_courts),
+            ("GET", ("reservas",), self._list_reservations),
+            ("POST", ("reservas",), self._create_reservation),
+            ("GET", ("reservas", None), self._get_reservation),
+            ("PATCH", ("reservas", None), self._edit_reservation),
+            ("DELETE", ("reservas", None), self._cancel_reservation),
+            ("GET", ("disponibilidad",), self._availability),
+            ("GET", ("horarios",), self._free_slots),
+            ("GET", ("precio",), self._quote),
+            ("GET", ("reportes", "ocupacion"), self._usage_report),
+            ("GET", ("reportes", "horas"), self._hour_report),
+            ("GET", ("metricas",), self._metrics),
+        ]
+
+    @staticmethod
+    def _log_error(error):
+        print(f"[ERROR] {error}")
+
+    # ------------------------------
+    # Despacho
+    # ------------------------------
+    async def handle(self, method, target, body=b""):
+        """Atiende una petición. Devuelve (status, payload JSON o None)."""
+        if self._commit is None:
+            self._commit = _GroupCommit(self.manager, self.COMMIT_WINDOW)
+        url = urlsplit(target)
+        parts = tuple(p for p in url.path.split("/") if p)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        try:
+            handler, args, allowed = self._match(method, parts)
+            if handler is None:
+                if allowed:
+                    raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED, "Método no permitido.")
+                raise HttpError(HTTPStatus.NOT_FOUND, "Ruta no encontrada.")
+            data = None
+            if method in ("POST", "PATCH"):
+                try:
+                    data = json.loads(body or b"{}")
+                except ValueError:
+                    raise HttpError(HTTPStatus.BAD_REQUEST, "JSON inválido.")
+                if not isinstance(data, dict):
+                    raise HttpError(HTTPStatus.BAD_REQUEST, "Se esperaba un objeto JSON.")
+            return await handler(*args, query=query, data=data)
+        except HttpError as e:
+            return e.status, {"error": str(e)}
+        except ValueError as e:
+            # Las validaciones de Manager son ValueError con mensajes para el usuario.
+            return HTTPStatus.BAD_REQUEST, {"error": str(e)}
+        except Exception as e:
+            print(f"[ERROR] {method} {target}: {e}")
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Error interno."}
+
+    def _match(self, method, parts):
+        allowed = False
+        for route_method, pattern, handler in self._routes:
+            if len(pattern) != len(parts) or any(p is not None and p != part for p, part in zip(pattern, parts)):
+                continue
+            if route_method == method:
+                return handler, [part for p, part in zip(pattern, parts) if p is None], True
+            allowed = True
+        return None, [], allowed
+
+    async def _write(self, res_id, fn, *args, **kwargs):
+        # Aplica la mutación en el hilo de escritura y espera a que sea durable.
+        # res_id es la reserva afectada (None en un alta: es la que devuelve fn).
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(self._writer, lambda: fn(*args, **kwargs))
+        try:
+            await self._commit.wait()
+        except Exception as e:
+            print(f"[ERROR] Volcado de escrituras: {e}")
+            raise HttpError(HTTPStatus.SERVICE_UNAVAILABLE, "No se pudo guardar el cambio; se reintentará.")
+        # Al reaplicarlo sobre lo que escribió otro proceso, el cambio pudo descartarse.
+        reason = self.manager.take_dropped(result.id if res_id is None else res_id)
+        if reason is not None:
+            raise HttpError(HTTPStatus.CONFLICT, reason)
+        return result
+
+    def _reservation_or_404(self, res_id):
+        r = self.manager.get_reservation_by_id(res_id)
+        if r is None:
+            raise HttpError(HTTPStatus.NOT_FOUND, "Reserva no encontrada.")
+        return r
+
+    # ------------------------------
+    # Rutas
+    # ------------------------------
+    async def _list_courts(self, query, data):
+        return HTTPStatus.OK, [{"tipo": t, "precio": self.manager.get_price_for_court(t),
+                                "cantidad": self.manager.get_court_count(t)}
+                               for t in self.manager.get_court_types()]
+
+    async def _list_reservations(self, query, data):
+        try:
+            offset = int(query.get("offset", 0))
+            limit = min(int(query.get("limit", 100)), self.MAX_LIMIT)
+        except ValueError:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "offset y limit deben ser enteros.")
+        filters = {k: query[k] for k in ("documento", "fecha", "cancha") if k in query}
+        items = self.manager.get_reservations_page(
+            offset, limit, query.get("sort_by"), query.get("descending") in ("1", "true"), **filters)
+        return HTTPStatus.OK, {"total": self.manager.count_reservations(**filters),
+                               "offset": offset, "limit": limit, "items": items}
+
+    @staticmethod
+    def _invalid_fields(data):
+        # Campos presentes con un tipo que no corresponde: texto, salvo cancha_num (entero).
+        # hora_fin y cancha_num admiten null (duración por defecto, cancha asignada).
+        return [f for f, v in data.items()
+                if not (v is None and f in ("hora_fin", "cancha_num"))
+                and (type(v) is not int if f == "cancha_num" else not isinstance(v, str))]
+
+    async def _create_reservation(self, query, data):
+        fields = ("nombre", "documento", "telefono", "email", "cancha", "fecha", "hora")
+        missing = [f for f in fields if f not in data]
+        missing += self._invalid_fields({f: v for f, v in data.items() if f in fields + ("hora_fin", "cancha_num")})
+        if missing:
+            raise HttpError(HTTPStatus.BAD_REQUEST, f"Campos faltantes o inválidos: {', '.join(missing)}")
+        # hora_fin es opcional: sin ella la reserva dura una hora. cancha_num también:
+        # sin él se asigna una cancha libre del tipo.
+        r = await self._write(None, self.manager.create_reservation, **{f: data[f] for f in fields},
+                              hora_fin=data.get("hora_fin"), cancha_num=data.get("cancha_num"))
+        return HTTPStatus.CREATED, r.to_dict()
+
+    async def _get_reservation(self, res_id, query, data):
+        return HTTPStatus.OK, self._reservation_or_404(res_id).to_dict()
+
+    async def _edit_reservation(self, res_id, query, data):
+        self._reservation_or_404(res_id)
+        fields = ("nombre", "documento", "telefono", "email", "cancha", "cancha_num", "fecha", "hora", "hora_fin")
+        unknown = sorted(set(data) - set(fields))
+        if unknown:
+            raise HttpError(HTTPStatus.BAD_REQUEST, f"Campos desconocidos: {', '.join(unknown)}")
+        invalid = self._invalid_fields(data)
+        if invalid:
+            raise HttpError(HTTPStatus.BAD_REQUEST, f"Campos inválidos: {', '.join(invalid)}")
+        await self._write(res_id, self.manager.edit_reservation_by_id, res_id, **data)
+        return HTTPStatus.OK, self._reservation_or_404(res_id).to_dict()
+
+    async def _cancel_reservation(self, res_id, query, data):
+        self._reservation_or_404(res_id)
+        await self._write(res_id, self.manager.cancel_reservation_by_id, res_id)
+        return HTTPStatus.NO_CONTENT, None
+
+    async def _availability(self, query, data):
+        if "hora" in query:
+            try:
+                cancha, fecha, hora = query["cancha"], query["fecha"], query["hora"]
+            except KeyError:
+                raise HttpError(HTTPStatus.BAD_REQUEST, "Se requieren cancha, fecha y hora.")
+            hora_fin = query.get("hora_fin")
+            libres = self.manager.get_free_courts(cancha, fecha, hora, hora_fin=hora_fin)
+            if "cancha_num" in query:
+                try:
+                    numero = int(query["cancha_num"])
+                except ValueError:
+                    raise HttpError(HTTPStatus.BAD_REQUEST, "cancha_num debe ser un entero.")
+                disponible = self.manager.check_availability(cancha, fecha, hora, hora_fin=hora_fin, cancha_num=numero)
+            else:
+                disponible = bool(libres)
+            return HTTPStatus.OK, {"disponible": disponible, "libres": libres}
+        if "fecha_inicio" not in query:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Se requiere fecha_inicio (o cancha, fecha y hora).")
+        inicio = query["fecha_inicio"]
+        canchas = [query["cancha"]] if "cancha" in query else None
+        return HTTPStatus.OK, self.manager.get_availability_grid(inicio, query.get("fecha_fin", inicio), canchas)
+
+    async def _free_slots(self, query, data):
+        if "cancha" not in query:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Se requiere cancha.")
+        try:
+            duracion = int(query.get("duracion", 60))
+            k = min(int(query.get("k", 5)), self.MAX_LIMIT)
+        except ValueError:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "duracion y k deben ser enteros.")
+        # horas y dias: listas separadas por comas.
+        horas, dias = ([v for v in query[f].split(",") if v] if f in query else None for f in ("horas", "dias"))
+        return HTTPStatus.OK, self.manager.find_free_slots(
+            query["cancha"], query.get("fecha_inicio"), query.get("fecha_fin"), duracion, horas, dias, k)
+
+    async def _quote(self, query, data):
+        try:
+            cancha, fecha, hora = query["cancha"], query["fecha"], query["hora"]
+        except KeyError:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Se requieren cancha, fecha y hora.")
+        return HTTPStatus.OK, {"precio": self.manager.get_price(cancha, fecha, hora, query.get("hora_fin"),
+                                                                 query.get("documento"))}
+
+    async def _usage_report(self, query, data):
+        return HTTPStatus.OK, self.manager.get_usage_report(
+            query.get("periodo", "dia"), query.get("fecha_desde"), query.get("fecha_hasta"), query.get("cancha"))
+
+    async def _hour_report(self, query, data):
+        return HTTPStatus.OK, self.manager.get_hour_of_week_report(query.get("cancha"))
+
+    async def _metrics(self, query, data):
+        # Métricas del proceso (vacías si el servidor no arrancó con RESERVAS_METRICS=1).
+        return HTTPStatus.OK, instrumentation.stats()
+
+    # ------------------------------
+    # Ciclo de vida
+    # ------------------------------
+    async def refresh_loop(self):
+        # Recoge los cambios de otros procesos (GUI u otros servidores) y del archivo de
+        # canchas y tarifas para las lecturas.
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.REFRESH_INTERVAL)
+            try:
+                await loop.run_in_executor(self._writer, self.manager.refresh)
+            except Exception as e:
+                print(f"[WARN] No se pudo recargar el almacén: {e}")
+
+    def close(self):
+        # Termina las escrituras en curso y vuelca lo pendiente.
+        self._writer.shutdown(wait=True)
+        self.manager.close()
+
+
+# ------------------------------
+# Capa HTTP/1.1 mínima
+# ------------------------------
+MAX_BODY = 1024 * 1024
+
+
+async def _read_request(reader):
+    # Devuelve (método, destino, headers, cuerpo) o None si el cliente cerró.
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, _version = line.decode("latin-1").split()
+    except ValueError:
+        raise HttpError(HTTPStatus.BAD_REQUEST, "Línea de petición inválida.")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise HttpError(HTTPStatus.BAD_REQUEST, "Content-Length inválido.")
+    if length > MAX_BODY:
+        raise HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Cuerpo demasiado grande.")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target, headers, body
+
+
+def _response(status, payload, keep_alive):
+    status = HTTPStatus(status)
+    body = b"" if payload is None else json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    head = [f"HTTP/1.1 {status.value} {status.phrase}",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+    if payload is not None:
+        head.append("Content-Type: application/json; charset=utf-8")
+    return ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body
+
+
+async def _serve_connection(app, reader, writer):
+    # Varias peticiones por conexión (keep-alive) hasta que el cliente cierre.
+    try:
+        while True:
+            try:
+                request = await _read_request(reader)
+            except HttpError as e:
+                writer.write(_response(e.status, {"error": str(e)}, False))
+                break
+            if request is None:
+                break
+            method, target, headers, body = request
+            keep_alive = headers.get("connection", "").lower() != "close"
+            status, payload = await app.handle(method, target, body)
+            writer.write(_response(status, payload, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(app, host="127.0.0.1", port=8080):
+    server = await asyncio.start_server(lambda r, w: _serve_connection(app, r, w), host, port)
+    refresher = asyncio.create_task(app.refresh_loop())
+    print(f"Sirviendo en http://{host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        refresher.cancel()
+
+
+class ApiTestClient:
+    """
+    Cliente de pruebas en el mismo proceso: llama a ReservasApp.handle sin
+    sockets. Cada método devuelve (status, payload).
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._loop = asyncio.new_event_loop()
+
+    def request(self, method, path, json_body=None):
+        body = b"" if json_body is None else json.dumps(json_body).encode("utf-8")
+        status, payload = self._loop.run_until_complete(self.app.handle(method, path, body))
+        return int(status), payload
+
+    def get(self, path):
+        return self.request("GET", path)
+
+    def post(self, path, json_body):
+        return self.request("POST", path, json_body)
+
+    def patch(self, path, json_body):
+        return self.request("PATCH", path, json_body)
+
+    def delete(self, path):
+        return self.request("DELETE", path)
+
+    def gather(self, requests):
+        # Ejecuta varias peticiones [(método, ruta, cuerpo)] concurrentemente.
+        async def run():
+            return await asyncio.gather(*(
+                self.app.handle(m, p, b"" if b is None else json.dumps(b).encode("utf-8"))
+                for m, p, b in requests))
+        return [(int(s), p) for s, p in self._loop.run_until_complete(run())]
+
+    def close(self):
+        self._loop.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="API HTTP del sistema de reservas.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args(argv)
+    app = ReservasApp()
+    try:
+        asyncio.run(serve(app, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        app.close()
+
+
+if __name__ == "__main__":
+    main()
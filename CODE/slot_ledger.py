@@ -0,0 +1,373 @@
+# Juan David Ocampo Gutierrez
+# Nicolás Castro Pacheco
+# Michell Valencia Berdugo
+# Juan David Rivera Durán
+
+"""
+slot_ledger.py
+--------------
+
+Libro de ocupación de slots: un archivo de registros de ancho fijo que se
+lee mapeado en memoria, para que procesos livianos (kiosco, CLI, otro
+servidor) respondan disponibilidad sin cargar ni construir reservas.
+
+Formato de "<almacén>.slots":
+ - encabezado (HEADER_SIZE bytes): formato, granularidad, bloques por día,
+   canchas, primer día (ordinal), días, secuencia de escritura, versión
+   del almacén que refleja y cantidad de ordinales usados;
+ - tabla de canchas físicas: MAX_CANCHAS entradas (tipo, número);
+ - registros: un entero de 32 bits por (día, cancha, bloque de
+   'granularidad' minutos). El bit alto indica que el bloque está ocupado
+   y el resto es el ordinal de la reserva que lo ocupa.
+
+El archivo "<almacén>.slots.ids" guarda el id de cada ordinal (ID_SIZE
+bytes por registro), para saber qué reserva ocupa un bloque.
+
+Solo escribe Manager (con RESERVAS_LEDGER=1), bajo el bloqueo del almacén:
+reconstruye el libro al cargar y aplica cada escritura confirmada. Los
+lectores no toman bloqueos: el contador de secuencia es impar mientras se
+escribe y el lector reintenta si cambió durante su lectura. Los archivos
+solo crecen (un lector con un mapeo anterior nunca lee fuera del archivo).
+La versión del encabezado se compara con la del almacén (open_current):
+si otro proceso escribió sin actualizar el libro, no se usa.
+
+Los meses archivados (backend particionado) no figuran en el libro.
+"""
+
+import mmap
+import os
+import struct
+import sys
+import time
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from store_lock import StoreLock
+
+# Los registros se leen con el orden de bytes de la máquina: el formato lo indica.
+FORMATO = b"RSL" + (b"l" if sys.byteorder == "little" else b"b")
+# formato, granularidad, bloques por día, canchas, (libre), primer día, días, secuencia, versión, ordinales
+_HEADER = struct.Struct("<4sHHHHIIQQQ")
+_SEQ_OFFSET = 20
+HEADER_SIZE = 64
+MAX_CANCHAS = 64
+_COURT = struct.Struct("<38sH")
+DATA_OFFSET = HEADER_SIZE + MAX_CANCHAS * _COURT.size
+ID_SIZE = 36
+OCUPADO = 1 << 31
+_ORDINAL = OCUPADO - 1
+# Días extra que se reservan al crecer hacia adelante (evita crecer en cada fecha nueva).
+DIAS_HOLGURA = 62
+# Espera máxima de un lector mientras hay una escritura en curso (segundos).
+ESPERA_LECTURA = 2.0
+
+
+class SlotLedger:
+    def __init__(self, path: str, granularity: int = 30, writable: bool = False):
+        """
+        Abre el libro. writable=True (Manager) lo crea si no existe; en modo lectura
+        el archivo debe existir y tener este formato (ValueError si no).
+        """
+        self.path = path
+        self.writable = writable
+        self._fd = os.open(path, (os.O_RDWR | os.O_CREAT) if writable else os.O_RDONLY, 0o644)
+        self._ids_fd = None
+        self._mm = self._view = None
+        try:
+            if writable:
+                if os.fstat(self._fd).st_size < DATA_OFFSET:
+                    os.ftruncate(self._fd, DATA_OFFSET)
+                self._map()
+                header = _HEADER.unpack_from(self._mm, 0)
+                if header[0] != FORMATO or header[1] != granularity or header[7] % 2:
+                    # Libro nuevo, de otro formato o con una escritura interrumpida:
+                    # queda vacío y Manager lo reconstruye al cargar.
+                    self._write_header(granularity, 0, 0, 0, 0, 0, 0)
+                self._ids_fd = os.open(path + ".ids", os.O_RDWR | os.O_CREAT, 0o644)
+            else:
+                self._map()
+                if _HEADER.unpack_from(self._mm, 0)[0] != FORMATO:
+                    raise ValueError(f"{path} no es un libro de slots de este formato.")
+                self._ids_fd = os.open(path + ".ids", os.O_RDONLY)
+        except BaseException:
+            self.close()
+            raise
+        self._read_layout()
+        self._count = self._header()[9]
+        # Solo escritura: id -> [ordinal, código de cancha, día (ordinal), bloque inicial, final].
+        self._entries: Dict[str, List[int]] = {}
+
+    # ------------------------------
+    # Mapeo y encabezado
+    # ------------------------------
+    def _map(self, size: Optional[int] = None) -> None:
+        # (Re)mapea el archivo completo; los registros se leen vía memoryview sin copiar.
+        # Con size (escritura), antes agranda el archivo sin el mapeo anterior abierto.
+        if self._view is not None:
+            self._view.release()
+            self._mm.close()
+            self._view = self._mm = None
+        if size is not None:
+            os.ftruncate(self._fd, size)
+        size = os.fstat(self._fd).st_size
+        self._mm = mmap.mmap(self._fd, size, access=mmap.ACCESS_WRITE if self.writable else mmap.ACCESS_READ)
+        self._view = memoryview(self._mm)[DATA_OFFSET:size - (size - DATA_OFFSET) % 4].cast("I")
+
+    def _read_layout(self) -> None:
+        # Copia local de la disposición (y de la tabla de canchas) del encabezado.
+        (_, self.granularity, self.blocks, n_courts, _, self.first,
+         self.days, _, _, _) = _HEADER.unpack_from(self._mm, 0)
+        self.courts: List[Tuple[str, int]] = []
+        for i in range(n_courts):
+            tipo, numero = _COURT.unpack_from(self._mm, HEADER_SIZE + i * _COURT.size)
+            self.courts.append((tipo.rstrip(b"\0").decode("utf-8"), numero))
+        self._codes = {court: i for i, court in enumerate(self.courts)}
+        # tipo -> [(número, código)] en orden de número.
+        self._by_type: Dict[str, List[Tuple[int, int]]] = {}
+        for code, (tipo, numero) in enumerate(self.courts):
+            self._by_type.setdefault(tipo, []).append((numero, code))
+        for numbers in self._by_type.values():
+            numbers.sort()
+
+    def _write_header(self, granularity, n_courts, first, days, seq, version, count) -> None:
+        _HEADER.pack_into(self._mm, 0, FORMATO, granularity, 24 * 60 // granularity, n_courts, 0,
+                          first, days, seq, version, count)
+
+    def _header(self) -> tuple:
+        return _HEADER.unpack_from(self._mm, 0)
+
+    @property
+    def version(self) -> int:
+        """Versión del almacén que refleja el libro."""
+        return self._header()[8]
+
+    def close(self) -> None:
+        if self._view is not None:
+            self._view.release()
+            self._mm.close()
+            self._view = self._mm = None
+        for fd in (self._fd, self._ids_fd):
+            if fd is not None:
+                os.close(fd)
+        self._fd = self._ids_fd = None
+
+    # ------------------------------
+    # Escritura (Manager, con el bloqueo del almacén)
+    # ------------------------------
+    def _begin(self) -> int:
+        # Secuencia impar: los lectores esperan o reintentan.
+        seq = struct.unpack_from("<Q", self._mm, _SEQ_OFFSET)[0] + 1
+        struct.pack_into("<Q", self._mm, _SEQ_OFFSET, seq)
+        return seq
+
+    def _end(self, seq: int, version: int) -> None:
+        header = list(self._header())
+        header[7], header[8], header[9] = seq + 1, version, self._count
+        _HEADER.pack_into(self._mm, 0, *header)
+
+    def _layout(self, courts: List[Tuple[str, int]], first: int, days: int) -> None:
+        # Nueva disposición vacía: tabla de canchas, rango de días y tamaño del archivo
+        # (que nunca se achica). Requiere una escritura en curso (_begin).
+        if len(courts) > MAX_CANCHAS:
+            raise ValueError(f"El libro de slots admite hasta {MAX_CANCHAS} canchas.")
+        size = DATA_OFFSET + days * len(courts) * self.blocks * 4
+        if size > len(self._mm):
+            self._map(size)
+        for i, (tipo, numero) in enumerate(courts):
+            _COURT.pack_into(self._mm, HEADER_SIZE + i * _COURT.size, tipo.encode("utf-8")[:38], numero)
+        seq = struct.unpack_from("<Q", self._mm, _SEQ_OFFSET)[0]
+        self._write_header(self.granularity, len(courts), first, days, seq, self.version, self._count)
+        self._read_layout()
+        self._mm[DATA_OFFSET:size] = bytes(size - DATA_OFFSET)
+
+    def _mark(self, entry: List[int], value: Optional[int]) -> None:
+        # Marca (value = ordinal) o libera (None) los bloques de una entrada.
+        ordinal, code, day, b0, b1 = entry
+        base = ((day - self.first) * len(self.courts) + code) * self.blocks
+        view = self._view
+        for i in range(base + b0, base + b1):
+            if value is not None:
+                view[i] = OCUPADO | value
+            elif view[i] & _ORDINAL == ordinal:
+                view[i] = 0
+
+    def _write_ids(self, ordinal: int, data: bytes) -> None:
+        os.lseek(self._ids_fd, ordinal * ID_SIZE, os.SEEK_SET)
+        os.write(self._ids_fd, data)
+
+    @staticmethod
+    def _id_record(res_id: str) -> bytes:
+        return res_id.encode("utf-8")[:ID_SIZE].ljust(ID_SIZE, b"\0")
+
+    def rebuild(self, courts: Iterable[Tuple[str, int]], reservations: Iterable, version: int) -> None:
+        """
+        Rehace el libro con todas las reservas (canchas: las configuradas; se agregan
+        las que aparezcan en los datos) y lo marca con la versión del almacén.
+        """
+        g = self.granularity
+        courts = list(courts)
+        codes = {court: i for i, court in enumerate(courts)}
+        entries: Dict[str, List[int]] = {}
+        ids = bytearray()
+        for r in reservations:
+            court = (r.court.tipo, r.court.numero)
+            code = codes.get(court)
+            if code is None:
+                code = codes[court] = len(courts)
+                courts.append(court)
+            h, _, m = r.hora.partition(":")
+            start = int(h) * 60 + int(m)
+            h, _, m = r.hora_fin.partition(":")
+            end = int(h) * 60 + int(m)
+            entries[r.id] = [len(entries), code, date.fromisoformat(r.fecha).toordinal(), start // g, -(-end // g)]
+            ids += self._id_record(r.id)
+        days = [e[2] for e in entries.values()]
+        first = min(days) if days else date.today().toordinal()
+        last = max(days) if days else first
+        seq = self._begin()
+        self._count = len(entries)
+        self._layout(courts, first, last - first + 1 + DIAS_HOLGURA)
+        for entry in entries.values():
+            self._mark(entry, entry[0])
+        self._write_ids(0, bytes(ids))
+        self._entries = entries
+        self._end(seq, version)
+
+    def apply(self, changes: Iterable[Tuple[str, object]], version: int) -> None:
+        """Aplica cambios confirmados [(op, dato)] con el formato de Storage.apply_changes."""
+        seq = self._begin()
+        for op, data in changes:
+            if op == "delete":
+                entry = self._entries.pop(data, None)
+                if entry is not None:
+                    self._mark(entry, None)
+            elif op in ("create", "update"):
+                self._place(data)
+        self._end(seq, version)
+
+    def _place(self, r) -> None:
+        # Ubica una reserva nueva o editada (conserva su ordinal). Una cancha nueva o
+        # una fecha anterior al primer día cambian la disposición: se rehace desde las
+        # entradas en memoria; una fecha posterior al último día solo agrega días.
+        old = self._entries.get(r.id)
+        if old is not None:
+            self._mark(old, None)
+            ordinal = old[0]
+        else:
+            ordinal = self._count
+            self._count += 1
+            self._write_ids(ordinal, self._id_record(r.id))
+        g = self.granularity
+        start, end = (int(h) * 60 + int(m) for h, _, m in (r.hora.partition(":"), r.hora_fin.partition(":")))
+        court = (r.court.tipo, r.court.numero)
+        day = date.fromisoformat(r.fecha).toordinal()
+        entry = [ordinal, self._codes.get(court, len(self.courts)), day, start // g, -(-end // g)]
+        self._entries[r.id] = entry
+        if court not in self._codes or day < self.first or not self.days:
+            courts = self.courts + ([court] if court not in self._codes else [])
+            first = min(self.first, day) if self.days else day
+            last = max(self.first + self.days, day + 1 + DIAS_HOLGURA)
+            self._layout(courts, first, last - first)
+            for e in self._entries.values():
+                self._mark(e, e[0])
+        else:
+            if day >= self.first + self.days:
+                self._grow(day - self.first + 1 + DIAS_HOLGURA)
+            self._mark(entry, ordinal)
+
+    def _grow(self, days: int) -> None:
+        # Agrega días al final: los registros existentes no se mueven.
+        used = DATA_OFFSET + self.days * len(self.courts) * self.blocks * 4
+        size = DATA_OFFSET + days * len(self.courts) * self.blocks * 4
+        if size > len(self._mm):
+            self._map(size)
+        self._mm[used:size] = bytes(size - used)
+        struct.pack_into("<I", self._mm, 16, days)
+        self.days = days
+
+    # ------------------------------
+    # Lectura (sin bloqueos)
+    # ------------------------------
+    def _read(self, fn):
+        # Ejecuta fn() sobre un estado consistente del libro: reintenta si hubo una
+        # escritura en curso o durante la lectura; remapea si la disposición cambió.
+        deadline = None
+        while True:
+            header = self._header()
+            seq = header[7]
+            if not seq % 2:
+                if header[3] != len(self.courts) or header[5] != self.first or header[6] != self.days:
+                    needed = DATA_OFFSET + header[6] * header[3] * header[2] * 4
+                    if needed > len(self._mm):
+                        self._map()
+                    self._read_layout()
+                result = fn()
+                if struct.unpack_from("<Q", self._mm, _SEQ_OFFSET)[0] == seq:
+                    return result
+            if deadline is None:
+                deadline = time.monotonic() + ESPERA_LECTURA
+            elif time.monotonic() > deadline:
+                raise ValueError("El libro de slots está siendo reescrito; intente de nuevo.")
+            time.sleep(0.0005)
+
+    def _busy_masks(self, tipo: str, fecha: str, b0: int, b1: int) -> Optional[List[int]]:
+        # Máscara de canchas ocupadas del tipo (bit k = cancha número k+1) por bloque
+        # en [b0, b1); None si la fecha está fuera del libro (nada reservado).
+        day = date.fromisoformat(fecha).toordinal() - self.first
+        if not 0 <= day < self.days:
+            return None
+        masks = [0] * (b1 - b0)
+        n, view = len(self.courts), self._view
+        for numero, code in self._by_type.get(tipo, ()):
+            base = (day * n + code) * self.blocks
+            bit = 1 << (numero - 1)
+            for i, value in enumerate(view[base + b0:base + b1]):
+                if value & OCUPADO:
+                    masks[i] |= bit
+        return masks
+
+    def day(self, tipo: str, fecha: str) -> List[int]:
+        """Como CourtAllocator.day: máscara de canchas ocupadas de cada bloque del día."""
+        return self._read(lambda: self._busy_masks(tipo, fecha, 0, self.blocks) or [0] * self.blocks)
+
+    def free_courts(self, tipo: str, fecha: str, start: int, end: int) -> List[int]:
+        """Números de las canchas del tipo libres durante [start, end) (minutos)."""
+        g = self.granularity
+        b0, b1 = start // g, -(-end // g)
+
+        def read():
+            busy = 0
+            for mask in self._busy_masks(tipo, fecha, b0, b1) or ():
+                busy |= mask
+            return [numero for numero, _ in self._by_type.get(tipo, ()) if not busy >> (numero - 1) & 1]
+        return self._read(read)
+
+    def occupant(self, tipo: str, numero: int, fecha: str, minute: int) -> Optional[str]:
+        """Id de la reserva que ocupa la cancha en ese minuto del día, o None."""
+        def read():
+            code = self._codes.get((tipo, numero))
+            day = date.fromisoformat(fecha).toordinal() - self.first
+            if code is None or not 0 <= day < self.days:
+                return None
+            value = self._view[(day * len(self.courts) + code) * self.blocks + minute // self.granularity]
+            return value & _ORDINAL if value & OCUPADO else None
+        ordinal = self._read(read)
+        if ordinal is None:
+            return None
+        os.lseek(self._ids_fd, ordinal * ID_SIZE, os.SEEK_SET)
+        return os.read(self._ids_fd, ID_SIZE).rstrip(b"\0").decode("utf-8")
+
+
+def open_current(store_path: str) -> Optional[SlotLedger]:
+    """
+    Libro de slots del almacén en modo lectura, si existe y refleja su versión
+    actual (la del archivo "<almacén>.lock"); si no, None.
+    """
+    try:
+        ledger = SlotLedger(store_path + ".slots")
+    except (OSError, ValueError):
+        return None
+    if not ledger.days or ledger.version != StoreLock(store_path + ".lock").version():
+        ledger.close()
+        return None
+    return ledger
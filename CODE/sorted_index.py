@@ -0,0 +1,97 @@
+# Juan David Ocampo Gutierrez
+# Nicolás Castro Pacheco
+# Michell Valencia Berdugo
+# Juan David Rivera Durán
+
+"""
+sorted_index.py
+---------------
+
+Índice ordenado de reservas para paginar por columna sin reordenar.
+
+Guarda una lista ordenada de tuplas clave + (id,) y la mantiene al día
+con bisect en cada alta/baja/edición, de modo que pedir una página
+ordenada es recorrer un tramo de la lista (islice), no ordenar todo.
+La última componente (el id) hace única cada entrada: así la baja
+encuentra exactamente su posición con bisect_left. Como las tuplas se
+comparan por prefijo, un rango de claves (p. ej. de fechas) también se
+resuelve con dos búsquedas binarias.
+"""
+
+from bisect import bisect_left, insort
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+class SortedIndex:
+    def __init__(self, key: Callable, reservations: Iterable = ()):
+        # key(r) -> tupla comparable (sin el id, que se agrega aquí).
+        self._key = key
+        # id -> entrada actual: la baja usa la clave guardada, aunque la
+        # reserva (o su cliente) ya haya cambiado en memoria.
+        self._entries: Dict[str, Tuple] = {}
+        for r in reservations:
+            self._entries[r.id] = key(r) + (r.id,)
+        # Construcción inicial: un solo sort; después, solo inserciones con bisect.
+        self._sorted = sorted(self._entries.values())
+
+    def __len__(self) -> int:
+        return len(self._sorted)
+
+    def add(self, r) -> None:
+        entry = self._key(r) + (r.id,)
+        self._entries[r.id] = entry
+        insort(self._sorted, entry)
+
+    def add_many(self, rs: Iterable) -> None:
+        # Alta masiva (importaciones, lotes grandes): un insort por elemento costaría
+        # O(n) cada uno; se fusiona en una lista nueva (Timsort aprovecha los dos
+        # tramos ya ordenados) y se publica de una vez para las lecturas concurrentes.
+        new = []
+        for r in rs:
+            entry = self._key(r) + (r.id,)
+            self._entries[r.id] = entry
+            new.append(entry)
+        if len(new) < 32:
+            for entry in new:
+                insort(self._sorted, entry)
+        else:
+            new.sort()
+            self._sorted = sorted(self._sorted + new)
+
+    def remove(self, res_id: str) -> None:
+        entry = self._entries.pop(res_id, None)
+        if entry is None:
+            return
+        i = bisect_left(self._sorted, entry)
+        if i < len(self._sorted) and self._sorted[i] == entry:
+            del self._sorted[i]
+
+    def update(self, r) -> None:
+        # Reubica la reserva según sus valores actuales.
+        self.remove(r.id)
+        self.add(r)
+
+    def span(self, lo: Tuple, hi: Tuple) -> Tuple[int, int]:
+        """Posiciones [inicio, fin) de las entradas con lo <= entrada < hi (prefijos de clave)."""
+        return bisect_left(self._sorted, lo), bisect_left(self._sorted, hi)
+
+    def ids_between(self, lo: Tuple, hi: Tuple) -> List[str]:
+        # Ids del rango en orden: dos búsquedas binarias + recorrer solo los aciertos.
+        # El slice es una copia atómica: una escritura concurrente no la altera.
+        start, stop = self.span(lo, hi)
+        return [e[-1] for e in self._sorted[start:stop]]
+
+    def ids(self, offset: int = 0, limit: Optional[int] = None, descending: bool = False,
+            predicate: Optional[Callable[[str], bool]] = None) -> Iterator[str]:
+        """Ids en orden (o inverso), saltando 'offset' y devolviendo hasta 'limit'."""
+        stop = None if limit is None else offset + limit
+        if predicate is None:
+            # Sin filtro la página se ubica por posición (slice), sin recorrer el offset.
+            if not descending:
+                return iter([e[-1] for e in self._sorted[offset:stop]])
+            n = len(self._sorted)
+            page = self._sorted[max(n - stop, 0) if stop is not None else 0:max(n - offset, 0)]
+            return iter([e[-1] for e in reversed(page)])
+        entries = reversed(self._sorted) if descending else iter(self._sorted)
+        return islice(filter(predicate, (e[-1] for e in entries)), offset, stop)
@@ -0,0 +1,320 @@
+# Juan David Ocampo Gutierrez
+# Nicolás Castro Pacheco
+# Michell Valencia Berdugo
+# Juan David Rivera Durán
+
+"""
+sqlite_storage.py
+-----------------
+
+Backend de almacenamiento sobre SQLite.
+
+- Modo WAL: lectores no bloquean al escritor.
+- UNIQUE (cancha, cancha_num, fecha, hora): la base de datos también impide
+  dos reservas con el mismo inicio en la misma cancha física; los
+  solapamientos parciales los detecta Manager.
+- Índices por documento, fecha, cancha y email del cliente: find_reservations
+  resuelve cualquier combinación de esos filtros en la base, sin recorrer todo.
+- Cada create/edit/cancel es un INSERT/UPDATE/DELETE de una sola fila.
+- Clientes normalizados en la tabla 'clientes' (clave: documento); las
+  bases creadas con el esquema plano anterior se migran al abrirlas.
+- hora_fin puede ser NULL en filas anteriores a los intervalos (reservas
+  de una hora); la columna se agrega al abrir bases que no la tienen. Las
+  bases sin cancha_num (una cancha por tipo) se reconstruyen con la nueva
+  restricción UNIQUE y sus reservas quedan en la cancha 1.
+
+Incluye un migrador de una sola vez desde reservas.json:
+
+    python sqlite_storage.py reservas.json reservas.db
+"""
+
+import sqlite3
+import sys
+import threading
+import instrumentation
+from client import Client
+from reservation import Reservation
+from storage import Storage, locked, committing
+from persistence import Persistence, gc_paused
+
+# Columnas en el mismo orden que Reservation.to_record().
+COLUMNS = ("id", "documento", "cancha", "cancha_num", "fecha", "hora", "hora_fin", "precio")
+CLIENT_COLUMNS = ("documento", "nombre", "telefono", "email")
+
+TABLES = """
+CREATE TABLE IF NOT EXISTS clientes (
+    documento TEXT PRIMARY KEY,
+    nombre    TEXT NOT NULL,
+    telefono  TEXT NOT NULL,
+    email     TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS reservas (
+    id        TEXT PRIMARY KEY,
+    documento TEXT NOT NULL REFERENCES clientes (documento),
+    cancha    TEXT NOT NULL,
+    cancha_num INTEGER NOT NULL DEFAULT 1,
+    fecha     TEXT NOT NULL,
+    hora      TEXT NOT NULL,
+    hora_fin  TEXT,
+    precio    REAL NOT NULL DEFAULT 0,
+    UNIQUE (cancha, cancha_num, fecha, hora)
+);
+"""
+
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_reservas_documento ON reservas (documento);
+CREATE INDEX IF NOT EXISTS idx_reservas_fecha ON reservas (fecha);
+CREATE INDEX IF NOT EXISTS idx_reservas_cancha ON reservas (cancha, fecha);
+CREATE INDEX IF NOT EXISTS idx_clientes_email ON clientes (email COLLATE NOCASE);
+"""
+
+# Migración del esquema plano (datos de cliente repetidos en cada reserva).
+MIGRATE_FLAT = """
+INSERT OR REPLACE INTO clientes (documento, nombre, telefono, email)
+    SELECT documento, nombre, telefono, email FROM reservas ORDER BY rowid;
+CREATE TABLE reservas_nueva (
+    id        TEXT PRIMARY KEY,
+    documento TEXT NOT NULL REFERENCES clientes (documento),
+    cancha    TEXT NOT NULL,
+    fecha     TEXT NOT NULL,
+    hora      TEXT NOT NULL,
+    precio    REAL NOT NULL DEFAULT 0,
+    UNIQUE (cancha, fecha, hora)
+);
+INSERT INTO reservas_nueva (id, documento, cancha, fecha, hora, precio)
+    SELECT id, documento, cancha, fecha, hora, precio FROM reservas ORDER BY rowid;
+DROP TABLE reservas;
+ALTER TABLE reservas_nueva RENAME TO reservas;
+"""
+
+# Migración a varias canchas por tipo: la restricción UNIQUE no se puede
+# modificar en SQLite, así que la tabla se reconstruye (todo en la cancha 1).
+MIGRATE_COURTS = """
+CREATE TABLE reservas_nueva (
+    id        TEXT PRIMARY KEY,
+    documento TEXT NOT NULL REFERENCES clientes (documento),
+    cancha    TEXT NOT NULL,
+    cancha_num INTEGER NOT NULL DEFAULT 1,
+    fecha     TEXT NOT NULL,
+    hora      TEXT NOT NULL,
+    hora_fin  TEXT,
+    precio    REAL NOT NULL DEFAULT 0,
+    UNIQUE (cancha, cancha_num, fecha, hora)
+);
+INSERT INTO reservas_nueva (id, documento, cancha, fecha, hora, hora_fin, precio)
+    SELECT id, documento, cancha, fecha, hora, hora_fin, precio FROM reservas ORDER BY rowid;
+DROP TABLE reservas;
+ALTER TABLE reservas_nueva RENAME TO reservas;
+"""
+
+_INSERT = f"INSERT INTO reservas ({', '.join(COLUMNS)}) VALUES ({', '.join('?' for _ in COLUMNS)})"
+_UPDATE = f"UPDATE reservas SET {', '.join(c + ' = ?' for c in COLUMNS[1:])} WHERE id = ?"
+_UPSERT_CLIENT = (f"INSERT INTO clientes ({', '.join(CLIENT_COLUMNS)}) VALUES (?, ?, ?, ?) "
+                  "ON CONFLICT (documento) DO UPDATE SET "
+                  "nombre = excluded.nombre, telefono = excluded.telefono, email = excluded.email")
+
+
+class SQLitePersistence(Storage):
+    supports_queries = True
+    incremental_writes = True
+
+    def __init__(self, filepath="reservas.db", trusted=False):
+        super().__init__(filepath + ".lock")
+        self.filepath = filepath
+        # La tabla ya impone el esquema; con trusted=True no se revalida Client al cargar.
+        self.trusted = trusted
+        # Una sola conexión compartida; el lock serializa el acceso entre hilos.
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(filepath, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # En WAL, NORMAL es seguro ante caídas de la aplicación y evita un fsync por commit.
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(TABLES)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(reservas)")}
+        if "nombre" in columns:
+            # executescript no abre transacción propia: se envuelve explícitamente.
+            self._conn.executescript("BEGIN;\n" + MIGRATE_FLAT + "COMMIT;")
+        if "hora_fin" not in columns:
+            self._conn.execute("ALTER TABLE reservas ADD COLUMN hora_fin TEXT")
+        if "cancha_num" not in columns:
+            self._conn.executescript("BEGIN;\n" + MIGRATE_COURTS + "COMMIT;")
+        self._conn.executescript(INDEXES)
+
+    @staticmethod
+    def _row(r: Reservation):
+        d = r.to_record()
+        return tuple(d[c] for c in COLUMNS)
+
+    @staticmethod
+    def _client_row(c: Client):
+        return (c.documento, c.nombre, c.telefono, c.email)
+
+    def _execute(self, sql, params=()):
+        # Ejecuta en una transacción; las violaciones de UNIQUE se reportan
+        # como ValueError, igual que las validaciones de Manager.
+        with self._lock:
+            try:
+                with self._conn:
+                    cursor = self._conn.execute(sql, params)
+            except sqlite3.IntegrityError:
+                raise ValueError("Esa hora ya está ocupada para la cancha seleccionada.")
+        instrumentation.count("storage.rows_written")
+        return cursor
+
+    # ------------------------------
+    # Carga / snapshot
+    # ------------------------------
+    @locked
+    def load_reservations(self):
+        """Carga clientes y reservas (en orden de inserción)."""
+        with self._lock:
+            client_rows = self._conn.execute(f"SELECT {', '.join(CLIENT_COLUMNS)} FROM clientes").fetchall()
+            rows = self._conn.execute(f"SELECT {', '.join(COLUMNS)} FROM reservas ORDER BY rowid").fetchall()
+
+        self.clients.clear()
+        if self.trusted:
+            with gc_paused():
+                for documento, nombre, telefono, email in client_rows:
+                    self.clients.upsert(Client.from_trusted(nombre, documento, telefono, email))
+                get = self.clients.get
+                reservations = []
+                for row in rows:
+                    client = get(row[1])
+                    if client is None:
+                        # La tabla no impone la clave foránea: se informa como en la carga validada.
+                        print(f"[WARN] Reserva inválida ignorada: Cliente {row[1]} no registrado.")
+                        continue
+                    reservations.append(Reservation.from_trusted_dict(dict(zip(COLUMNS, row)), client))
+            instrumentation.count("storage.records_loaded", len(reservations))
+            instrumentation.count("storage.records_rejected", len(rows) - len(reservations))
+            return reservations
+
+        for documento, nombre, telefono, email in client_rows:
+            try:
+                self.clients.upsert(Client(nombre, documento, telefono, email))
+            except Exception as e:
+                print(f"[WARN] Cliente inválido ignorado: {e}")
+                instrumentation.count("storage.clients_rejected")
+        reservations = []
+        for row in rows:
+            try:
+                client = self.clients.get(row[1])
+                if client is None:
+                    raise ValueError(f"Cliente {row[1]} no registrado.")
+                reservations.append(Reservation.from_dict(dict(zip(COLUMNS, row)), client))
+            except Exception as e:
+                print(f"[WARN] Reserva inválida ignorada: {e}")
+        instrumentation.count("storage.records_loaded", len(reservations))
+        instrumentation.count("storage.records_rejected", len(rows) - len(reservations))
+        return reservations
+
+    @committing
+    def save_reservations(self, reservations):
+        """Reemplaza el contenido completo de las tablas en una sola transacción."""
+        rows = [self._row(r) for r in reservations]
+        client_rows = [self._client_row(c) for c in self.clients]
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM reservas")
+                self._conn.execute("DELETE FROM clientes")
+                self._conn.executemany(_UPSERT_CLIENT, client_rows)
+                self._conn.executemany(_INSERT, rows)
+        instrumentation.count("storage.rows_written", len(rows) + len(client_rows))
+
+    # ------------------------------
+    # Cambios por registro (una fila)
+    # ------------------------------
+    @committing
+    def insert_reservation(self, reservation, reservations):
+        self._execute(_INSERT, self._row(reservation))
+
+    @committing
+    def update_reservation(self, reservation, reservations):
+        row = self._row(reservation)
+        self._execute(_UPDATE, row[1:] + row[:1])
+
+    @committing
+    def delete_reservation(self, res_id, reservations):
+        self._execute("DELETE FROM reservas WHERE id = ?", (res_id,))
+
+    @committing
+    def save_client(self, client, reservations):
+        self._execute(_UPSERT_CLIENT, self._client_row(client))
+
+    @committing
+    def apply_changes(self, changes, reservations):
+        # Todo el lote en una transacción: si una fila falla, no se aplica ninguna.
+        with self._lock:
+            try:
+                with self._conn:
+                    # UNIQUE se verifica fila a fila: para permitir intercambios de slot
+                    # dentro del lote, las filas editadas pasan antes por una hora temporal única.
+                    self._conn.executemany("UPDATE reservas SET hora = ? WHERE id = ?",
+                                           [("~" + data.id, data.id) for op, data in changes if op == "update"])
+                    for op, data in changes:
+                        if op == "create":
+                            self._conn.execute(_INSERT, self._row(data))
+                        elif op == "update":
+                            row = self._row(data)
+                            self._conn.execute(_UPDATE, row[1:] + row[:1])
+                        elif op == "client":
+                            self._conn.execute(_UPSERT_CLIENT, self._client_row(data))
+                        else:
+                            self._conn.execute("DELETE FROM reservas WHERE id = ?", (data,))
+            except sqlite3.IntegrityError:
+                raise ValueError("Esa hora ya está ocupada para la cancha seleccionada.")
+        instrumentation.count("storage.rows_written", len(changes))
+
+    # ------------------------------
+    # Consultas indexadas
+    # ------------------------------
+    def find_reservations(self, documento=None, fecha=None, cancha=None, email=None):
+        """Ids de reservas filtradas por documento, fecha, cancha y/o email (usa los índices)."""
+        clauses, params = [], []
+        for column, value in (("documento", documento), ("fecha", fecha), ("cancha", cancha)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if email is not None:
+            clauses.append("documento IN (SELECT documento FROM clientes WHERE email = ? COLLATE NOCASE)")
+            params.append(email)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(f"SELECT id FROM reservas{where} ORDER BY rowid", params).fetchall()
+        return [row[0] for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+        super().close()
+
+
+def migrate_json(json_path="reservas.json", db_path="reservas.db") -> int:
+    """Importa un reservas.json existente a SQLite. Devuelve cuántas reservas se agregaron."""
+    # Se cargan con el cargador JSON normal, que valida y descarta registros inválidos;
+    # el archivo de origen no se modifica (sin auto-migración a formato normalizado)
+    # ni se le agrega caché.
+    source = Persistence(json_path, auto_migrate=False, cache=False)
+    reservations = source.load_reservations()
+    source.close()
+    storage = SQLitePersistence(db_path)
+    try:
+        with storage.store_lock, storage._lock:
+            with storage._conn:
+                storage._conn.executemany(_UPSERT_CLIENT, [storage._client_row(c) for c in source.clients])
+                before = storage._conn.total_changes
+                # OR IGNORE: ids o slots ya presentes no se duplican si se ejecuta dos veces.
+                storage._conn.executemany(_INSERT.replace("INSERT", "INSERT OR IGNORE", 1),
+                                          [storage._row(r) for r in reservations])
+                added = storage._conn.total_changes - before
+            # Los procesos con la base abierta recargan al ver la nueva versión.
+            storage.store_lock.bump()
+            return added
+    finally:
+        storage.close()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:3]
+    added = migrate_json(*args)
+    print(f"{added} reservas importadas.")
@@ -0,0 +1,175 @@
+# Juan David Ocampo Gutierrez
+# Nicolás Castro Pacheco
+# Michell Valencia Berdugo
+# Juan David Rivera Durán
+
+"""
+storage.py
+----------
+
+Contrato común de los backends de almacenamiento de reservas.
+
+Manager solo conoce esta interfaz; cada backend (JSON, journal, SQLite,
+particionado por mes) decide cómo materializar las operaciones:
+ - load_reservations() -> list[Reservation]
+ - save_reservations(reservations)           (snapshot completo)
+ - insert_reservation(reservation, reservations)
+ - update_reservation(reservation, reservations)
+ - delete_reservation(res_id, reservations)
+ - apply_changes(changes, reservations)      (lote: una sola escritura)
+ - save_client(client, reservations)         (alta/actualización de un cliente)
+ - find_reservations(documento=None, fecha=None, cancha=None, email=None)
+                                             -> list[str] (ids)
+ - archived_months(fecha_desde, fecha_hasta) / load_archive(months)
+                                             (meses archivados, carga diferida)
+ - lock() / version()                        (concurrencia entre procesos)
+ - close()
+
+verify_reservations() es el pase explícito de validación completa para
+reservas cargadas en modo confiable (trusted=True).
+
+En las operaciones por registro se pasa también la colección completa
+para que los backends sin escritura parcial puedan reescribir todo.
+
+Los datos de cliente se guardan normalizados: cada backend expone en
+'clients' el ClientRegistry que llena al cargar, y las reservas solo
+referencian al cliente por documento.
+
+Las cargas corren bajo el StoreLock del almacén y cada escritura además
+incrementa su versión (decoradores locked/committing), así otro proceso
+detecta el cambio comparando version() con la que cargó.
+
+Con RESERVAS_METRICS=1 las operaciones de INSTRUMENTED_OPS de cada
+subclase se miden automáticamente (ver instrumentation.py).
+"""
+
+from functools import wraps
+import instrumentation
+from client_registry import ClientRegistry
+from store_lock import StoreLock
+
+# Operaciones de los backends que se miden con RESERVAS_METRICS=1 (ver instrumentation.py).
+INSTRUMENTED_OPS = ("load_reservations", "save_reservations", "insert_reservation", "update_reservation",
+                    "delete_reservation", "apply_changes", "save_client", "find_reservations", "load_archive")
+
+
+def locked(method):
+    # Ejecuta el método con el bloqueo del almacén tomado (reentrante).
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.store_lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def committing(method):
+    # Igual que locked, y si la escritura termina sin error incrementa la versión.
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.store_lock:
+            result = method(self, *args, **kwargs)
+            self.store_lock.bump()
+            return result
+    return wrapper
+
+
+def verify_reservations(reservations):
+    """Revalida los datos de cliente. Devuelve [(id, mensaje)] de las reservas inválidas."""
+    errors = []
+    for r in reservations:
+        try:
+            r.client.validate()
+        except ValueError as e:
+            errors.append((r.id, str(e)))
+    return errors
+
+
+class Storage:
+    """
+    Interfaz base. Las subclases deben implementar load/save; las
+    operaciones por registro por defecto reescriben el snapshot completo.
+    """
+
+    # True si el backend resuelve find_reservations con índices propios.
+    supports_queries = False
+    # True si una escritura cuesta según el tamaño del cambio (log, filas) y no
+    # según el del almacén completo; así conviene escribir por tramos en cargas masivas.
+    incremental_writes = False
+    # True si el backend guarda meses cerrados que no carga al inicio; se abren
+    # bajo demanda con archived_months/load_archive (consultas de histórico).
+    supports_archive = False
+
+    def __init_subclass__(cls, **kwargs):
+        # Cada backend mide sus cargas/escrituras como "<Clase>.<operación>" (la clase
+        # de la instancia, también para las operaciones heredadas).
+        super().__init_subclass__(**kwargs)
+        instrumentation.instrument_methods(cls, names=INSTRUMENTED_OPS)
+
+    def __init__(self, lock_path=None):
+        # Registro de clientes (documento -> Client) compartido con Manager.
+        self.clients = ClientRegistry()
+        # Bloqueo entre procesos + contador de versión ("<archivo>.lock").
+        self.store_lock = StoreLock(lock_path)
+
+    def load_reservations(self):
+        raise NotImplementedError
+
+    def save_reservations(self, reservations):
+        raise NotImplementedError
+
+    # ------------------------------
+    # Cambios por registro
+    # ------------------------------
+    def insert_reservation(self, reservation, reservations):
+        self.save_reservations(reservations)
+
+    def update_reservation(self, reservation, reservations):
+        self.save_reservations(reservations)
+
+    def delete_reservation(self, res_id, reservations):
+        self.save_reservations(reservations)
+
+    def apply_changes(self, changes, reservations):
+        # Lote de cambios [(op, dato)] con op "create"/"update" (dato = Reservation),
+        # "delete" (dato = id) o "client" (dato = Client del registro, alta o cambio).
+        # Debe persistirse como una única escritura.
+        self.save_reservations(reservations)
+
+    def save_client(self, client, reservations):
+        # Persiste un cliente del registro (alta o actualización de sus datos).
+        # 'reservations' es el estado vigente, por si el backend necesita compactar.
+        raise NotImplementedError
+
+    # ------------------------------
+    # Concurrencia entre procesos
+    # ------------------------------
+    def lock(self):
+        # Context manager: sección leer-modificar-escribir exclusiva entre procesos.
+        return self.store_lock
+
+    def version(self):
+        # Versión confirmada del almacén; cambia con cada escritura de cualquier proceso.
+        return self.store_lock.version()
+
+    # ------------------------------
+    # Consultas
+    # ------------------------------
+    def find_reservations(self, documento=None, fecha=None, cancha=None, email=None):
+        # Solo disponible si supports_queries es True. email no distingue mayúsculas.
+        raise NotImplementedError
+
+    # ------------------------------
+    # Histórico
+    # ------------------------------
+    def archived_months(self, fecha_desde=None, fecha_hasta=None):
+        # Meses ("YYYY-MM") guardados y aún no cargados que se solapan con el rango.
+        return []
+
+    def load_archive(self, months):
+        # Carga los meses indicados y devuelve sus reservas (desde ese momento
+        # forman parte del estado cargado). Solo si supports_archive es True.
+        raise NotImplementedError
+
+    def close(self):
+        # Libera el archivo de bloqueo.
+        self.store_lock.close()
@@ -0,0 +1,96 @@
+# Juan David Ocampo Gutierrez
+# Nicolás Castro Pacheco
+# Michell Valencia Berdugo
+# Juan David Rivera Durán
+
+"""
+store_lock.py
+-------------
+
+Bloqueo entre procesos y contador de versión de un almacén.
+
+Varios puestos (procesos) pueden abrir el mismo reservas.json/.db. Cada
+almacén tiene un archivo "<archivo>.lock" que cumple dos funciones:
+
+ - fcntl.flock exclusivo sobre él serializa los ciclos leer-modificar-escribir
+   de todos los procesos;
+ - su contenido es un contador de versión que se incrementa en cada escritura
+   confirmada: un proceso compara la versión con la que cargó para saber si
+   otro proceso escribió (concurrencia optimista) y debe recargar.
+
+Dentro de un proceso el bloqueo es reentrante y también excluye a los
+demás hilos. En plataformas sin fcntl (Windows) solo queda el bloqueo
+entre hilos.
+"""
+
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Ancho fijo: el contador siempre se reescribe completo en el mismo lugar.
+_VERSION_FORMAT = b"%020d\n"
+
+
+class StoreLock:
+    def __init__(self, path=None):
+        # path=None: almacén sin archivo (solo bloqueo entre hilos, versión en memoria).
+        self.path = path
+        self._rlock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+        self._memory_version = 0
+
+    def __enter__(self):
+        self._rlock.acquire()
+        try:
+            if self._depth == 0 and self.path is not None:
+                if self._fd is None:
+                    self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                if fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_EX)
+        except BaseException:
+            self._rlock.release()
+            raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._depth -= 1
+        try:
+            if self._depth == 0 and self._fd is not None and fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        finally:
+            self._rlock.release()
+
+    def version(self) -> int:
+        """Versión actual del almacén (lectura sin bloqueo)."""
+        if self.path is None:
+            return self._memory_version
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read(len(_VERSION_FORMAT % 0)).strip()
+        except FileNotFoundError:
+            return 0
+        return int(data) if data.isdigit() else 0
+
+    def bump(self) -> int:
+        """Incrementa la versión. Requiere tener el bloqueo."""
+        if self._depth == 0:
+            raise RuntimeError("StoreLock.bump() requiere el bloqueo tomado.")
+        version = self.version() + 1
+        if self.path is None:
+            self._memory_version = version
+        else:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            os.write(self._fd, _VERSION_FORMAT % version)
+        return version
+
+    def close(self) -> None:
+        with self._rlock:
+            if self._fd is not None and self._depth == 0:
+                os.close(self._fd)
+                self._fd = None
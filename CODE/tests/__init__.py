@@ -0,0 +1,14 @@
+# Juan David Ocampo Gutierrez
+# Nicolás Castro Pacheco
+# Michell Valencia Berdugo
+# Juan David Rivera Durán
+
+"""
+tests
+-----
+
+Pruebas automáticas (pytest) de Manager, los backends de almacenamiento y
+los índices. Se ejecutan desde la carpeta CODE:
+
+    python -m pytest -q tests
+"""
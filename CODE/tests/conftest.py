@@ -0,0 +1,45 @@
+# Juan David Ocampo Gutierrez
+# Nicolás Castro Pacheco
+# Michell Valencia Berdugo
+# Juan David Rivera Durán
+
+"""
+conftest.py
+-----------
+
+Fixtures comunes: cada prueba corre en su propio directorio temporal, con
+las canchas por defecto (sin archivo de configuración) y un Manager por
+backend que se cierra al terminar.
+"""
+
+import pytest
+
+from manager import Manager
+from tests.util import BACKENDS
+
+
+@pytest.fixture(autouse=True)
+def _workdir(tmp_path, monkeypatch):
+    # Archivos relativos (caché, libro de slots, canchas.json) dentro del temporal.
+    monkeypatch.chdir(tmp_path)
+    for var in ("RESERVAS_STORAGE", "RESERVAS_CONFIG", "RESERVAS_LEDGER", "RESERVAS_WRITE_BEHIND",
+                "RESERVAS_TRUSTED_LOAD", "RESERVAS_METRICS"):
+        monkeypatch.delenv(var, raising=False)
+
+
+@pytest.fixture
+def make_manager(tmp_path):
+    # make_manager(backend="json", **kwargs): Manager sobre el almacén de la prueba.
+    managers = []
+
+    def make(backend="json", **kwargs):
+        kwargs.setdefault("config_path", str(tmp_path / "sin_config.json"))
+        m = Manager(BACKENDS[backend](tmp_path), **kwargs)
+        managers.append(m)
+        return m
+    yield make
+    for m in managers:
+        try:
+            m.close()
+        except Exception:
+            pass
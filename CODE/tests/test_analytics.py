@@ -0,0 +1,56 @@
+# Juan David Ocampo Gutierrez
+# Nicolás Castro Pacheco
+# Michell Valencia Berdugo
+# Juan David Rivera Durán
+
+"""
+test_analytics.py
+-----------------
+
+Los agregados que Manager mantiene con cada cambio coinciden con una
+reconstrucción completa (Rollups.from_reservations), también en el orden
+de las filas de los reportes.
+"""
+
+import random
+
+import pytest
+
+from analytics import Rollups
+from tests.util import cliente, fecha, random_ops
+
+
+def _split(rows):
+    # Filas sin 'ingresos' (exactas) y los ingresos aparte (sumas en punto flotante).
+    return [{k: v for k, v in row.items() if k != "ingresos"} for row in rows], [row["ingresos"] for row in rows]
+
+
+def test_rollups_match_full_rebuild_after_random_changes(make_manager):
+    rnd = random.Random(5)
+    m = make_manager()
+    random_ops(m, rnd, 40)
+    # Desde aquí los agregados se mantienen de forma incremental.
+    m.get_usage_report()
+    random_ops(m, rnd, 300)
+    rebuilt = Rollups.from_reservations(m.reservations)
+    for periodo in ("dia", "semana", "mes"):
+        rows, revenue = _split(m.get_usage_report(periodo))
+        expected, expected_revenue = _split(rebuilt.period_report(periodo, 12 * 60))
+        assert rows == expected
+        assert revenue == pytest.approx(expected_revenue)
+    rows, revenue = _split(m.get_hour_of_week_report())
+    expected, expected_revenue = _split(rebuilt.hour_of_week_report())
+    assert rows == expected
+    assert revenue == pytest.approx(expected_revenue)
+
+
+def test_usage_report_values(make_manager):
+    m = make_manager()
+    m.create_reservation(**cliente(1), cancha="Vóley", fecha=fecha(3), hora="10:00", hora_fin="11:30")
+    m.create_reservation(**cliente(2), cancha="Vóley", fecha=fecha(3), hora="18:00")
+    [row] = m.get_usage_report("dia", cancha="Vóley")
+    assert (row["periodo"], row["cancha_num"], row["reservas"], row["horas"]) == (fecha(3), 1, 2, 2.5)
+    assert row["ingresos"] == pytest.approx(2.5 * m.get_price_for_court("Vóley"))
+    assert row["ocupacion"] == round(2.5 / 12, 4)
+    with pytest.raises(ValueError):
+        m.get_usage_report("año")
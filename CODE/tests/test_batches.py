@@ -0,0 +1,54 @@
+# Juan David Ocampo Gutierrez
+# Nicolás Castro Pacheco
+# Michell Valencia Berdugo
+# Juan David Rivera Durán
+
+"""
+test_batches.py
+---------------
+
+Lotes de altas, ediciones y cancelaciones: se aplican todos o ninguno,
+con conflictos detectados contra el almacén y dentro del propio lote.
+"""
+
+from tests.util import cliente, fecha
+
+
+def test_create_reservations_is_all_or_nothing(make_manager):
+    m = make_manager()
+    m.create_reservation(**cliente(1), cancha="Vóley", fecha=fecha(3), hora="10:00")
+    version = m.persistence.version()
+    results = m.create_reservations([
+        dict(cliente(2), cancha="Vóley", fecha=fecha(3), hora="12:00"),
+        dict(cliente(3), cancha="Vóley", fecha=fecha(3), hora="10:30"),   # choca con la existente
+        dict(cliente(4), cancha="Sintética", fecha=fecha(3), hora="25:00"),
+    ])
+    assert [r["ok"] for r in results] == [True, False, False]
+    assert not any(r["applied"] for r in results)
+    assert len(m.reservations) == 1
+    assert m.persistence.version() == version
+    assert m.get_free_courts("Vóley", fecha(3), "12:00") == [1]
+
+
+def test_batch_conflict_inside_the_batch(make_manager):
+    m = make_manager()
+    results = m.create_reservations([dict(cliente(1), cancha="Vóley", fecha=fecha(2), hora="10:00", hora_fin="11:30"),
+                                     dict(cliente(2), cancha="Vóley", fecha=fecha(2), hora="11:00")])
+    assert results[1]["error"].startswith("Conflicto con el elemento 0")
+    assert m.reservations == []
+
+
+def test_edit_and_cancel_batches_are_all_or_nothing(make_manager):
+    m = make_manager()
+    a = m.create_reservation(**cliente(1), cancha="Vóley", fecha=fecha(2), hora="10:00")
+    b = m.create_reservation(**cliente(2), cancha="Vóley", fecha=fecha(2), hora="12:00")
+    # Intercambio de horarios dentro del lote: válido.
+    results = m.edit_reservations([{"id": a.id, "hora": "12:00"}, {"id": b.id, "hora": "10:00"}])
+    assert all(r["applied"] for r in results)
+    assert (a.hora, b.hora) == ("12:00", "10:00")
+    results = m.edit_reservations([{"id": a.id, "hora": "15:00"}, {"id": "no-existe", "hora": "16:00"}])
+    assert not results[0]["applied"] and a.hora == "12:00"
+    results = m.cancel_reservations([a.id, "no-existe"])
+    assert not results[0]["applied"] and len(m.reservations) == 2
+    assert all(r["applied"] for r in m.cancel_reservations([a.id, b.id]))
+    assert m.reservations == []
@@ -0,0 +1,33 @@
+# Juan David Ocampo Gutierrez
+# Nicolás Castro Pacheco
+# Michell Valencia Berdugo
+# Juan David Rivera Durán
+
+"""
+test_cache.py
+-------------
+
+Caché binaria de los JSON ("<archivo>.cache"): la genera la carga, cada
+escritura la descarta y nunca se lee una caché desactualizada.
+"""
+
+import os
+
+from tests.util import cliente, fecha
+
+
+def test_cache_is_dropped_on_write_and_rebuilt_on_load(make_manager, tmp_path):
+    cache = tmp_path / "reservas.json.cache"
+    m = make_manager()
+    r = m.create_reservation(**cliente(1), cancha="Vóley", fecha=fecha(2), hora="10:00")
+    m.close()
+    assert not cache.exists()
+    make_manager().close()
+    assert cache.exists()
+    # Una edición del mismo tamaño, dentro de la misma marca de tiempo, no deja la caché vieja.
+    m = make_manager()
+    m.edit_reservation_by_id(r.id, hora="12:00")
+    assert not cache.exists()
+    m.close()
+    assert [x.hora for x in make_manager().reservations] == ["12:00"]
+    assert os.path.exists(cache)
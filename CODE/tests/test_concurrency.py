@@ -0,0 +1,31 @@
+# Juan David Ocampo Gutierrez
+# Nicolás Castro Pacheco
+# Michell Valencia Berdugo
+# Juan David Rivera Durán
+
+"""
+test_concurrency.py
+-------------------
+
+Dos instancias de Manager sobre el mismo almacén (como dos procesos de
+recepción): ninguna pisa las escrituras de la otra.
+"""
+
+import pytest
+
+from tests.util import cliente, fecha
+
+
+@pytest.mark.parametrize("backend", ["json", "journal", "sqlite", "partitioned"])
+def test_two_instances_share_the_store(make_manager, backend):
+    # Dos Manager sobre el mismo almacén se comportan como dos procesos: cada
+    # escritura recarga si el otro confirmó cambios, así no se pisan.
+    m1, m2 = make_manager(backend), make_manager(backend)
+    r = m1.create_reservation(**cliente(1), cancha="Vóley", fecha=fecha(4), hora="10:00")
+    with pytest.raises(ValueError):
+        m2.create_reservation(**cliente(2), cancha="Vóley", fecha=fecha(4), hora="10:30")
+    assert m2.get_reservation_by_id(r.id) is not None
+    m2.cancel_reservation_by_id(r.id)
+    assert m1.refresh()
+    assert m1.reservations == []
+    assert not m1.refresh()
@@ -0,0 +1,67 @@
+# Juan David Ocampo Gutierrez
+# Nicolás Castro Pacheco
+# Michell Valencia Berdugo
+# Juan David Rivera Durán
+
+"""
+test_court_allocator.py
+-----------------------
+
+Ocupación por bloques, estrategias de asignación y búsqueda de inicios
+libres de CourtAllocator, y asignación de canchas desde Manager.
+"""
+
+import pytest
+
+from court_allocator import CourtAllocator
+from tests.util import cliente, fecha
+
+KEY = ("Sintética", "2030-01-07")
+
+
+def _allocator(*entries):
+    return CourtAllocator(30, [(KEY, numero, start, end) for numero, start, end in entries])
+
+
+def test_busy_and_release():
+    alloc = _allocator((1, 600, 660), (3, 630, 720))
+    assert alloc.busy(KEY, 600, 630) == 0b001
+    assert alloc.busy(KEY, 600, 720) == 0b101
+    assert alloc.busy(KEY, 720, 780) == 0
+    alloc.release(KEY, 1, 600, 660)
+    alloc.release(KEY, 3, 630, 720)
+    # Un día sin ocupación se descarta.
+    assert KEY not in alloc._days
+    assert alloc.day(KEY) == [0] * 48
+
+
+def test_choose_strategies():
+    # Cancha 2 ocupada justo antes de las 11:00; las demás libres.
+    alloc = _allocator((2, 600, 660))
+    free = 0b111 & ~alloc.busy(KEY, 660, 720)
+    assert alloc.choose(KEY, 660, 720, free, "primera") == 1
+    assert alloc.choose(KEY, 660, 720, free, "compacta") == 2
+    assert alloc.choose(KEY, 660, 720, 0, "compacta") == 0
+    with pytest.raises(ValueError):
+        alloc.choose(KEY, 660, 720, free, "azar")
+
+
+def test_free_starts_needs_one_court_free_for_the_whole_length():
+    # Dos canchas: la 1 ocupada de 10:00 a 11:00 y la 2 de 10:30 a 11:30.
+    alloc = _allocator((1, 600, 660), (2, 630, 690))
+    starts = alloc.free_starts(KEY, 2, 2, 20, 26)
+    # Inicios de una hora (2 bloques) entre los bloques 20 (10:00) y 26 (13:00).
+    assert [i for i in range(48) if starts >> i & 1] == [22, 23, 24]
+    # Un día sin reservas: todos los inicios posibles.
+    assert CourtAllocator(30).free_starts(("Vóley", "2030-01-07"), 1, 2, 20, 24) == 0b111 << 20
+
+
+def test_courts_are_assigned_until_the_type_is_full(make_manager):
+    m = make_manager()
+    numeros = [m.create_reservation(**cliente(n), cancha="Sintética", fecha=fecha(1), hora="18:00").court.numero
+               for n in range(m.get_court_count("Sintética"))]
+    assert sorted(numeros) == list(range(1, m.get_court_count("Sintética") + 1))
+    with pytest.raises(ValueError):
+        m.create_reservation(**cliente(9), cancha="Sintética", fecha=fecha(1), hora="18:30")
+    with pytest.raises(ValueError):
+        m.create_reservation(**cliente(9), cancha="Vóley", fecha=fecha(1), hora="10:00", hora_fin="10:45")
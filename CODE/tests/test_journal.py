@@ -0,0 +1,121 @@
+# Juan David Ocampo Gutierrez
+# Nicolás Castro Pacheco
+# Michell Valencia Berdugo
+# Juan David Rivera Durán
+
+"""
+test_journal.py
+---------------
+
+Recuperación del journal (cola truncada, corrupción intermedia, log
+rotado que quedó tras una caída) y durabilidad de cada escritura.
+"""
+
+import os
+
+import pytest
+
+import journal
+from journal import JournalPersistence
+from tests.util import cliente, fecha
+
+
+def _journal(tmp_path):
+    return tmp_path / "reservas.json.journal"
+
+
+def _three_bookings(make_manager):
+    m = make_manager("journal")
+    for hora in ("10:00", "12:00", "14:00"):
+        m.create_reservation(**cliente(1), cancha="Vóley", fecha=fecha(2), hora=hora)
+    m.close()
+
+
+def test_torn_final_record_is_discarded(make_manager, tmp_path, capsys):
+    _three_bookings(make_manager)
+    path = _journal(tmp_path)
+    size = path.stat().st_size
+    with open(path, "ab") as f:
+        f.write(b'0badc0de {"op":"create","r":{"id"')
+    m = make_manager("journal")
+    assert sorted(r.hora for r in m.reservations) == ["10:00", "12:00", "14:00"]
+    assert path.stat().st_size == size
+    assert "descartaron" in capsys.readouterr().out
+    # Los registros nuevos quedan detrás de los válidos y se recuperan.
+    m.create_reservation(**cliente(1), cancha="Vóley", fecha=fecha(2), hora="16:00")
+    m.close()
+    assert len(make_manager("journal").reservations) == 4
+
+
+def test_corruption_before_valid_records_stops_the_load(make_manager, tmp_path):
+    _three_bookings(make_manager)
+    path = _journal(tmp_path)
+    lines = path.read_bytes().split(b"\n")
+    lines[1] = b"00000000" + lines[1][8:]
+    data = b"\n".join(lines)
+    path.write_bytes(data)
+    with pytest.raises(ValueError, match="dañado"):
+        make_manager("journal")
+    assert path.read_bytes() == data
+
+
+def test_leftover_rotated_log_is_replayed(make_manager, tmp_path):
+    # Caída durante una compactación: queda el ".old" y el snapshot no lo incluye.
+    _three_bookings(make_manager)
+    os.replace(_journal(tmp_path), str(_journal(tmp_path)) + ".old")
+    m = make_manager("journal")
+    assert len(m.reservations) == 3
+    assert not os.path.exists(str(_journal(tmp_path)) + ".old")
+
+
+def test_write_returns_after_fsync(make_manager, monkeypatch):
+    m = make_manager("journal")
+    calls = []
+    real_fsync = os.fsync
+    monkeypatch.setattr(journal.os, "fsync", lambda fd: (calls.append(fd), real_fsync(fd))[1])
+    m.create_reservation(**cliente(1), cancha="Vóley", fecha=fecha(2), hora="10:00")
+    assert calls
+    p = m.persistence
+    assert p._synced == p._appended
+
+
+def test_failed_fsync_leaves_no_record(make_manager, tmp_path, monkeypatch):
+    m = make_manager("journal")
+    m.create_reservation(**cliente(1), cancha="Vóley", fecha=fecha(2), hora="10:00")
+    size = _journal(tmp_path).stat().st_size
+
+    def fail(fd):
+        raise OSError(5, "I/O error")
+    monkeypatch.setattr(journal.os, "fsync", fail)
+    with pytest.raises(OSError):
+        m.create_reservation(**cliente(1), cancha="Vóley", fecha=fecha(2), hora="12:00")
+    monkeypatch.undo()
+    assert _journal(tmp_path).stat().st_size == size
+    assert len(m.reservations) == 1
+    m.close()
+    assert [r.hora for r in make_manager("journal").reservations] == ["10:00"]
+
+
+def test_compaction_keeps_every_record(make_manager, tmp_path):
+    m = make_manager("journal")
+    m.persistence.compact_threshold = 2000
+    for n in range(40):
+        m.create_reservation(**cliente(n), cancha="Sintética", fecha=fecha(1 + n // 6), hora="18:00")
+    m.persistence._wait_compaction()
+    ids = {r.id for r in m.reservations}
+    m.close()
+    assert {r.id for r in JournalPersistence(str(tmp_path / "reservas.json")).load_reservations()} == ids
+
+
+def test_compaction_from_a_client_update_keeps_the_bookings(make_manager, tmp_path):
+    m = make_manager("journal")
+    m.persistence.compact_threshold = 1
+    ids = {m.create_reservation(**cliente(1), cancha="Vóley", fecha=fecha(2), hora=hora).id
+           for hora in ("10:00", "12:00")}
+    m.persistence._wait_compaction()
+    m.update_client(cliente(1)["documento"], nombre="Otro Nombre")
+    m.persistence._wait_compaction()
+    m.close()
+    fresh = make_manager("journal")
+    assert {r.id for r in fresh.reservations} == ids
+    assert fresh.clients.get(cliente(1)["documento"]).nombre == "Otro Nombre"
@@ -0,0 +1,62 @@
+# Juan David Ocampo Gutierrez
+# Nicolás Castro Pacheco
+# Michell Valencia Berdugo
+# Juan David Rivera Durán
+
+"""
+test_manager.py
+---------------
+
+Índices de Manager (por id, documento, cancha, fecha, intervalos y
+asignador de canchas) frente a las reservas tras altas, ediciones y
+cancelaciones, en cada backend.
+"""
+
+import random
+
+import pytest
+
+from reservation import hora_to_minutes
+from tests.util import brute_free, cliente, fecha, random_interval, random_ops
+
+
+def assert_indexes_consistent(m, rnd, queries=150):
+    reservations = m.reservations
+    assert set(m._by_id) == {r.id for r in reservations}
+    assert {i for bucket in m._by_doc.values() for i in bucket} == set(m._by_id)
+    assert all(r.client.documento == doc for doc, bucket in m._by_doc.items() for r in bucket.values())
+    assert all(r.court.tipo == tipo for tipo, bucket in m._by_court.items() for r in bucket.values())
+    key = m.SORT_KEYS["fecha"]
+    ids = list(m._sorted["fecha"].ids())
+    assert sorted(ids) == sorted(m._by_id)
+    assert [key(m._by_id[i]) for i in ids] == sorted(key(r) for r in reservations)
+    assert len(m._intervals) == len(reservations)
+    # Asignador: cada bloque ocupado es exactamente el de alguna reserva.
+    expected = {}
+    for r in reservations:
+        blocks = expected.setdefault((r.court.tipo, r.fecha), [0] * (24 * 60 // m.GRANULARIDAD_MIN))
+        for b in range(hora_to_minutes(r.hora) // 30, hora_to_minutes(r.hora_fin) // 30):
+            assert not blocks[b] >> (r.court.numero - 1) & 1, "reservas solapadas en la misma cancha"
+            blocks[b] |= 1 << (r.court.numero - 1)
+    assert m._allocator._days == expected
+    for _ in range(queries):
+        tipo = rnd.choice(m.get_court_types())
+        f = fecha(rnd.randrange(1, 20))
+        hora, hora_fin = random_interval(rnd)
+        free = brute_free(reservations, m.get_court_count(tipo), tipo, f, hora, hora_fin)
+        assert m.get_free_courts(tipo, f, hora, hora_fin) == free
+        numero = rnd.randrange(1, m.get_court_count(tipo) + 1)
+        assert m.check_availability(tipo, f, hora, hora_fin=hora_fin, cancha_num=numero) == (numero in free)
+
+
+@pytest.mark.parametrize("backend", ["json", "journal", "sqlite", "partitioned"])
+def test_indexes_match_reservations_after_random_changes(make_manager, backend):
+    rnd = random.Random(7)
+    m = make_manager(backend)
+    random_ops(m, rnd, 300)
+    assert len(m.reservations) > 50
+    assert_indexes_consistent(m, rnd)
+    # Una carga desde cero del mismo almacén da el mismo estado.
+    fresh = make_manager(backend)
+    assert {r.id: r.to_dict() for r in fresh.reservations} == {r.id: r.to_dict() for r in m.reservations}
+    assert fresh._allocator._days == m._allocator._days
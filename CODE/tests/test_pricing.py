@@ -0,0 +1,92 @@
+# Juan David Ocampo Gutierrez
+# Nicolás Castro Pacheco
+# Michell Valencia Berdugo
+# Juan David Rivera Durán
+
+"""
+test_pricing.py
+---------------
+
+Reglas de tarifas compiladas (factor, precio fijo, festivos, socios),
+validación del archivo de configuración y recarga en caliente en Manager.
+"""
+
+import json
+import os
+
+import pytest
+
+from pricing import PricingConfig, PricingTable
+
+# 2030-01-07 es lunes; 2030-01-12, sábado.
+LUNES, SABADO = "2030-01-07", "2030-01-12"
+
+
+def _table():
+    return PricingTable(
+        [("Sintética", 10.0, 2), ("Vóley", 8.0, 1)],
+        [{"dias": ["lun", "mar", "mie", "jue", "vie"], "desde": "18:00", "hasta": "22:00", "factor": 1.5},
+         {"dias": ["sab", "dom", "festivo"], "factor": 2.0},
+         {"canchas": ["Vóley"], "dias": ["festivo"], "precio_por_hora": 20.0}],
+        holidays=["2030-01-08"], members={"descuento": 0.1, "documentos": ["999"]})
+
+
+def test_rules_apply_per_block():
+    t = _table()
+    assert t.price("Sintética", LUNES, 600, 660) == 10.0
+    # Media hora normal y media hora con recargo.
+    assert t.price("Sintética", LUNES, 17 * 60 + 30, 18 * 60 + 30) == 5.0 + 7.5
+    assert t.price("Sintética", SABADO, 600, 690) == 30.0
+    # Festivo (martes): recargo de festivo y precio fijo del Vóley.
+    assert t.price("Sintética", "2030-01-08", 600, 660) == 20.0
+    assert t.price("Vóley", "2030-01-08", 600, 660) == 20.0
+    assert t.price("Sintética", LUNES, 600, 660, documento="999") == 9.0
+    assert t.price("Tenis", LUNES, 600, 660) == 0.0
+
+
+@pytest.mark.parametrize("data, message", [
+    ({"canchas": []}, "no define canchas"),
+    ({"canchas": [{"tipo": "A", "precio_por_hora": 1}, {"tipo": "A", "precio_por_hora": 2}]}, "repetido"),
+    ({"canchas": [{"tipo": "A", "precio_por_hora": 1}], "reglas": [{"factor": 2, "precio_por_hora": 3}]},
+     "solo uno"),
+    ({"canchas": [{"tipo": "A", "precio_por_hora": 1}], "reglas": [{"canchas": ["B"], "factor": 2}]},
+     "cancha desconocida"),
+    ({"canchas": [{"tipo": "A", "precio_por_hora": 1}], "festivos": ["31/12/2030"]}, "festivo inválido"),
+    ({"canchas": [{"tipo": "A", "precio_por_hora": 1}], "festivos": 20301225}, "'festivos' debe ser una lista"),
+    ({"canchas": [{"tipo": "A", "precio_por_hora": 1}], "festivos": [20301225]}, "festivo inválido"),
+    ({"canchas": [{"tipo": "A", "precio_por_hora": 1}], "reglas": {"factor": 2}}, "'reglas' debe ser una lista"),
+    ({"canchas": [{"tipo": "A", "precio_por_hora": 1}], "reglas": [{"canchas": 5, "factor": 2}]},
+     "'canchas' debe ser una lista"),
+    ({"canchas": [{"tipo": "A", "precio_por_hora": 1}], "socios": {"documentos": 5}}, "socios"),
+])
+def test_invalid_config_is_rejected(tmp_path, data, message):
+    path = tmp_path / "canchas.json"
+    path.write_text(json.dumps(data), encoding="utf-8")
+    with pytest.raises(ValueError, match=message):
+        PricingConfig(str(path), [("A", 1.0, 1)])
+
+
+def test_manager_reloads_config(make_manager, tmp_path):
+    path = tmp_path / "canchas.json"
+    m = make_manager(config_path=str(path))
+    assert m.get_court_types() == ["Sintética", "Vóley"]
+    path.write_text(json.dumps({"canchas": [{"tipo": "Sintética", "precio_por_hora": 6.0, "cantidad": 2},
+                                            {"tipo": "Vóley", "precio_por_hora": 7.5},
+                                            {"tipo": "Tenis", "precio_por_hora": 9.0}]}), encoding="utf-8")
+    assert m.reload_config()
+    assert m.get_court_types() == ["Sintética", "Vóley", "Tenis"]
+    assert m.get_court_count("Sintética") == 2
+    assert m.get_price("Tenis", LUNES, "10:00") == 9.0
+    # Un archivo inválido se informa y se conservan las tarifas vigentes.
+    path.write_text("{", encoding="utf-8")
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    assert not m.reload_config()
+    assert m.get_court_types() == ["Sintética", "Vóley", "Tenis"]
+
+
+def test_unchanged_config_does_not_take_the_write_lock(make_manager, tmp_path):
+    m = make_manager(config_path=str(tmp_path / "canchas.json"))
+    m._write_lock = None   # cualquier intento de tomarlo falla
+    assert not m.reload_config()
+    assert not m.refresh()
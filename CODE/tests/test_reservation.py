@@ -0,0 +1,30 @@
+# Juan David Ocampo Gutierrez
+# Nicolás Castro Pacheco
+# Michell Valencia Berdugo
+# Juan David Rivera Durán
+
+"""
+test_reservation.py
+-------------------
+
+Representación compacta: las reservas cargadas comparten la instancia de
+cada cancha física, con la tarifa por hora de la configuración.
+"""
+
+from court import Court
+from tests.util import cliente, fecha
+
+
+def test_loaded_reservations_share_the_configured_court(make_manager):
+    m = make_manager()
+    for hora, hora_fin in (("10:00", "11:00"), ("12:00", "14:30"), ("15:00", "15:30")):
+        m.create_reservation(**cliente(1), cancha="Vóley", fecha=fecha(2), hora=hora, hora_fin=hora_fin)
+    m.close()
+    canonical = len(Court._canonical)
+    fresh = make_manager()
+    voley, = [c for c in fresh.courts if c.tipo == "Vóley"]
+    assert {id(r.court) for r in fresh.reservations} == {id(voley)}
+    assert voley.precio_por_hora == 7.5
+    assert sorted(r.precio for r in fresh.reservations) == [3.75, 7.5, 18.75]
+    # Un total por reserva no crea canchas nuevas.
+    assert len(Court._canonical) == canonical
@@ -0,0 +1,97 @@
+# Juan David Ocampo Gutierrez
+# Nicolás Castro Pacheco
+# Michell Valencia Berdugo
+# Juan David Rivera Durán
+
+"""
+test_server.py
+--------------
+
+La API responde 201 solo cuando la reserva ya está en disco: si el
+almacén no puede escribir, la respuesta es 5xx y nada queda confirmado.
+"""
+
+import errno
+import json
+
+import pytest
+
+from persistence import Persistence
+from server import ApiTestClient, ReservasApp
+from tests.util import cliente, fecha
+
+
+@pytest.fixture
+def api(make_manager):
+    errors = []
+    app = ReservasApp(make_manager(write_behind=True, on_error=errors.append))
+    client = ApiTestClient(app)
+    client.errors = errors
+    yield client
+    client.close()
+    app.close()
+
+
+def _stored(tmp_path):
+    # Reservas en disco, leídas por un backend aparte (como tras un reinicio).
+    p = Persistence(str(tmp_path / "reservas.json"), cache=False)
+    try:
+        return p.load_reservations()
+    finally:
+        p.close()
+
+
+def test_created_booking_is_on_disk(api, tmp_path):
+    status, body = api.post("/reservas", dict(cliente(1), cancha="Vóley", fecha=fecha(2), hora="10:00"))
+    assert status == 201
+    assert [r.id for r in _stored(tmp_path)] == [body["id"]]
+
+
+def test_failed_write_is_not_acknowledged(api, tmp_path, monkeypatch):
+    def disk_full(*args, **kwargs):
+        raise OSError(errno.ENOSPC, "No space left on device")
+    monkeypatch.setattr(json, "dump", disk_full)
+    status, body = api.post("/reservas", dict(cliente(1), cancha="Vóley", fecha=fecha(2), hora="10:00"))
+    assert status >= 500
+    assert "id" not in body
+    assert _stored(tmp_path) == []
+    # El cambio sigue pendiente y se escribe cuando el disco vuelve a estar disponible.
+    monkeypatch.undo()
+    api.app.manager.flush()
+    assert len(_stored(tmp_path)) == 1
+
+
+def test_booking_taken_by_another_process_is_a_conflict(api, make_manager, monkeypatch):
+    # Otro proceso reserva el mismo horario (Vóley tiene una sola cancha) antes
+    # del volcado: el alta diferida se descarta y no se confirma con 201.
+    other = make_manager()
+    manager = api.app.manager
+    real_flush = manager.flush
+
+    def flush_after_other_process():
+        if not other.reservations:
+            other.create_reservation(**cliente(2), cancha="Vóley", fecha=fecha(2), hora="10:00")
+        real_flush()
+    monkeypatch.setattr(manager, "flush", flush_after_other_process)
+    status, body = api.post("/reservas", dict(cliente(1), cancha="Vóley", fecha=fecha(2), hora="10:00"))
+    assert status == 409
+    assert "descartado" in body["error"]
+    assert [r.client.documento for r in manager.reservations] == [cliente(2)["documento"]]
+
+
+@pytest.mark.parametrize("method, fields", [
+    ("post", {"nombre": 123}),
+    ("post", {"cancha_num": "1"}),
+    ("patch", {"nombre": 123}),
+    ("patch", {"hora": ["10:00"]}),
+    ("patch", {"cancha_num": True}),
+])
+def test_wrong_field_types_are_rejected(api, method, fields):
+    booking = dict(cliente(1), cancha="Vóley", fecha=fecha(2), hora="10:00")
+    if method == "post":
+        status, body = api.post("/reservas", dict(booking, **fields))
+    else:
+        _, created = api.post("/reservas", booking)
+        status, body = api.patch(f"/reservas/{created['id']}", fields)
+    assert status == 400
+    assert list(fields)[0] in body["error"]
@@ -0,0 +1,89 @@
+# Juan David Ocampo Gutierrez
+# Nicolás Castro Pacheco
+# Michell Valencia Berdugo
+# Juan David Rivera Durán
+
+"""
+test_slot_ledger.py
+-------------------
+
+El libro de slots mapeado en memoria responde lo mismo que los índices
+de Manager, se mantiene al día con cada escritura (también para un lector
+abierto antes de que el archivo crezca) y open_current lo descarta si el
+almacén cambió sin actualizarlo.
+"""
+
+import random
+
+import pytest
+
+from reservation import hora_to_minutes
+from slot_ledger import open_current
+from tests.util import cliente, fecha, random_interval, random_ops
+
+
+def _assert_ledger_matches(m, ledger, rnd):
+    for tipo in m.get_court_types():
+        for dias in range(1, 130):
+            assert ledger.day(tipo, fecha(dias)) == m._allocator.day((tipo, fecha(dias)))
+    for _ in range(100):
+        tipo = rnd.choice(m.get_court_types())
+        f = fecha(rnd.randrange(1, 130))
+        hora, hora_fin = random_interval(rnd)
+        assert ledger.free_courts(tipo, f, hora_to_minutes(hora), hora_to_minutes(hora_fin)) == \
+            m.get_free_courts(tipo, f, hora, hora_fin)
+    for r in m.reservations:
+        assert ledger.occupant(r.court.tipo, r.court.numero, r.fecha, hora_to_minutes(r.hora)) == r.id
+
+
+@pytest.mark.parametrize("backend", ["json", "journal", "sqlite", "partitioned"])
+def test_ledger_follows_every_write(make_manager, backend):
+    rnd = random.Random(3)
+    m = make_manager(backend, slot_ledger=True)
+    m.create_reservation(**cliente(1), cancha="Vóley", fecha=fecha(1), hora="10:00")
+    reader = open_current(m.persistence.filepath)
+    assert reader is not None
+    try:
+        random_ops(m, rnd, 200)
+        # Fechas lejanas: el archivo crece y el lector ya abierto debe remapear.
+        random_ops(m, rnd, 100, dias=120)
+        _assert_ledger_matches(m, reader, rnd)
+        assert reader.version == m.persistence.version()
+    finally:
+        reader.close()
+
+
+def test_ledger_matches_a_full_rebuild(make_manager):
+    rnd = random.Random(4)
+    m = make_manager(slot_ledger=True)
+    random_ops(m, rnd, 250, dias=90)
+    m.close()
+    before = open_current(m.persistence.filepath)
+    days = {(tipo, dias): before.day(tipo, fecha(dias)) for tipo in m.get_court_types() for dias in range(1, 90)}
+    before.close()
+    # Una carga nueva reconstruye el libro desde las reservas.
+    fresh = make_manager(slot_ledger=True)
+    after = open_current(fresh.persistence.filepath)
+    try:
+        assert {(tipo, dias): after.day(tipo, fecha(dias)) for tipo, dias in days} == days
+        _assert_ledger_matches(fresh, after, rnd)
+    finally:
+        after.close()
+
+
+def test_stale_ledger_is_not_used(make_manager):
+    m = make_manager(slot_ledger=True)
+    m.create_reservation(**cliente(1), cancha="Vóley", fecha=fecha(2), hora="10:00")
+    path = m.persistence.filepath
+    assert open_current(path) is not None
+    # Otro proceso escribe sin mantener el libro.
+    other = make_manager()
+    other.create_reservation(**cliente(2), cancha="Vóley", fecha=fecha(2), hora="12:00")
+    assert open_current(path) is None
+    # Quien lo mantiene lo reconstruye al detectar el cambio.
+    m.refresh()
+    ledger = open_current(path)
+    try:
+        assert ledger.free_courts("Vóley", fecha(2), 12 * 60, 13 * 60) == []
+    finally:
+        ledger.close()
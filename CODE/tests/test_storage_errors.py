@@ -0,0 +1,66 @@
+# Juan David Ocampo Gutierrez
+# Nicolás Castro Pacheco
+# Michell Valencia Berdugo
+# Juan David Rivera Durán
+
+"""
+test_storage_errors.py
+----------------------
+
+Un fallo de escritura del almacén (disco lleno) debe llegar a quien
+escribe: la versión no cambia, la memoria vuelve al estado anterior y
+ningún mes del particionado queda a medio escribir.
+"""
+
+import errno
+import json
+
+import pytest
+
+from tests.util import cliente, disk_full, fecha
+
+
+@pytest.mark.parametrize("backend", ["json", "journal", "partitioned"])
+def test_failed_write_raises_and_rolls_back(make_manager, monkeypatch, backend):
+    m = make_manager(backend)
+    kept = m.create_reservation(**cliente(1), cancha="Vóley", fecha=fecha(2), hora="10:00")
+    # Otra reserva del mismo día: cancelar no deja el mes vacío (eso solo borra el archivo).
+    other = m.create_reservation(**cliente(1), cancha="Vóley", fecha=fecha(2), hora="16:00")
+    version = m.persistence.version()
+    disk_full(monkeypatch, backend)
+    with pytest.raises(OSError):
+        m.create_reservation(**cliente(2), cancha="Vóley", fecha=fecha(2), hora="12:00")
+    with pytest.raises(OSError):
+        m.edit_reservation_by_id(kept.id, fecha=fecha(40), hora="15:00")
+    with pytest.raises(OSError):
+        m.cancel_reservation_by_id(kept.id)
+    assert m.persistence.version() == version
+    expected = [(kept.id, fecha(2), "10:00"), (other.id, fecha(2), "16:00")]
+    assert sorted((r.id, r.fecha, r.hora) for r in m.reservations) == sorted(expected)
+    assert m.get_free_courts("Vóley", fecha(2), "12:00") == [1]
+    monkeypatch.undo()
+    m.close()
+    fresh = make_manager(backend)
+    assert sorted((r.id, r.fecha, r.hora) for r in fresh.reservations) == sorted(expected)
+
+
+def test_partitioned_batch_across_months_is_undone(make_manager, monkeypatch):
+    m = make_manager("partitioned")
+    a = m.create_reservation(**cliente(1), cancha="Vóley", fecha=fecha(2), hora="10:00")
+    calls = []
+    real_dump = json.dump
+
+    def fail_second(*args, **kwargs):
+        # El primer mes se escribe; el segundo falla.
+        calls.append(1)
+        if len(calls) == 2:
+            raise OSError(errno.ENOSPC, "No space left on device")
+        return real_dump(*args, **kwargs)
+    monkeypatch.setattr(json, "dump", fail_second)
+    with pytest.raises(OSError):
+        m.create_reservations([dict(cliente(2), cancha="Vóley", fecha=fecha(2), hora="12:00"),
+                               dict(cliente(3), cancha="Vóley", fecha=fecha(70), hora="12:00")])
+    monkeypatch.undo()
+    assert [r.id for r in m.reservations] == [a.id]
+    m.close()
+    assert [r.id for r in make_manager("partitioned").reservations] == [a.id]
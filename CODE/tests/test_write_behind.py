@@ -0,0 +1,66 @@
+# Juan David Ocampo Gutierrez
+# Nicolás Castro Pacheco
+# Michell Valencia Berdugo
+# Juan David Rivera Durán
+
+"""
+test_write_behind.py
+--------------------
+
+Escritura diferida (write-behind): un fallo del almacén no pierde el
+cambio, que sigue pendiente hasta que se pueda escribir, y un volcado en
+curso no detiene a quien sigue reservando.
+"""
+
+import threading
+
+import pytest
+
+from tests.util import cliente, disk_full, fecha
+
+
+@pytest.mark.parametrize("backend", ["json", "journal", "partitioned"])
+def test_write_behind_keeps_failed_changes_pending(make_manager, monkeypatch, backend):
+    errors = []
+    m = make_manager(backend, write_behind=True, on_error=errors.append)
+    version = m.persistence.version()
+    disk_full(monkeypatch, backend)
+    r = m.create_reservation(**cliente(1), cancha="Vóley", fecha=fecha(2), hora="10:00")
+    with pytest.raises(OSError):
+        m.flush()
+    assert m._pending and m.persistence.version() == version
+    monkeypatch.undo()
+    m.flush()
+    assert not m._pending
+    m.close()
+    assert [x.id for x in make_manager(backend).reservations] == [r.id]
+
+
+def test_mutations_do_not_wait_for_the_flush_io(make_manager, monkeypatch):
+    m = make_manager("journal", write_behind=True)
+    first = m.create_reservation(**cliente(1), cancha="Vóley", fecha=fecha(2), hora="10:00")
+    started, release = threading.Event(), threading.Event()
+    released = []
+    real_apply = m.persistence.apply_changes
+
+    def slow_apply(*args):
+        started.set()
+        # Si la reserva de abajo esperara a esta escritura, la espera vence (False).
+        released.append(release.wait(5))
+        return real_apply(*args)
+    monkeypatch.setattr(m.persistence, "apply_changes", slow_apply)
+    flusher = threading.Thread(target=m.flush)
+    flusher.start()
+    assert started.wait(5)
+    # Con la escritura detenida en el disco, otra reserva entra (y valida contra la primera).
+    second = m.create_reservation(**cliente(2), cancha="Vóley", fecha=fecha(2), hora="12:00")
+    with pytest.raises(ValueError):
+        m.create_reservation(**cliente(3), cancha="Vóley", fecha=fecha(2), hora="10:00")
+    assert not m.refresh()
+    release.set()
+    flusher.join()
+    assert released == [True]
+    monkeypatch.undo()
+    m.flush()
+    m.close()
+    assert {r.id for r in make_manager("journal").reservations} == {first.id, second.id}
@@ -0,0 +1,94 @@
+# Juan David Ocampo Gutierrez
+# Nicolás Castro Pacheco
+# Michell Valencia Berdugo
+# Juan David Rivera Durán
+
+"""
+util.py
+-------
+
+Datos y operaciones auxiliares de las pruebas: backends, clientes válidos,
+fechas relativas a hoy, una secuencia aleatoria de altas, ediciones y
+cancelaciones, el cálculo por fuerza bruta de las canchas libres contra
+el que se comparan los índices y un disco lleno simulado.
+"""
+
+import errno
+import json
+from datetime import date, timedelta
+
+import journal
+from journal import JournalPersistence
+from partitioned import PartitionedPersistence
+from persistence import Persistence
+from reservation import hora_to_minutes, minutes_to_hora
+from sqlite_storage import SQLitePersistence
+
+# Backend -> fábrica a partir del directorio de la prueba.
+BACKENDS = {
+    "json": lambda d: Persistence(str(d / "reservas.json")),
+    "journal": lambda d: JournalPersistence(str(d / "reservas.json")),
+    "sqlite": lambda d: SQLitePersistence(str(d / "reservas.db")),
+    "partitioned": lambda d: PartitionedPersistence(str(d / "reservas.json")),
+}
+
+
+def fecha(dias: int) -> str:
+    # Fecha a 'dias' días de hoy (YYYY-MM-DD).
+    return (date.today() + timedelta(days=dias)).isoformat()
+
+
+def cliente(n: int) -> dict:
+    # Datos de un cliente válido distinto para cada n.
+    documento = str(100000 + n)
+    return {"nombre": "Cliente Prueba", "documento": documento, "telefono": "3001234567",
+            "email": f"c{documento}@correo.com"}
+
+
+def random_interval(rnd):
+    # (hora, hora_fin) alineados a 30 minutos dentro del horario (10:00 a 22:00).
+    start = rnd.randrange(20, 44) * 30
+    end = min(start + rnd.randrange(1, 5) * 30, 22 * 60)
+    return minutes_to_hora(start), minutes_to_hora(end)
+
+
+def random_ops(m, rnd, steps, dias=20):
+    # Altas, ediciones, cancelaciones y lotes al azar; los conflictos (ValueError) se ignoran.
+    for _ in range(steps):
+        hora, hora_fin = random_interval(rnd)
+        f = fecha(rnd.randrange(1, dias))
+        tipo = rnd.choice(m.get_court_types())
+        op = rnd.random()
+        try:
+            if op < 0.45:
+                m.create_reservation(**cliente(rnd.randrange(8)), cancha=tipo, fecha=f, hora=hora, hora_fin=hora_fin)
+            elif op < 0.65 and m.reservations:
+                m.edit_reservation_by_id(rnd.choice(m.reservations).id, fecha=f, hora=hora, hora_fin=hora_fin)
+            elif op < 0.8 and m.reservations:
+                m.cancel_reservation_by_id(rnd.choice(m.reservations).id)
+            elif op < 0.9:
+                m.create_reservations([dict(cliente(rnd.randrange(8)), cancha=tipo, fecha=f, hora=h)
+                                       for h in (hora, hora_fin if hora_fin < "22:00" else hora)])
+            elif m.reservations:
+                m.cancel_reservations([r.id for r in rnd.sample(m.reservations, min(2, len(m.reservations)))])
+        except ValueError:
+            pass
+
+
+def brute_free(reservations, count, tipo, f, hora, hora_fin):
+    # Canchas del tipo libres en [hora, hora_fin) recorriendo todas las reservas.
+    start, end = hora_to_minutes(hora), hora_to_minutes(hora_fin)
+    busy = {r.court.numero for r in reservations
+            if r.court.tipo == tipo and r.fecha == f
+            and hora_to_minutes(r.hora) < end and start < hora_to_minutes(r.hora_fin)}
+    return [n for n in range(1, count + 1) if n not in busy]
+
+
+def disk_full(monkeypatch, backend):
+    # Disco lleno: JSON y particionado serializan con json.dump; el journal anexa y hace fsync.
+    def fail(*args, **kwargs):
+        raise OSError(errno.ENOSPC, "No space left on device")
+    if backend == "journal":
+        monkeypatch.setattr(journal.os, "fsync", fail)
+    else:
+        monkeypatch.setattr(json, "dump", fail)
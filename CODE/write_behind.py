@@ -0,0 +1,96 @@
+# Juan David Ocampo Gutierrez
+# Nicolás Castro Pacheco
+# Michell Valencia Berdugo
+# Juan David Rivera Durán
+
+"""
+write_behind.py
+---------------
+
+Hilo de escritura diferida (write-behind) para Manager.
+
+Las mutaciones solo marcan el almacén como sucio; este hilo espera un
+breve intervalo para agrupar la ráfaga y llama a la función de volcado
+una sola vez. flush() fuerza el volcado de forma síncrona (cierre de la
+ventana, save_all) y close() vacía lo pendiente y detiene el hilo.
+
+Los errores del volcado no se pierden: se entregan a on_error (desde el
+hilo de escritura) y el volcado se reintenta mientras quede algo pendiente.
+"""
+
+import threading
+import time
+
+
+class WriteBehindWorker:
+    # Espera (segundos) para agrupar una ráfaga de cambios en un solo volcado.
+    DELAY = 0.2
+    # Espera antes de reintentar un volcado fallido.
+    RETRY_DELAY = 1.0
+
+    def __init__(self, flush_fn, on_error=None, delay=None):
+        # flush_fn() vuelca todo lo pendiente; debe dejarlo pendiente si falla.
+        self._flush_fn = flush_fn
+        self._on_error = on_error
+        self.delay = self.DELAY if delay is None else delay
+        self._cond = threading.Condition()
+        self._dirty = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    def mark_dirty(self):
+        with self._cond:
+            self._dirty = True
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._dirty or self._closed)
+                if self._closed:
+                    return
+                # Ventana de agrupación: las mutaciones de la ráfaga se suman al mismo
+                # volcado (los notify de mark_dirty no la acortan; el cierre sí).
+                deadline = time.monotonic() + self.delay
+                remaining = self.delay
+                while remaining > 0 and not self._closed:
+                    self._cond.wait(remaining)
+                    remaining = deadline - time.monotonic()
+                self._dirty = False
+            if not self._flush_safely():
+                with self._cond:
+                    # Se reintenta tras una pausa (o antes, si llega otro cambio o el cierre).
+                    self._dirty = True
+                    self._cond.wait(self.RETRY_DELAY)
+
+    def _flush_safely(self):
+        try:
+            self._flush_fn()
+            return True
+        except Exception as e:
+            self.report(e)
+            return False
+
+    def report(self, error):
+        # Entrega el error a la UI (u otro consumidor); sin callback se imprime.
+        if self._on_error is not None:
+            try:
+                self._on_error(error)
+                return
+            except Exception:
+                pass
+        print(f"[ERROR] Escritura diferida: {error}")
+
+    def flush(self):
+        """Vuelca lo pendiente en el hilo que llama. Propaga el error si falla."""
+        # flush_fn se serializa por su cuenta (Manager toma su lock de escritura).
+        self._flush_fn()
+
+    def close(self):
+        """Detiene el hilo y hace un último volcado síncrono."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        self.flush()